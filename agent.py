@@ -0,0 +1,349 @@
+"""Agente do ServerFlow: expõe os servidores desta máquina para uma GUI remota.
+
+    python agent.py [--host 127.0.0.1] [--port 7700] [--config server_configs.json]
+                    [--token SEGREDO]
+
+O agente carrega a configuração local, gerencia os processos com o mesmo
+`Server` da GUI (sem janela: `app_root` é None) e atende o protocolo de linhas
+JSON descrito em remote.py. A saída de todos os servidores é juntada e enviada
+a cada `OUTPUT_INTERVAL` em uma única mensagem, e o estado só dos servidores
+que mudaram a cada `STATUS_INTERVAL`, então o tráfego não cresce com o volume
+de linhas de cada processo. Clientes lentos demais são desconectados em vez de
+acumular memória no agente.
+
+Por padrão escuta só em 127.0.0.1; para aceitar outras máquinas use `--host`
+junto com `--token` (ou a variável SERVERFLOW_AGENT_TOKEN): sem token o agente
+se recusa a escutar em um endereço que não seja de loopback. Precisa do módulo
+tkinter instalado (o `Server` vive em app.py), mas não de uma tela.
+"""
+
+import argparse
+import asyncio
+import collections
+import hmac
+import ipaddress
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+
+import app
+from eventlog import EventStore
+from netutil import AsyncioService
+from preflight import run_preflight
+from remote import DEFAULT_AGENT_PORT, PROTOCOL_VERSION, encode
+
+OUTPUT_INTERVAL = 0.1  # Segundos entre envios da saída acumulada
+STATUS_INTERVAL = 0.25  # Segundos entre envios das mudanças de estado
+MAX_BATCH_LINES = 1000  # Linhas por servidor em um envio; as mais antigas sobram
+MAX_CLIENT_BUFFER = 4 * 1024 * 1024  # Bytes pendentes antes de desconectar o cliente
+TAIL_LINES = 200  # Linhas devolvidas pela operação "tail"
+TAIL_BYTES = 64 * 1024
+
+
+def server_status(server):
+    """Estado resumido de um servidor, como enviado aos clientes."""
+    process = server.process
+    active = app.server_registry.is_active(server)
+    return {
+        "name": server.name,
+        "state": server.state,
+        "status": server.status_text,
+        "pid": process.pid if process is not None and active else None,
+        "port": server.expected_port,
+        "group": server.group,
+    }
+
+
+class Agent(AsyncioService):
+    """Atende clientes do protocolo de remote.py para os servidores de `registry`."""
+
+    def __init__(self, registry, port=DEFAULT_AGENT_PORT, host="127.0.0.1", token=""):
+        super().__init__()
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.token = token
+        self.node = socket.gethostname()
+        self.messages_sent = 0
+        self.dropped_lines = collections.Counter()  # Linhas descartadas por servidor
+        self._clients = set()
+        self._pending = {}  # nome -> linhas desde o último envio
+        self._pending_lock = threading.Lock()
+        self._last_status = {}
+        self._server = None
+
+    def attach(self, server):
+        """Passa a transmitir a saída de `server`."""
+        server.output_listener = self._on_output
+
+    def _on_output(self, server, line):
+        # Chamado pelas threads de leitura dos logs
+        with self._pending_lock:
+            lines = self._pending.get(server.name)
+            if lines is None:
+                lines = self._pending[server.name] = collections.deque(
+                    maxlen=MAX_BATCH_LINES
+                )
+            if len(lines) == MAX_BATCH_LINES:
+                self.dropped_lines[server.name] += 1
+            lines.append(line)
+
+    async def _open(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, reuse_address=True
+        )
+        asyncio.ensure_future(self._flush())
+
+    async def _close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await super()._close()
+
+    # --- Envio em lote ---
+
+    def _broadcast(self, message):
+        data = encode(message)
+        for writer in list(self._clients):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self._clients.discard(writer)
+                writer.close()  # Cliente não acompanha o ritmo
+                continue
+            writer.write(data)
+            self.messages_sent += 1
+
+    def _changed_statuses(self):
+        changed = []
+        for server in self.registry.all():
+            status = server_status(server)
+            if self._last_status.get(server.name) != status:
+                self._last_status[server.name] = status
+                changed.append(status)
+        return changed
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        next_status = 0.0
+        while True:
+            await asyncio.sleep(OUTPUT_INTERVAL)
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if pending and self._clients:
+                self._broadcast(
+                    {
+                        "event": "output",
+                        "lines": {name: list(lines) for name, lines in pending.items()},
+                    }
+                )
+            if loop.time() >= next_status:
+                next_status = loop.time() + STATUS_INTERVAL
+                changed = self._changed_statuses()
+                if changed and self._clients:
+                    self._broadcast({"event": "status", "servers": changed})
+
+    # --- Pedidos ---
+
+    async def _handle(self, reader, writer):
+        authenticated = False
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                message = json.loads(raw)
+                request_id = message.get("id")
+                op = message.get("op")
+                if op == "hello":
+                    token = str(message.get("token") or "")
+                    if self.token and not hmac.compare_digest(token, self.token):
+                        writer.write(
+                            encode(
+                                {
+                                    "id": request_id,
+                                    "ok": False,
+                                    "error": "token inválido",
+                                }
+                            )
+                        )
+                        break
+                    authenticated = True
+                    writer.write(
+                        encode({"id": request_id, "ok": True, "result": self._hello()})
+                    )
+                    self._clients.add(writer)
+                elif not authenticated:
+                    writer.write(
+                        encode(
+                            {
+                                "id": request_id,
+                                "ok": False,
+                                "error": "envie hello antes",
+                            }
+                        )
+                    )
+                    break
+                else:
+                    # Cada pedido em uma tarefa: um reinício demorado não segura os demais
+                    asyncio.ensure_future(
+                        self._respond(writer, request_id, op, message)
+                    )
+        except (OSError, ValueError, asyncio.CancelledError):
+            pass  # Cliente desconectou, mandou lixo ou o agente está encerrando
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def _hello(self):
+        return {
+            "node": self.node,
+            "version": PROTOCOL_VERSION,
+            "servers": [server_status(server) for server in self.registry.all()],
+        }
+
+    async def _respond(self, writer, request_id, op, message):
+        loop = asyncio.get_running_loop()
+        try:
+            reply = await loop.run_in_executor(None, self._dispatch, op, message)
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        if not writer.is_closing():
+            writer.write(encode({"id": request_id, "op": op, **reply}))
+
+    def _dispatch(self, op, message):
+        """Executa um pedido (em uma thread do executor, pode bloquear)."""
+        if op == "list":
+            return {"ok": True, "result": self._hello()["servers"]}
+        server = self.registry.get(message.get("server") or "")
+        if server is None:
+            return {
+                "ok": False,
+                "server": message.get("server"),
+                "error": "servidor desconhecido",
+            }
+        if op == "tail":
+            lines = server.output_buffer[-TAIL_BYTES:].splitlines(keepends=True)
+            return {"ok": True, "server": server.name, "result": lines[-TAIL_LINES:]}
+        if op == "input":
+            data = message.get("data")
+            if not isinstance(data, str):
+                return {"ok": False, "server": server.name, "error": "data ausente"}
+            if not server.send_input(data):
+                return {
+                    "ok": False,
+                    "server": server.name,
+                    "error": "entrada recusada (stdin desativado, processo parado "
+                    "ou fila cheia)",
+                }
+            return {"ok": True, "server": server.name, "result": server_status(server)}
+        if op == "signal":
+            try:
+                sent = server.send_signal(str(message.get("signal") or ""))
+            except ValueError as e:
+                return {"ok": False, "server": server.name, "error": str(e)}
+            if not sent:
+                return {
+                    "ok": False,
+                    "server": server.name,
+                    "error": "não está em execução",
+                }
+            return {"ok": True, "server": server.name, "result": server_status(server)}
+        if op == "start":
+            report = run_preflight([server])
+            if not report.ok:
+                return {"ok": False, "server": server.name, "error": report.format()}
+            ok = server.start_and_wait()
+        elif op == "stop":
+            server.stop()
+            ok = not self.registry.is_active(server)
+        elif op == "restart":
+            if self.registry.is_active(server):
+                server.restart()
+            ok = server.start_and_wait()
+        else:
+            return {"ok": False, "error": f"Operação desconhecida: {op}"}
+        return {"ok": ok, "server": server.name, "result": server_status(server)}
+
+
+def is_loopback(host):
+    """True se todos os endereços de `host` são de loopback ("" = todas as
+    interfaces; um nome que não resolve conta como não loopback)."""
+    if not host:
+        return False
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        return all(ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Agente do ServerFlow")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_AGENT_PORT)
+    parser.add_argument("--config", default=app.CONFIG_FILE)
+    parser.add_argument("--token", default=os.environ.get("SERVERFLOW_AGENT_TOKEN", ""))
+    args = parser.parse_args(argv)
+    if not args.token and not is_loopback(args.host):
+        # Qualquer um na rede poderia iniciar processos e enviar entrada/sinais
+        parser.error(
+            f"--host {args.host} aceita conexões de outras máquinas; "
+            "defina --token (ou SERVERFLOW_AGENT_TOKEN)"
+        )
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app.CONFIG_FILE = args.config
+    event_log = EventStore()
+    servers = [
+        app.Server.from_dict(entry, event_log, None) for entry in app.load_configs()
+    ]
+    try:
+        app.server_registry.add_many(servers)
+    except ValueError as e:
+        sys.exit(f"Configuração inválida em {args.config}: {e}")
+    try:
+        app.run_history.start()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Histórico de execuções indisponível: {e}")
+
+    agent = Agent(app.server_registry, args.port, args.host, args.token)
+    for server in servers:
+        agent.attach(server)
+    try:
+        agent.start()
+    except OSError as e:
+        sys.exit(f"Não foi possível escutar em {args.host}:{args.port}: {e}")
+    print(
+        f"Agente '{agent.node}' escutando em {args.host}:{args.port} "
+        f"com {len(servers)} servidores."
+    )
+
+    autostart = [server for server in servers if server.autostart]
+    for server in run_preflight(autostart).passed:
+        threading.Thread(target=server.start, daemon=True).start()
+
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+    stopping.wait()
+
+    # O agente é o supervisor dos processos: ao sair, para todos
+    threads = [
+        threading.Thread(target=server.stop) for server in app.server_registry.running()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    agent.stop()
+    app.run_history.close()
+    event_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,107 +3,453 @@ from tkinter import scrolledtext, messagebox, filedialog
 from tkinter import ttk  # Import Themed Tkinter
 import subprocess
 import threading
+import collections
 import os
 import shlex
+import signal  # Importar para encerrar o grupo de processos do servidor
 import time
+import copy  # Importar para copiar valores padrão dos campos opcionais
 import json  # Importar para salvar/carregar configurações
+import hashlib  # Importar para detectar mudanças reais no arquivo de configuração
 import webbrowser  # Importar para abrir URLs no navegador
 import re  # Importar para regex na função load_server_for_editing
-import socket  # Importar para verificar porta
 import sys  # Importar para sys.platform para abrir logs
+import sqlite3  # Importar para tratar falhas ao abrir o histórico de execuções
+import queue  # Importar para a fila de eventos dos agentes remotos
+
+from balancer import STRATEGIES as BALANCE_STRATEGIES, TcpBalancer  # Réplicas
+from buildcache import BuildError, prepare as prepare_build  # Cache de binários
+from diagnostics import (  # Atraso do loop do Tk e perfis do próprio app
+    PROFILE_MODES,
+    Diagnostics,
+    ProfileSession,
+)
+from eventlog import LEVELS, EventStore  # Histórico estruturado do log do sistema
+from netutil import find_free_port, find_free_ports, is_port_in_use
+from preflight import run_preflight  # Validação em paralelo antes de iniciar
+from groupops import BulkOperation  # Ações em paralelo sobre grupos/tags
+from importer import import_file  # Importação em lote (Procfile / compose)
+from scheduler import Scheduler, parse_schedule  # Agenda cron/janelas dos servidores
+from procstat import descendants  # Filhos do shell, alvos dos sinais
+from stdinpipe import InputChannel  # Entrada padrão interativa, sem bloquear a GUI
+from fswatch import (  # Observa o arquivo de configuração e o código-fonte
+    DEFAULT_IGNORE as DEFAULT_WATCH_IGNORE,
+    FileWatcher,
+    TreeWatcher,
+)
+from history import (  # Histórico de execuções em SQLite
+    STOP_IDLE,
+    STOP_MANUAL,
+    STOP_RESTART,
+    RunHistory,
+    period_start,
+    stop_reason_for,
+)
+from logtemplates import SPIKE_WINDOW, TemplateMiner  # Resumo da saída por modelos
+from loadtest import AvailabilityProbe, run_load_test  # Gerador de carga HTTP embutido
+from remote import (  # Agentes em outras máquinas
+    AgentClient,
+    RemoteState,
+    load_nodes,
+    parse_address,
+    save_nodes,
+)
+from revproxy import DEFAULT_PROXY_PORT, ReverseProxy, RouteTable  # Proxy local
+from ondemand import DEFAULT_IDLE_TIMEOUT, OnDemandListener  # Início sob demanda
+from reattach import (  # Readoção de processos após reabrir a GUI
+    LogTailer,
+    RuntimeState,
+    TailLoop,
+    entry_for,
+    tail_lines,
+    verify,
+)
+from registry import (  # Registro indexado e thread-safe dos servidores
+    ADDED,
+    ERROR,
+    EXITED,
+    IDLE_STATES,
+    REMOVED,
+    RUNNING,
+    SLEEPING,
+    STARTING,
+    STATE,
+    STOPPED,
+    STOPPING,
+    UPDATED,
+    ServerRegistry,
+)
+from metrics import (  # Contadores e endpoint Prometheus
+    DEFAULT_METRICS_PORT,
+    MetricsExporter,
+    MetricsSampler,
+    ServerMetrics,
+    probe_port,
+)
+from timeseries import METRICS as SERIES_METRICS, TimeSeriesStore, resample
 
 CONFIG_FILE = "server_configs.json"
-
-
-# Função para verificar se uma porta está em uso
-def is_port_in_use(port):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        try:
-            s.bind(("127.0.0.1", port))
-            return False
-        except socket.error:
-            return True
+# Campos cuja mudança exige reiniciar o servidor ao recarregar a configuração
+RESTART_FIELDS = (
+    "command",
+    "working_dir",
+    "expected_port",
+    "env",
+    "build_cache",
+    "on_demand",
+    "idle_timeout",
+    "replicas",
+    "balancer",
+    "stdin",
+)
+READY_TIMEOUT = 60  # Segundos esperando a porta aceitar conexão após o início
+DRAIN_TIMEOUT = 10  # Segundos esperando as conexões da instância antiga no reinício
+LOG_TAIL_LINES = 200  # Linhas do log existente exibidas ao abrir/iniciar o servidor
+CLOSE_WAIT_WARNING = 20  # Conexões em CLOSE_WAIT a partir das quais avisar vazamento
+# Sinais oferecidos na GUI (send_signal aceita qualquer um da plataforma)
+SIGNAL_CHOICES = ("SIGHUP", "SIGUSR1", "SIGUSR2", "SIGINT", "SIGQUIT", "SIGTERM")
+
+
+class _Flag:
+    """Substitui o tk.BooleanVar do autostart quando não há GUI (agente)."""
+
+    def __init__(self, value=False):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
 
 
 class Server:
     """Representa um servidor configurado para ser gerenciado."""
 
+    # Campos opcionais da configuração e seus valores padrão. Só são gravados no
+    # arquivo quando diferem do padrão.
+    OPTIONAL_FIELDS = {
+        "env": {},
+        "build_cache": False,
+        "on_demand": False,
+        "idle_timeout": DEFAULT_IDLE_TIMEOUT,
+        "proxy_route": "",
+        "replicas": 1,
+        "balancer": "",
+        "watch": {},
+        "group": "",
+        "tags": [],
+        "schedule": [],
+        "stdin": False,
+    }
+
     def __init__(
         self,
         name,
         command,
         working_dir,
-        system_log_widget,
+        event_log,
         app_root,
         autostart=False,
         expected_port=None,
+        env=None,
+        build_cache=False,
+        on_demand=False,
+        idle_timeout=DEFAULT_IDLE_TIMEOUT,
+        proxy_route="",
+        replicas=1,
+        balancer="",
+        watch=None,
+        group="",
+        tags=None,
+        schedule=None,
+        stdin=False,
     ):
         self.name = name
         self.command = command  # O comando completo (ex: "live-server . --port 8080")
         self.working_dir = working_dir
         self.autostart = autostart
         self.expected_port = expected_port  # A porta que o servidor DEVE usar (para 'Abrir no Navegador')
+        self.env = dict(env) if env else {}  # Variáveis de ambiente extras do processo
+        self.build_cache = build_cache  # Compila uma vez e executa o binário em cache
+        self.on_demand = on_demand  # Só inicia o processo na primeira conexão à porta
+        self.idle_timeout = idle_timeout  # Segundos ociosos até parar (sob demanda)
+        self._listener = None  # OnDemandListener ativo na porta pública
+        self.proxy_route = proxy_route  # Prefixo ("/api") ou host no proxy reverso
+        self.backend_port = None  # Porta real após um reinício pelo proxy reverso
+        self.replicas = replicas  # Instâncias em portas consecutivas
+        self.balancer = balancer  # "round_robin", "least_conn" ou "" (sem balanceador)
+        self.replica_servers = []  # Servers filhos (um por réplica) em execução
+        self.replica_of = None  # Server pai, quando este é uma réplica
+        self.replica_index = None
+        self._balancer = None  # TcpBalancer ativo na porta pública
+        # {"paths", "globs", "ignore", "debounce_ms"}: reinicia ao alterar o código
+        self.watch = copy.deepcopy(watch) if watch else {}
+        self._source_watcher = None  # TreeWatcher ativo (enquanto o servidor roda)
+        self.group = group  # Stack a que o servidor pertence (ações em grupo)
+        self.tags = list(tags) if tags else []  # Rótulos livres (indexados no registro)
+        # Regras "start|stop|restart <cron>" ou "window HH:MM-HH:MM [dias]"
+        self.schedule = list(schedule) if schedule else []
+        self.stdin = stdin  # Abre um pipe na entrada padrão (consoles, REPLs)
+        self._inputs = {}  # Popen -> InputChannel da entrada padrão
+        self._restart_lock = threading.Lock()  # Um reinício por vez
+        self._runs = {}  # Popen -> dados da execução para o histórico
+        self._tailers = None  # {"stdout"/"stderr": LogTailer} dos arquivos de log
+        self._tail_lock = threading.Lock()
+        self._tail_done = None  # Event: toda a saída do processo foi lida
         self.process = None
         self.output_buffer = ""
         self.output_label = None
-        self.system_log_widget = system_log_widget
+        self.event_log = event_log  # EventStore compartilhado do log do sistema
         self.app_root = app_root
-        self.autostart_var = tk.BooleanVar(
-            value=self.autostart
-        )  # Variável para o checkbox
+        # Variável para o checkbox (sem GUI, `app_root` é None)
+        self.autostart_var = (
+            tk.BooleanVar(value=self.autostart) if app_root else _Flag(self.autostart)
+        )
+        self.output_listener = None  # listener(server, linha): usado pelo agente
         self.status_label_widget = None  # Novo widget para exibir o status
         self.log_file_path = None  # Caminho do arquivo de log para este servidor
         self.log_file_handle = None  # Handle do arquivo de log
+        self.id = None  # Atribuído pelo ServerRegistry
+        self.state = STOPPED  # Alterado apenas via server_registry.transition
+        self.status_text = "Parado"  # Último status exibido (exportado nas métricas)
+        self.status_style = "Gray.TLabel"
+        self.metrics = ServerMetrics()  # Contadores de captura e supervisão
+        self.templates = TemplateMiner()  # Modelos das linhas de saída (janela Resumo)
+        self._socket_notices = (0, set())  # (execução, avisos de sockets já dados)
 
     def _update_output_label(self):
         """Atualiza o widget de saída na thread principal do Tkinter."""
         if self.output_label:
-            self.output_label.config(state=tk.NORMAL)
-            self.output_label.delete(1.0, tk.END)
-            self.output_label.insert(tk.END, self.output_buffer)
-            self.output_label.see(tk.END)
-            self.output_label.config(state=tk.DISABLED)
+            with diagnostics.timed("saída: redesenho"):
+                self.output_label.config(state=tk.NORMAL)
+                self.output_label.delete(1.0, tk.END)
+                self.output_label.insert(tk.END, self.output_buffer)
+                self.output_label.see(tk.END)
+                self.output_label.config(state=tk.DISABLED)
+
+    def show_log_tail(self, end=None):
+        """Preenche a saída com as últimas linhas do log até a posição `end`; a
+        leitura ao vivo continua a partir dela."""
+        self.output_buffer = "".join(
+            tail_lines(self.log_file_path or self._log_path(), LOG_TAIL_LINES, end)
+        )
+        if self.output_label:
+            self._run_in_ui(self._update_output_label)
 
     def _set_status(self, text, style_name=""):
         """Define o texto e o estilo do label de status."""
+        self.status_text = text
+        self.status_style = style_name
         if self.status_label_widget:
             self.app_root.after(0, lambda: self._update_status_widget(text, style_name))
 
-    def _update_status_widget(self, text, style_name):
-        self.status_label_widget.config(text=text, style=style_name)
+    def _run_in_ui(self, callback):
+        """Executa `callback` na thread do Tk; sem GUI (agente), executa direto."""
+        if self.app_root is not None:
+            self.app_root.after(0, callback)
+        else:
+            callback()
 
-    def _read_output(self, stream):
-        """Lê a saída do processo em uma thread separada e escreve no buffer e no arquivo de log."""
-        for line in iter(stream.readline, ""):
-            self.output_buffer += line
-            if self.log_file_handle:
-                try:
-                    self.log_file_handle.write(line)
-                except Exception as e:
-                    self._log_system(
-                        f"Erro ao escrever no log para '{self.name}': {e}\n"
-                    )
-            self.app_root.after(0, self._update_output_label)
-        stream.close()
+    def _update_status_widget(self, text, style_name):
+        if self.status_label_widget:  # O widget pode ter sido removido
+            self.status_label_widget.config(text=text, style=style_name)
+
+    def _ensure_tailing(self, offset, err_offset):
+        """Começa a acompanhar os arquivos de log a partir de `offset` (stdout) e
+        `err_offset` (stderr), se ainda não estiverem sendo lidos (num reinício
+        gradual os dois processos escrevem nos mesmos arquivos)."""
+        with self._tail_lock:
+            if self._tailers is not None:
+                return
+            self._tailers = {
+                "stdout": LogTailer(self.log_file_path, offset),
+                "stderr": LogTailer(self._err_log_path(), err_offset),
+            }
+            self._tail_done = threading.Event()
+        tail_loop.add(self, self._poll_output)
+
+    def _poll_output(self):
+        """Uma passada do `tail_loop`: leva as linhas novas dos logs ao buffer e
+        às métricas. Retorna quantas linhas leu, ou None quando o processo
+        terminou e toda a saída foi lida.
+
+        A saída vai direto para os arquivos (e não por pipes) para o processo
+        continuar rodando se a GUI fechar; ver reattach.py.
+        """
+        owner = self.replica_of or self
+        alive = self._process_alive()
+        count = 0
+        for stream, tailer in self._tailers.items():
+            for line in tailer.read_lines(final=not alive):
+                count += 1
+                self.output_buffer += line
+                self.metrics.record_line(stream, line)
+                # As linhas das réplicas são resumidas junto com as do servidor pai
+                owner.templates.add(line)
+                if owner is not self:
+                    line = f"[#{self.replica_index}] {line}"
+                    owner._append_output(line)
+                if owner.output_listener:
+                    owner.output_listener(owner, line)
+        if count:
+            self._run_in_ui(self._update_output_label)
+        elif not alive:
+            with self._tail_lock:
+                if not self._process_alive():
+                    self._tailers = None
+                    self._tail_done.set()
+                    return None
+        return count
+
+    def _log_path(self):
+        # Nome do arquivo de log, substituindo caracteres inválidos por '_'
+        sanitized_name = re.sub(r'[\\/:*?"<>|]', "_", self.name)
+        return os.path.join("logs", f"{sanitized_name}.log")
+
+    def _err_log_path(self):
+        # A saída de erro fica ao lado, em <nome>.err.log
+        return os.path.splitext(self.log_file_path or self._log_path())[0] + ".err.log"
 
     def start(self):
         """Inicia o processo do servidor."""
-        if self.process and self.process.poll() is None:
+        # A transição é atômica: chamadas concorrentes não disparam dois processos
+        if not server_registry.transition(self, STARTING, expected=IDLE_STATES):
             self._log_system(f"Servidor '{self.name}' já está em execução.\n")
             return
+        self.backend_port = None  # De volta à porta configurada
 
         # Verifica a disponibilidade da porta antes de iniciar, se aplicável
         if self.expected_port and is_port_in_use(self.expected_port):
             self._log_system(
-                f"Erro: Porta {self.expected_port} já está em uso para '{self.name}'.\n"
-            )
-            messagebox.showerror(
-                "Porta em Uso",
-                f"A porta {self.expected_port} já está em uso. Não foi possível iniciar o servidor '{self.name}'.",
+                f"Erro: Porta {self.expected_port} já está em uso para '{self.name}'.\n",
+                "ERROR",
             )
+            if self.app_root is not None:
+                messagebox.showerror(
+                    "Porta em Uso",
+                    f"A porta {self.expected_port} já está em uso. Não foi possível iniciar o servidor '{self.name}'.",
+                )
             self._set_status("Porta em Uso", "Red.TLabel")
+            server_registry.transition(self, ERROR)
             return
 
+        if self.replicas > 1:
+            self._start_replicas()
+        elif self.on_demand and self.expected_port:
+            self._start_listener()
+        else:
+            self._launch()
+        if server_registry.is_active(self):
+            self._watch_sources()
+
+    def _append_output(self, line):
+        self.output_buffer += line
+        self._run_in_ui(self._update_output_label)
+
+    def _start_replicas(self):
+        """Inicia as réplicas em portas consecutivas livres, cada uma supervisionada
+        como um Server próprio, com o balanceador opcional na porta pública."""
+        balanced = bool(self.expected_port and self.balancer)
+        ports = [None] * self.replicas
+        try:
+            if self.expected_port:
+                # Com balanceador, a porta pública fica com ele e as réplicas vêm depois
+                first = self.expected_port + 1 if balanced else self.expected_port
+                ports = find_free_ports(first, self.replicas)
+            if balanced:
+                self._balancer = TcpBalancer(
+                    self.expected_port, self._replica_ports, self.balancer
+                )
+                self._balancer.start()
+        except (OSError, ValueError) as e:
+            self._balancer = None
+            self._log_system(
+                f"Erro ao preparar as réplicas de '{self.name}': {e}\n", "ERROR"
+            )
+            self._set_status("Erro", "Red.TLabel")
+            server_registry.transition(self, ERROR)
+            return
+
+        self.output_buffer = ""
+        self.replica_servers = [
+            self._make_replica(index, port) for index, port in enumerate(ports, 1)
+        ]
+        server_registry.transition(self, RUNNING)
+        self.metrics.record_start()
+        port_text = ", ".join(str(port) for port in ports if port)
+        self._log_system(
+            f"Iniciando {self.replicas} réplicas de '{self.name}'"
+            + (f" nas portas {port_text}" if port_text else "")
+            + (f" (balanceador {self.balancer})" if balanced else "")
+            + ".\n"
+        )
+        for replica in self.replica_servers:
+            replica.start()
+        self._replica_changed()
+
+    def _make_replica(self, index, port):
+        replica = Server(
+            f"{self.name} #{index}",
+            self._command_for_port(self.command, port) if port else self.command,
+            self.working_dir,
+            self.event_log,
+            self.app_root,
+            expected_port=port,
+            env={**self.env, "PORT": str(port)} if port else self.env,
+            build_cache=self.build_cache,
+            stdin=self.stdin,
+        )
+        replica.replica_of = self
+        replica.replica_index = index
+        return replica
+
+    def _replica_ports(self):
+        """Portas das réplicas em execução (consultado pelo balanceador)."""
+        return [r.expected_port for r in self.replica_servers if r.state == RUNNING]
+
+    def _replica_changed(self):
+        """Recalcula o status do servidor a partir das réplicas."""
+        if self.state != RUNNING:
+            return
+        alive = sum(1 for r in self.replica_servers if r.state == RUNNING)
+        total = len(self.replica_servers)
+        if alive:
+            self._set_status(
+                f"Executando ({alive}/{total})",
+                "Green.TLabel" if alive == total else "Orange.TLabel",
+            )
+            return
+        if server_registry.transition(self, EXITED, expected=(RUNNING,)):
+            if self._balancer:
+                self._balancer.stop()
+                self._balancer = None
+            self._log_system(f"Todas as réplicas de '{self.name}' saíram.\n", "ERROR")
+            self._set_status("Réplicas saíram", "Red.TLabel")
+
+    def _stop_replicas(self):
+        """Para o balanceador e todas as réplicas em paralelo."""
+        server_registry.transition(self, STOPPING)
+        self._set_status("Parando...", "Orange.TLabel")
+        if self._balancer:
+            self._balancer.stop()
+            self._balancer = None
+        threads = [
+            threading.Thread(target=replica.stop, daemon=True)
+            for replica in self.replica_servers
+            if server_registry.is_active(replica)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.replica_servers = []
+        server_registry.transition(self, STOPPED)
+        self._log_system(f"Servidor '{self.name}' parado (todas as réplicas).\n")
+        self._set_status("Parado", "Gray.TLabel")
+
+    def _launch(self, port=None):
+        """Inicia o processo; `port` é a porta interna no modo sob demanda."""
         try:
             self.output_buffer = ""
             if self.output_label:
@@ -113,58 +459,101 @@ class Server:
                 self.output_label.config(state=tk.DISABLED)
 
             # Garante que o diretório de logs exista
-            log_dir = "logs"
-            os.makedirs(log_dir, exist_ok=True)
-            # Nome do arquivo de log, substituindo caracteres inválidos por '_'
-            sanitized_name = re.sub(r'[\\/:*?"<>|]', "_", self.name)
-            self.log_file_path = os.path.join(log_dir, f"{sanitized_name}.log")
+            self.log_file_path = self._log_path()
+            os.makedirs(os.path.dirname(self.log_file_path), exist_ok=True)
 
+            err_handle = None
             try:
-                self.log_file_handle = open(self.log_file_path, "a", encoding="utf-8")
+                # O processo escreve direto nos logs (modo append); stderr vai
+                # para um arquivo separado para as métricas distinguirem os dois
+                err_handle = open(self._err_log_path(), "ab")
+                self.log_file_handle = open(self.log_file_path, "ab")
             except IOError as e:
                 self._log_system(
-                    f"Erro ao abrir arquivo de log para '{self.name}': {e}\n"
+                    f"Erro ao abrir arquivo de log para '{self.name}': {e}\n",
+                    "ERROR",
                 )
+                if err_handle:
+                    err_handle.close()
+                    err_handle = None
                 self.log_file_handle = (
                     None  # Garante que seja None se a abertura falhar
                 )
 
+            command = self._command_for_port(
+                self._resolve_command(), port or self.expected_port
+            )
+            env = dict(self.env)
+            if port is not None:
+                env["PORT"] = str(port)
             self._set_status("Iniciando...", "Orange.TLabel")
 
-            self.process = subprocess.Popen(
-                self.command,
-                cwd=self.working_dir if self.working_dir else None,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,  # Mantém o pipe para capturar e exibir E logar
-                text=True,
-                bufsize=1,
-                shell=True,
-            )
-            running_servers[self.name] = self
+            log_offset = _file_size(self.log_file_path)
+            err_offset = _file_size(self._err_log_path())
+            if self.log_file_handle and self._tailers is None:
+                # Num reinício gradual a leitura já em andamento continua
+                self.show_log_tail(log_offset)
+            spawned_at = time.perf_counter()
+            try:
+                self.process = subprocess.Popen(
+                    command,
+                    cwd=self.working_dir if self.working_dir else None,
+                    stdin=subprocess.PIPE if self.stdin else subprocess.DEVNULL,
+                    stdout=self.log_file_handle or subprocess.DEVNULL,
+                    stderr=err_handle or subprocess.DEVNULL,
+                    shell=True,
+                    env={**os.environ, **env} if env else None,
+                    # Grupo próprio: parar o servidor encerra também os filhos
+                    start_new_session=os.name == "posix",
+                )
+            finally:
+                if err_handle:
+                    err_handle.close()  # O processo tem a própria cópia
+            if self.stdin:
+                self._inputs[self.process] = InputChannel(self.process.stdin)
+            server_registry.transition(self, RUNNING)
+            self.metrics.record_start()
+            self._runs[self.process] = {
+                "started_at": time.time(),
+                "stdout_lines": self.metrics.stdout_lines_total,
+                "stderr_lines": self.metrics.stderr_lines_total,
+            }
             self._log_system(f"Iniciando '{self.name}' (PID: {self.process.pid})...\n")
             self._set_status(
                 "Executando", "Green.TLabel"
             )  # Define o status como Executando
 
-            stdout_thread = threading.Thread(
-                target=self._read_output, args=(self.process.stdout,)
-            )
-            stderr_thread = threading.Thread(
-                target=self._read_output, args=(self.process.stderr,)
-            )
-            stdout_thread.daemon = True
-            stderr_thread.daemon = True
-            stdout_thread.start()
-            stderr_thread.start()
+            if self.log_file_handle:
+                self._ensure_tailing(log_offset, err_offset)
 
-            wait_thread = threading.Thread(target=self._wait_for_process)
+            wait_thread = threading.Thread(
+                target=self._wait_for_process, args=(self.process,)
+            )
             wait_thread.daemon = True
             wait_thread.start()
 
+            if self.expected_port and port is None:
+                threading.Thread(
+                    target=self._wait_until_ready,
+                    args=(self.process, spawned_at),
+                    daemon=True,
+                ).start()
+
+        except BuildError as e:
+            self._log_system(
+                f"Erro de build para '{self.name}': {e}\n{e.output}", "ERROR"
+            )
+            if self.output_label:
+                self.output_label.config(state=tk.NORMAL)
+                self.output_label.insert(tk.END, f"{e}\n{e.output}")
+                self.output_label.config(state=tk.DISABLED)
+            self._set_status("Erro de Build", "Red.TLabel")
+            server_registry.transition(self, ERROR)
         except FileNotFoundError:
             self._log_system(
                 f"Erro: Interpretador de comando não encontrado para '{self.name}'. "
-                "Verifique se o shell está configurado corretamente.\n"
+                "Verifique se o shell está configurado corretamente.\n",
+                "ERROR",
             )
             if self.output_label:
                 self.output_label.config(state=tk.NORMAL)
@@ -173,35 +562,280 @@ class Server:
                 )
                 self.output_label.config(state=tk.DISABLED)
             self._set_status("Erro de Comando", "Red.TLabel")
+            server_registry.transition(self, ERROR)
         except Exception as e:
-            self._log_system(f"Erro ao iniciar '{self.name}': {e}\n")
+            self._log_system(f"Erro ao iniciar '{self.name}': {e}\n", "ERROR")
             if self.output_label:
                 self.output_label.config(state=tk.NORMAL)
                 self.output_label.insert(tk.END, f"Erro: {e}\n")
                 self.output_label.config(state=tk.DISABLED)
             self._set_status("Erro", "Red.TLabel")
+            server_registry.transition(self, ERROR)
+
+    def _start_listener(self):
+        """Abre a porta pública e espera a primeira conexão para iniciar."""
+        listener = OnDemandListener(
+            self.expected_port,
+            spawn=self._wake,
+            alive=self._process_alive,
+            shutdown=self._sleep_idle,
+            idle_timeout=self.idle_timeout,
+            on_ready=self._on_demand_ready,
+        )
+        try:
+            listener.start()
+        except OSError as e:
+            self._log_system(
+                f"Erro ao escutar na porta {self.expected_port} para '{self.name}': {e}\n",
+                "ERROR",
+            )
+            self._set_status("Erro", "Red.TLabel")
+            server_registry.transition(self, ERROR)
+            return
+        self._listener = listener
+        server_registry.transition(self, SLEEPING)
+        self._log_system(
+            f"'{self.name}' aguardando conexões na porta {self.expected_port} "
+            f"(sob demanda, para após {self.idle_timeout} s ocioso).\n"
+        )
+        self._set_status("Em espera", "Gray.TLabel")
+
+    def _wake(self, port):
+        """Inicia o processo real na porta interna (chamado pelo listener)."""
+        if not server_registry.transition(self, STARTING, expected=(SLEEPING,)):
+            return False
+        self._launch(port)
+        return self.state == RUNNING
+
+    def _on_demand_ready(self, seconds):
+        self._note_ready(self.process, seconds)
+        self._log_system(f"'{self.name}' iniciado sob demanda em {seconds:.2f} s.\n")
+
+    def _sleep_idle(self):
+        """Para o processo ocioso, mantendo a porta pública aberta."""
+        if not server_registry.transition(self, STOPPING, expected=(RUNNING,)):
+            return
+        self._log_system(
+            f"'{self.name}' ocioso por {self.idle_timeout} s; parando até a próxima conexão.\n"
+        )
+        self._set_status("Parando...", "Orange.TLabel")
+        self._request_stop(STOP_IDLE)
+        self._terminate_process()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._terminate_process(force=True)
+
+    def _process_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _terminate_process(self, force=False, process=None):
+        """Envia SIGTERM (ou SIGKILL) ao grupo do processo: o shell e seus filhos."""
+        process = process or self.process
+        if os.name == "posix":
+            try:
+                os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        elif force:
+            process.kill()
+        else:
+            process.terminate()
+
+    def send_input(self, text):
+        """Envia `text` à entrada padrão do processo (ou de cada réplica) sem
+        bloquear. Retorna False se não foi aceito: entrada interativa desativada,
+        processo parado ou adotado de outra sessão, ou fila do canal cheia."""
+        if self.replica_servers:
+            results = [
+                replica.send_input(text)
+                for replica in self.replica_servers
+                if server_registry.is_active(replica)
+            ]
+            return bool(results) and all(results)
+        channel = self._inputs.get(self.process)
+        if channel is None or channel.closed:
+            self._log_system(
+                f"'{self.name}' não tem entrada padrão aberta"
+                + ("" if self.stdin else " (ative a entrada interativa)")
+                + ".\n",
+                "WARNING",
+            )
+            return False
+        was_full = channel.full
+        if not channel.send(text):
+            if was_full:
+                return False  # Já avisado; o total fica em `dropped`
+            self._log_system(
+                f"Entrada descartada para '{self.name}': o processo não está lendo "
+                f"a entrada padrão ({channel.dropped} envios recusados).\n",
+                "WARNING",
+            )
+            return False
+        return True
+
+    def send_signal(self, name):
+        """Envia o sinal `name` ("SIGHUP", "HUP", "usr1"...) ao grupo do processo
+        (o shell e seus filhos) ou de cada réplica, sem reiniciar.
+
+        Retorna quantos processos receberam o sinal; levanta ValueError se o
+        sinal não existe nesta plataforma.
+        """
+        name = name.strip().upper()
+        if not name.startswith("SIG"):
+            name = f"SIG{name}"
+        sig = getattr(signal, name, None)
+        if not isinstance(sig, signal.Signals):
+            raise ValueError(f"Sinal desconhecido: {name}")
+        targets = [
+            replica
+            for replica in self.replica_servers
+            if server_registry.is_active(replica)
+        ] or [self]
+        sent = 0
+        for target in targets:
+            process = target.process
+            if process is None or process.poll() is not None:
+                continue
+            try:
+                if os.name != "posix":
+                    process.send_signal(sig)
+                elif not self._signal_children(process.pid, sig):
+                    os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                continue
+            sent += 1
+        if sent:
+            self._log_system(
+                f"Sinal {name} enviado a '{self.name}'"
+                + (f" ({sent} réplicas)" if self.replica_servers else "")
+                + ".\n"
+            )
+        else:
+            self._log_system(
+                f"Sinal {name} não enviado: '{self.name}' não está em execução.\n",
+                "WARNING",
+            )
+        return sent
+
+    @staticmethod
+    def _signal_children(pid, sig):
+        """Envia `sig` aos descendentes do shell `pid`, poupando o próprio shell:
+        quando ele não substitui a si mesmo pelo comando, morreria com SIGHUP ou
+        SIGUSR1 e o servidor pareceria encerrado com o processo real ainda
+        rodando. Retorna False se não há descendentes (ou /proc)."""
+        children = descendants(pid)
+        for child in children:
+            try:
+                os.kill(child, sig)
+            except ProcessLookupError:
+                pass
+        return bool(children)
+
+    def _command_for_port(self, command, port):
+        """Ajusta a porta do comando.
+
+        Usa o marcador "{port}" se existir; senão troca as ocorrências isoladas
+        da porta esperada (ex: "--port 3000", "http.server 3000").
+        """
+        if "{port}" in command:
+            return command.replace("{port}", str(port))
+        if port and port != self.expected_port:
+            return re.sub(rf"(?<!\d){self.expected_port}(?!\d)", str(port), command)
+        return command
+
+    def _resolve_command(self):
+        """Retorna o comando a executar, compilando para o cache se ativado.
+
+        Levanta BuildError se a compilação falhar.
+        """
+        if not self.build_cache:
+            return self.command
+        self._set_status("Compilando...", "Orange.TLabel")
+        result = prepare_build(self.command, self.working_dir)
+        if result is None:
+            self._log_system(
+                f"Cache de build: comando de '{self.name}' não reconhecido; "
+                "executando sem cache.\n",
+                "WARNING",
+            )
+            return self.command
+        self.metrics.build_seconds = result.build_seconds
+        if result.cached:
+            self._log_system(f"Build de '{self.name}' reaproveitado do cache.\n")
+        else:
+            self._log_system(
+                f"Build de '{self.name}' concluído em {result.build_seconds:.2f} s.\n"
+            )
+        return result.command
+
+    def _wait_until_ready(self, process, spawned_at):
+        """Mede quanto tempo o processo leva até a porta esperada aceitar conexão."""
+        deadline = spawned_at + READY_TIMEOUT
+        while process.poll() is None and time.perf_counter() < deadline:
+            if probe_port(self.expected_port, timeout=0.5) is not None:
+                ready = time.perf_counter() - spawned_at
+                self._note_ready(process, ready)
+                message = f"'{self.name}' pronto em {ready:.2f} s"
+                if self.build_cache and self.metrics.build_seconds:
+                    message += f" (build: {self.metrics.build_seconds:.2f} s)"
+                elif self.build_cache:
+                    message += " (build em cache)"
+                self._log_system(message + ".\n")
+                return
+            time.sleep(0.05)
 
-    def _wait_for_process(self):
+    def _wait_for_process(self, process):
         """Espera o processo terminar e atualiza os logs."""
         try:
-            self.process.wait()
-            exit_code = self.process.poll()
-            if self.name in running_servers:
-                del running_servers[self.name]
+            process.wait()
+            exit_code = process.poll()
+            channel = self._inputs.pop(process, None)
+            if channel is not None:
+                channel.close()
+            tail_done = self._tail_done
+            if tail_done is not None and not self._process_alive():
+                tail_done.wait(timeout=1)  # Lê o restante da saída antes de registrar
+            self._record_run(process, exit_code)
+            if process is not self.process:
+                return  # Um novo processo já foi iniciado (reinício rápido)
+            self.metrics.record_exit(exit_code)
+            stopping = self.state in (
+                STOPPING,
+                STOPPED,
+            )  # stop() pode ter terminado antes
+            listener = self._listener
+            if listener is not None and listener.running:
+                # Sob demanda: volta a esperar conexões na porta pública
+                listener.backend_exited()
+                server_registry.transition(self, SLEEPING)
+                if stopping:
+                    self._set_status("Em espera", "Gray.TLabel")
+                    return
+            else:
+                server_registry.transition(
+                    self, STOPPED if stopping or exit_code == 0 else EXITED
+                )
+            if self.replica_of is not None:
+                self.replica_of._replica_changed()
 
-            self.app_root.after(0, lambda: self._update_process_status(exit_code))
+            self._run_in_ui(lambda: self._update_process_status(exit_code))
         except Exception as e:
-            self._log_system(f"Erro ao esperar pelo processo '{self.name}': {e}\n")
-            self.app_root.after(0, lambda: self._update_process_status(None, error=e))
+            self._log_system(
+                f"Erro ao esperar pelo processo '{self.name}': {e}\n", "ERROR"
+            )
+            self._run_in_ui(lambda: self._update_process_status(None, error=e))
         finally:
-            # Garante que o handle do arquivo de log seja fechado
-            if self.log_file_handle:
+            # Garante que o handle do arquivo de log seja fechado, a menos que
+            # já pertença a um processo novo (reinício)
+            if self.log_file_handle and process is self.process:
                 try:
                     self.log_file_handle.close()
                     self._log_system(f"Arquivo de log para '{self.name}' fechado.\n")
                 except Exception as e:
                     self._log_system(
-                        f"Erro ao fechar arquivo de log para '{self.name}': {e}\n"
+                        f"Erro ao fechar arquivo de log para '{self.name}': {e}\n",
+                        "ERROR",
                     )
                 self.log_file_handle = None  # Reseta o handle
 
@@ -210,14 +844,17 @@ class Server:
             self.output_label.config(state=tk.NORMAL)
 
         if error:
-            self._log_system(f"Servidor '{self.name}' saiu com erro: {error}\n")
+            self._log_system(
+                f"Servidor '{self.name}' saiu com erro: {error}\n", "ERROR"
+            )
             if self.output_label:
                 self.output_label.insert(tk.END, f"\nErro: {error}")
             self._set_status("Erro", "Red.TLabel")
         elif exit_code is not None:
             if exit_code != 0:
                 self._log_system(
-                    f"Servidor '{self.name}' saiu com código {exit_code}.\n"
+                    f"Servidor '{self.name}' saiu com código {exit_code}.\n",
+                    "ERROR",
                 )
                 if self.output_label:
                     self.output_label.insert(tk.END, f"\nSaiu com código {exit_code}.")
@@ -234,21 +871,43 @@ class Server:
 
     def stop(self):
         """Tenta parar o processo do servidor."""
-        if self.process and self.process.poll() is None:
+        if not self._restart_lock.locked():
+            self._unwatch_sources()  # Num reinício o observador continua ativo
+        if self.replica_servers:
+            self._stop_replicas()
+            return
+        listener = self._listener
+        if listener is not None:
+            self._listener = None
+            listener.stop()
+            if server_registry.transition(self, STOPPED, expected=(SLEEPING,)):
+                self._log_system(f"Servidor '{self.name}' parado (sob demanda).\n")
+                self._set_status("Parado", "Gray.TLabel")
+                return
+        if (
+            self.process
+            and self.process.poll() is None
+            and server_registry.transition(self, STOPPING, expected=(STARTING, RUNNING))
+        ):
             try:
                 self._set_status("Parando...", "Orange.TLabel")
-                self.process.terminate()
-                self.process.wait(timeout=5)
+                self._request_stop(STOP_MANUAL)
+                self._terminate_process()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
                 if self.process.poll() is None:
-                    self.process.kill()
-                    self._log_system(f"Servidor '{self.name}' parado à força.\n")
+                    self._terminate_process(force=True)
+                    self._log_system(
+                        f"Servidor '{self.name}' parado à força.\n", "WARNING"
+                    )
                     self._set_status("Parado (Forçado)", "Red.TLabel")
                 else:
                     self._log_system(f"Servidor '{self.name}' parado.\n")
                     self._set_status("Parado", "Gray.TLabel")
 
-                if self.name in running_servers:
-                    del running_servers[self.name]
+                server_registry.transition(self, STOPPED)
 
                 if self.output_label:
                     self.output_label.config(state=tk.NORMAL)
@@ -256,12 +915,13 @@ class Server:
                     self.output_label.see(tk.END)
                     self.output_label.config(state=tk.DISABLED)
             except Exception as e:
-                self._log_system(f"Erro ao tentar parar '{self.name}': {e}\n")
+                self._log_system(f"Erro ao tentar parar '{self.name}': {e}\n", "ERROR")
                 if self.output_label:
                     self.output_label.config(state=tk.NORMAL)
                     self.output_label.insert(tk.END, f"\nErro ao parar: {e}")
                     self.output_label.config(state=tk.DISABLED)
                 self._set_status("Erro ao Parar", "Red.TLabel")
+                server_registry.transition(self, ERROR)
             finally:  # Garante que o handle do arquivo de log seja fechado
                 if self.log_file_handle:
                     try:
@@ -271,7 +931,8 @@ class Server:
                         )
                     except Exception as e:
                         self._log_system(
-                            f"Erro ao fechar arquivo de log para '{self.name}': {e}\n"
+                            f"Erro ao fechar arquivo de log para '{self.name}': {e}\n",
+                            "ERROR",
                         )
                     self.log_file_handle = None
         else:
@@ -288,44 +949,524 @@ class Server:
                     pass
                 self.log_file_handle = None
 
-    def _log_system(self, message):
-        """Adiciona uma mensagem ao log do sistema na thread principal do Tkinter."""
-        self.app_root.after(0, lambda: self._update_system_log_widget(message))
+    def restart(self):
+        """Reinicia o servidor e registra a indisponibilidade medida na porta pública.
+
+        Com balanceador (réplicas), no modo sob demanda ou com rota no proxy
+        reverso ligado a troca é gradual: a nova instância sobe em outra porta,
+        recebe o tráfego só depois de aceitar conexões e a antiga é drenada antes
+        de parar. Nos demais casos o servidor é parado e iniciado de novo.
+        """
+        if not self._restart_lock.acquire(blocking=False):
+            self._log_system(f"Reinício de '{self.name}' já em andamento.\n", "WARNING")
+            return
+        try:
+            probe = None
+            if self.expected_port and self.state == RUNNING:
+                probe = self._availability_probe().start()
+            t0 = time.perf_counter()
+            if self._can_roll_replicas():
+                mode = "gradual, réplicas"
+                self._roll_replicas()
+            elif self._can_roll_listener():
+                mode = "gradual, sob demanda"
+                self._roll_listener()
+            elif self._can_roll_proxy():
+                mode = "gradual, proxy reverso"
+                self._roll_proxy()
+            else:
+                mode = "parar e iniciar"
+                if server_registry.is_active(self):
+                    self._request_stop(STOP_RESTART)
+                    self.stop()
+                # Os filhos do shell podem levar um instante para soltar a porta
+                deadline = time.monotonic() + 5
+                while (
+                    self.expected_port
+                    and is_port_in_use(self.expected_port)
+                    and time.monotonic() < deadline
+                ):
+                    time.sleep(0.05)
+                self.start()
+                if probe:
+                    self._wait_port_ready(
+                        self.expected_port, lambda: server_registry.is_active(self)
+                    )
+            message = (
+                f"'{self.name}' reiniciado ({mode}) em "
+                f"{time.perf_counter() - t0:.2f} s"
+            )
+            if probe:
+                gap = probe.stop()
+                self.metrics.restart_gap_seconds = gap
+                message += (
+                    f"; indisponível por {gap * 1000:.0f} ms na porta "
+                    f"{probe.port} ({probe.failures}/{probe.probes} "
+                    "sondagens falharam)"
+                )
+            self._log_system(message + ".\n")
+        finally:
+            self._restart_lock.release()
+
+    def start_and_wait(self):
+        """Inicia o servidor e espera a porta aceitar conexões (ações em grupo).
+
+        Retorna True se o servidor ficou ativo e, havendo porta, pronto.
+        """
+        if not server_registry.is_active(self):
+            self.start()
+        if not server_registry.is_active(self):
+            return False
+        if self.expected_port and self.state != SLEEPING:
+            ready = self._wait_port_ready(
+                self.expected_port, lambda: server_registry.is_active(self)
+            )
+            return ready is not None
+        return True
+
+    def _wait_port_ready(self, port, alive):
+        """Espera `port` aceitar conexão; retorna os segundos ou None se `alive()`
+        ficar falso ou o tempo acabar."""
+        t0 = time.perf_counter()
+        deadline = t0 + READY_TIMEOUT
+        while alive() and time.perf_counter() < deadline:
+            if probe_port(port, timeout=0.5) is not None:
+                return time.perf_counter() - t0
+            time.sleep(0.05)
+        return None
+
+    def _drain(self, open_connections):
+        """Espera as conexões abertas na instância antiga terminarem (até DRAIN_TIMEOUT)."""
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while open_connections() > 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _can_roll_replicas(self):
+        balancer = self._balancer
+        return (
+            self.state == RUNNING
+            and balancer is not None
+            and balancer.running
+            and balancer.port == self.expected_port
+            and self.balancer in BALANCE_STRATEGIES
+            and len(self.replica_servers) == self.replicas
+        )
+
+    def _roll_replicas(self):
+        """Troca as réplicas uma a uma atrás do balanceador."""
+        balancer = self._balancer
+        balancer.strategy = self.balancer
+        for position, old in enumerate(list(self.replica_servers)):
+            new = self._make_replica(old.replica_index, find_free_port())
+            new.start()
+            ready = self._wait_port_ready(
+                new.expected_port, lambda: server_registry.is_active(new)
+            )
+            if ready is None or self._balancer is not balancer:
+                if self._balancer is balancer:
+                    self._log_system(
+                        f"Nova instância de '{new.name}' não ficou pronta; "
+                        "mantendo a atual e interrompendo o reinício.\n",
+                        "ERROR",
+                    )
+                if server_registry.is_active(new):
+                    new.stop()
+                return
+            # O balanceador só enxerga a nova porta depois que ela está pronta
+            self.replica_servers[position] = new
+            self._replica_changed()
+            if server_registry.is_active(old):
+                self._drain(lambda: balancer.active[old.expected_port])
+                old._request_stop(STOP_RESTART)
+                old.stop()
+
+    def _can_roll_listener(self):
+        listener = self._listener
+        return (
+            listener is not None
+            and listener.running
+            and self.on_demand
+            and self.replicas <= 1
+            and listener.port == self.expected_port
+        )
+
+    def _roll_listener(self):
+        """Sobe o novo processo em outra porta interna e troca o destino do listener."""
+        listener = self._listener
+        listener.idle_timeout = self.idle_timeout
+        old_process = self.process
+        old_port = listener.backend_port
+        if self.state != RUNNING or old_port is None or not self._process_alive():
+            return  # Em espera: a próxima conexão já usa a configuração nova
+        listener.touch()
+        new_port = find_free_port()
+        new_process = self._launch_beside(new_port, lambda: self._listener is listener)
+        if new_process is None:
+            return
+        listener.switch_backend(new_port)
+        self._drain(lambda: listener.active[old_port])
+        self._stop_process(old_process)
+
+    def _can_roll_proxy(self):
+        proxy = front_proxy
+        return (
+            proxy is not None
+            and proxy.running
+            and bool((self.proxy_route or "").strip())
+            and self.expected_port
+            and self.state == RUNNING
+            and self.replicas <= 1
+            and self._listener is None
+            and self._process_alive()
+        )
+
+    def _roll_proxy(self):
+        """Sobe o novo processo em outra porta e troca o destino da rota no proxy
+        reverso; quem acessa a porta configurada direto não é atendido depois."""
+        proxy = front_proxy
+        old_process = self.process
+        old_port = self.backend_port or self.expected_port
+        new_port = find_free_port()
+        new_process = self._launch_beside(new_port, lambda: proxy.running)
+        if new_process is None:
+            return
+        self.backend_port = new_port  # A rota passa a apontar para cá
+        self._drain(lambda: proxy.active[old_port])
+        proxy.discard_upstream(old_port)
+        self._stop_process(old_process)
+
+    def _launch_beside(self, new_port, still_valid):
+        """Inicia um segundo processo em `new_port` sem parar o atual e espera a
+        porta aceitar conexões. Retorna o novo processo, já supervisionado, ou
+        None se ele não ficou pronto (o atual continua)."""
+        old_process = self.process
+        old_log = self.log_file_handle
+        self._launch(new_port)
+        new_process = self.process
+        # Até a troca, o processo supervisionado continua sendo o antigo
+        self.process = old_process
+        if old_log is not None and self.log_file_handle is not old_log:
+            self.log_file_handle.close()
+            self.log_file_handle = old_log
+        if new_process is old_process or self.state != RUNNING:
+            server_registry.transition(self, RUNNING)
+            self._set_status("Executando", "Green.TLabel")
+            return None  # Falha ao iniciar (já registrada por _launch)
+        ready = self._wait_port_ready(new_port, lambda: new_process.poll() is None)
+        if ready is None or not still_valid():
+            if still_valid():
+                self._log_system(
+                    f"Nova instância de '{self.name}' não ficou pronta; "
+                    "mantendo a atual.\n",
+                    "ERROR",
+                )
+            self._stop_process(new_process)
+            return None
+        self.process = new_process
+        self._note_ready(new_process, ready)
+        return new_process
+
+    def _availability_probe(self):
+        """Sonda da indisponibilidade no reinício: pela rota, se o proxy reverso
+        estiver ligado e o servidor tiver uma; senão, na porta configurada."""
+        proxy = front_proxy
+        route = (self.proxy_route or "").strip()
+        if proxy is None or not proxy.running or not route:
+            return AvailabilityProbe(self.expected_port)
+        if route.startswith("/"):
+            return AvailabilityProbe(proxy.port, path=route, host=proxy.host)
+        return AvailabilityProbe(proxy.port, host=proxy.host, host_header=route)
+
+    def _stop_process(self, process):
+        """Encerra um processo que não é mais o supervisionado (reinício)."""
+        if process.poll() is not None:
+            return
+        self._request_stop(STOP_RESTART, process)
+        self._terminate_process(process=process)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._terminate_process(force=True, process=process)
+
+    def _note_ready(self, process, seconds):
+        self.metrics.ready_seconds = seconds
+        run = self._runs.get(process)
+        if run is not None:
+            run["ready_seconds"] = seconds
+
+    def _request_stop(self, reason, process=None):
+        """Anota o motivo da parada para o histórico (vale o primeiro pedido)."""
+        for replica in self.replica_servers:
+            replica._request_stop(reason)
+        run = self._runs.get(process or self.process)
+        if run is not None:
+            run.setdefault("stop_reason", reason)
+
+    def check_sockets(self):
+        """Avisa, uma vez por execução, sobre a porta realmente em escuta e sobre
+        conexões presas em CLOSE_WAIT (chamado pela thread do MetricsSampler)."""
+        m = self.metrics
+        if m.listen_ports is None:
+            return
+        run, notices = self._socket_notices
+        if run != m.starts_total:
+            notices = set()
+            self._socket_notices = (m.starts_total, notices)
+        ports = ", ".join(str(port) for port in m.listen_ports)
+        if m.listen_ports and "port" not in notices:
+            if not self.expected_port:
+                notices.add("port")
+                self._log_system(
+                    f"'{self.name}' está escutando na(s) porta(s) {ports} "
+                    f"(detectada automaticamente).\n"
+                )
+            elif self._listener is None and self.expected_port not in m.listen_ports:
+                notices.add("port")
+                self._log_system(
+                    f"'{self.name}' escuta na(s) porta(s) {ports}, não na porta "
+                    f"esperada {self.expected_port}.\n",
+                    "WARNING",
+                )
+        if (
+            m.tcp_close_wait or 0
+        ) >= CLOSE_WAIT_WARNING and "close_wait" not in notices:
+            notices.add("close_wait")
+            self._log_system(
+                f"'{self.name}' tem {m.tcp_close_wait} conexões em CLOSE_WAIT: o "
+                f"processo não está fechando conexões encerradas pelo outro lado "
+                f"(possível vazamento).\n",
+                "WARNING",
+            )
+
+    def _record_run(self, process, exit_code):
+        """Grava no histórico persistente a execução que terminou."""
+        run = self._runs.pop(process, None)
+        if run is None:
+            return
+        m = self.metrics
+        run_history.record(
+            server=self.replica_of.name if self.replica_of is not None else self.name,
+            started_at=run["started_at"],
+            stopped_at=time.time(),
+            ready_seconds=run.get("ready_seconds"),
+            exit_code=exit_code,
+            stop_reason=stop_reason_for(exit_code, run.get("stop_reason")),
+            restarts=m.restarts_total,
+            peak_rss_bytes=m.peak_rss_bytes if process is self.process else None,
+            stdout_lines=m.stdout_lines_total - run["stdout_lines"],
+            stderr_lines=m.stderr_lines_total - run["stderr_lines"],
+        )
+
+    def runtime_entry(self):
+        """Estado do processo em execução para a readoção, ou None se não houver."""
+        if not self._process_alive():
+            return None
+        run = self._runs.get(self.process, {})
+        tailers = self._tailers
+        return entry_for(
+            self.process,
+            command=self.command,
+            log_path=self.log_file_path,
+            log_offset=tailers["stdout"].offset if tailers else 0,
+            err_log_offset=tailers["stderr"].offset if tailers else 0,
+            started_at=run.get("started_at"),
+            ready_seconds=run.get("ready_seconds"),
+            # Réplicas e o modo sob demanda dependem de sockets da GUI anterior
+            adoptable=self.replica_of is None and self._listener is None,
+        )
+
+    def can_adopt(self, entry):
+        return (
+            bool(entry.get("adoptable"))
+            and entry.get("command") == self.command
+            and self.replicas <= 1
+            and not self.on_demand
+        )
+
+    def adopt(self, process, entry):
+        """Retoma a supervisão de um processo deixado em execução por uma sessão
+        anterior, continuando a leitura do log de onde ela parou."""
+        if not server_registry.transition(self, RUNNING, expected=IDLE_STATES):
+            return False
+        self.process = process
+        self.log_file_path = entry.get("log_path") or self._log_path()
+        log_offset = int(entry.get("log_offset") or 0)
+        # Entradas gravadas antes da separação não têm a posição do stderr
+        err_offset = entry.get("err_log_offset")
+        if err_offset is None:
+            err_offset = _file_size(self._err_log_path())
+        self.show_log_tail(log_offset)  # O restante é relido a partir de log_offset
+        self.metrics.record_start()
+        self.metrics.started_at = entry.get("started_at") or self.metrics.started_at
+        self.metrics.ready_seconds = entry.get("ready_seconds")
+        self._runs[process] = {
+            "started_at": self.metrics.started_at,
+            "ready_seconds": entry.get("ready_seconds"),
+            "stdout_lines": self.metrics.stdout_lines_total,
+            "stderr_lines": self.metrics.stderr_lines_total,
+        }
+        self._log_system(
+            f"'{self.name}' continuava em execução (PID: {process.pid}); "
+            "processo readotado sem reiniciar.\n"
+        )
+        self._set_status("Executando", "Green.TLabel")
+        threading.Thread(
+            target=self._wait_for_process, args=(process,), daemon=True
+        ).start()
+        self._ensure_tailing(log_offset, int(err_offset))
+        self._watch_sources()
+        return True
+
+    def _watch_sources(self):
+        """Inicia o observador de código-fonte, se configurado e ainda parado."""
+        if not self.watch or self._source_watcher is not None:
+            return
+        base = self.working_dir or "."
+        watcher = TreeWatcher(
+            [os.path.join(base, path) for path in self.watch.get("paths") or ["."]],
+            self._on_sources_changed,
+            globs=self.watch.get("globs") or (),
+            ignore=(*DEFAULT_WATCH_IGNORE, *(self.watch.get("ignore") or ())),
+            debounce=self.watch.get("debounce_ms", 300) / 1000,
+        )
+        watcher.start()
+        self._source_watcher = watcher
+        self._log_system(
+            f"Observando o código de '{self.name}' ({watcher.backend}, "
+            f"{watcher.watched_dirs} diretórios).\n"
+        )
+
+    def _unwatch_sources(self):
+        watcher, self._source_watcher = self._source_watcher, None
+        if watcher is not None:
+            watcher.stop()
+
+    def _on_sources_changed(self, paths):
+        """Reinicia (ou inicia, se tiver caído) o servidor após mudanças no código."""
+        if server_registry.is_active(self):
+            action = self.restart
+        elif self.state in (EXITED, ERROR):
+            action = self.start  # Provavelmente a correção de uma queda
+        else:
+            return
+        base = self.working_dir or "."
+        names = ", ".join(os.path.relpath(path, base) for path in paths[:3])
+        if len(paths) > 3:
+            names += f" e mais {len(paths) - 3}"
+        self._log_system(
+            f"{len(paths)} arquivo(s) alterado(s) em '{self.name}' ({names}); "
+            "reiniciando.\n"
+        )
+        if self._prebuild():
+            action()
+
+    def _prebuild(self):
+        """Com cache de build, compila antes de parar a instância atual: se o build
+        falhar, ela continua rodando."""
+        if not self.build_cache or not server_registry.is_active(self):
+            return True
+        status = (self.status_text, self.status_style)
+        try:
+            self._resolve_command()
+        except BuildError as e:
+            self._log_system(
+                f"Erro de build para '{self.name}'; mantendo a versão em execução: "
+                f"{e}\n{e.output}",
+                "ERROR",
+            )
+            return False
+        finally:
+            self._set_status(*status)
+        return True
+
+    def _log_system(self, message, level="INFO"):
+        """Registra um evento do servidor no log do sistema (seguro entre threads).
 
-    def _update_system_log_widget(self, message):
-        self.system_log_widget.config(state=tk.NORMAL)
-        self.system_log_widget.insert(tk.END, message)
-        self.system_log_widget.see(tk.END)
-        self.system_log_widget.config(state=tk.DISABLED)
+        A GUI exibe os eventos em lotes a partir do EventStore.
+        """
+        self.event_log.add(self.name, level, message)
 
     def to_dict(self):
         """Converte o objeto Server em um dicionário para serialização."""
-        return {
+        data = {
             "name": self.name,
             "command": self.command,
             "working_dir": self.working_dir,
             "autostart": self.autostart_var.get(),  # Pega o valor atual do checkbox
             "expected_port": self.expected_port,
         }
+        # Campos opcionais só são gravados quando usados
+        for field, default in self.OPTIONAL_FIELDS.items():
+            value = getattr(self, field)
+            if value != default:
+                data[field] = copy.deepcopy(value)
+        return data
+
+    @classmethod
+    def optional_fields_from(cls, data):
+        """Extrai os campos opcionais de uma entrada, preenchendo os padrões."""
+        return {
+            field: copy.deepcopy(default if data.get(field) is None else data[field])
+            for field, default in cls.OPTIONAL_FIELDS.items()
+        }
 
-    def update_details(self, name, command, working_dir, autostart, expected_port):
-        """Atualiza os detalhes do servidor."""
+    @classmethod
+    def from_dict(cls, data, event_log, app_root):
+        """Cria um Server a partir de uma entrada do arquivo de configuração."""
+        server = cls(
+            data["name"],
+            data["command"],
+            data.get("working_dir", ""),
+            event_log,
+            app_root,
+            data.get("autostart", False),
+            data.get("expected_port"),
+            **cls.optional_fields_from(data),
+        )
+        if server.replicas > 1 and server.on_demand:
+            # O formulário recusa a combinação; no arquivo ela só é avisada
+            server._log_system(
+                f"'{server.name}': on_demand é ignorado com replicas > 1 "
+                "(as réplicas já ocupam a porta pública).\n",
+                "WARNING",
+            )
+        return server
+
+    def update_details(
+        self, name, command, working_dir, autostart, expected_port, **options
+    ):
+        """Atualiza os detalhes do servidor.
+
+        `options` aceita os campos de OPTIONAL_FIELDS; os omitidos não mudam.
+        """
         self.name = name
         self.command = command
         self.working_dir = working_dir
         self.autostart_var.set(autostart)
         self.autostart = autostart  # Atualiza o atributo interno também
         self.expected_port = expected_port
+        watch = self.watch
+        for field, value in options.items():
+            if field not in self.OPTIONAL_FIELDS:
+                raise TypeError(f"Campo desconhecido: {field}")
+            setattr(self, field, copy.deepcopy(value))
+        if self.watch != watch and (
+            self._source_watcher is not None or server_registry.is_active(self)
+        ):
+            self._unwatch_sources()
+            self._watch_sources()
 
     def open_in_browser(self):
         """Tenta abrir a URL do servidor no navegador padrão."""
         if self.expected_port:
-            url = f"http://localhost:{self.expected_port}"
+            url = f"http://localhost:{self.backend_port or self.expected_port}"
             self._log_system(f"Abrindo '{url}' no navegador para '{self.name}'.\n")
             try:
                 webbrowser.open_new_tab(url)
             except Exception as e:
-                self._log_system(f"Erro ao abrir o navegador para '{self.name}': {e}\n")
+                self._log_system(
+                    f"Erro ao abrir o navegador para '{self.name}': {e}\n", "ERROR"
+                )
                 messagebox.showerror(
                     "Erro no Navegador", f"Não foi possível abrir o navegador: {e}"
                 )
@@ -339,12 +1480,49 @@ class Server:
             )
 
 
+def with_replicas(servers):
+    """Lista os servidores seguidos das réplicas de cada um (para as métricas)."""
+    result = []
+    for server in servers:
+        result.append(server)
+        result.extend(server.replica_servers)
+    return result
+
+
+# Hash do último conteúdo lido ou gravado pelo próprio app, usado pelo
+# recarregamento automático para ignorar as próprias gravações
+_config_digest = None
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
 def save_configs(servers_list):
     """Salva a lista de configurações de servidores em um arquivo JSON."""
+    with diagnostics.timed("save_configs"):
+        _write_configs(servers_list)
+
+
+def _write_configs(servers_list):
+    global _config_digest
     data_to_save = [server.to_dict() for server in servers_list]
+    text = json.dumps(data_to_save, indent=4)
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(data_to_save, f, indent=4)
+        # Grava em um arquivo temporário e renomeia, para que o observador
+        # nunca leia um arquivo pela metade
+        tmp_path = f"{CONFIG_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, CONFIG_FILE)
+        _config_digest = _digest(text)
         print(f"Configurações salvas em {CONFIG_FILE}")
     except IOError as e:
         print(f"Erro ao salvar configurações: {e}")
@@ -352,10 +1530,14 @@ def save_configs(servers_list):
 
 def load_configs():
     """Carrega as configurações de servidores de um arquivo JSON."""
+    global _config_digest
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                text = f.read()
+            data = json.loads(text)
+            _config_digest = _digest(text)
+            return data
         except json.JSONDecodeError as e:
             print(f"Erro ao decodificar JSON do arquivo de configuração: {e}")
             return []
@@ -365,96 +1547,282 @@ def load_configs():
     return []
 
 
-def create_dummy_files():
-    """Cria arquivos dummy para demonstração."""
-    node_content = """
+def load_configs_if_changed():
+    """Relê o arquivo de configuração se o conteúdo mudou desde a última leitura.
+
+    Retorna a nova lista de entradas, ou None se nada mudou. Levanta ValueError
+    se o JSON estiver inválido (o estado atual deve ser mantido nesse caso).
+    """
+    global _config_digest
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            text = f.read()
+    except IOError:
+        return None
+    digest = _digest(text)
+    if digest == _config_digest:
+        return None
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("o arquivo de configuração deve conter uma lista")
+    _config_digest = digest
+    return data
+
+
+class ConfigDiff:
+    """Diferença entre os servidores carregados e o arquivo de configuração."""
+
+    def __init__(self):
+        self.added = []  # Entradas novas
+        self.removed = []  # Servidores que não estão mais no arquivo
+        self.restart = []  # (servidor, entrada) com campos que exigem reinício
+        self.update = []  # (servidor, entrada) com mudanças que não exigem reinício
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.restart or self.update)
+
+    def summary(self):
+        return (
+            f"+{len(self.added)} adicionados, -{len(self.removed)} removidos, "
+            f"{len(self.restart)} reiniciados, {len(self.update)} atualizados"
+        )
+
+
+def _normalize_entry(entry):
+    """Entrada de configuração com todos os campos comparáveis preenchidos."""
+    return {
+        "command": entry["command"],
+        "working_dir": entry.get("working_dir", ""),
+        "autostart": entry.get("autostart", False),
+        "expected_port": entry.get("expected_port"),
+        **Server.optional_fields_from(entry),
+    }
+
+
+def diff_configs(servers, entries):
+    """Compara servidores existentes com as entradas do arquivo, por nome (O(n))."""
+    diff = ConfigDiff()
+    current = {server.name: server for server in servers}
+    seen = set()
+    for entry in entries:
+        name = entry.get("name")
+        if not name or not entry.get("command") or name in seen:
+            continue  # Entradas inválidas ou duplicadas são ignoradas
+        seen.add(name)
+        server = current.get(name)
+        if server is None:
+            diff.added.append(entry)
+            continue
+        old = _normalize_entry(server.to_dict())
+        new = _normalize_entry(entry)
+        if any(old[field] != new[field] for field in RESTART_FIELDS):
+            diff.restart.append((server, entry))
+        elif old != new:
+            diff.update.append((server, entry))
+    diff.removed = [server for name, server in current.items() if name not in seen]
+    return diff
+
+
+# Código-fonte dos servidores dummy. Um único modelo gera as duas variantes,
+# trocando apenas o rótulo e a porta padrão.
+DUMMY_SERVER_TEMPLATE = r'''
+import argparse
+import asyncio
+import datetime
 import http.server
-import socketserver
 import os
 import signal
+import socketserver
 import sys
-import datetime
+import time
 
-PORT = 3000
+SERVER_LABEL = "__SERVER_LABEL__"
+DEFAULT_PORT = __DEFAULT_PORT__
+# Tamanho da mensagem padrão (o horário tem largura fixa): o menor corpo possível
+MIN_RESPONSE_SIZE = len(f"Hello from {SERVER_LABEL} (Python)! Time: 00:00:00\n")
 
-class MyHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-type", "text/plain")
-        self.end_headers()
-        self.wfile.write(f"Hello from Dummy Node.js Server (Python)! Time: {datetime.datetime.now().strftime('%H:%M:%S')}\\n".encode('utf-8'))
 
-    def log_message(self, format, *args):
-        # Suppress HTTP request logging
-        pass
+def parse_args():
+    parser = argparse.ArgumentParser(description=f"{SERVER_LABEL} (Python)")
+    parser.add_argument(
+        "port", nargs="?", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT))
+    )
+    parser.add_argument("--port", dest="port_option", type=int, default=None)
+    parser.add_argument(
+        "--mode",
+        choices=("threaded", "asyncio", "single"),
+        default=os.environ.get("DUMMY_MODE", "threaded"),
+    )
+    parser.add_argument(
+        "--response-size",
+        type=int,
+        default=int(os.environ.get("DUMMY_RESPONSE_SIZE", "0")),
+        help="Tamanho do corpo da resposta em bytes (0 = mensagem curta; "
+        f"mínimo {MIN_RESPONSE_SIZE})",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=float(os.environ.get("DUMMY_LATENCY_MS", "0")),
+        help="Latência artificial por requisição",
+    )
+    args = parser.parse_args()
+    if args.port_option is not None:
+        args.port = args.port_option
+    if args.response_size and args.response_size < MIN_RESPONSE_SIZE:
+        parser.error(
+            f"--response-size deve ser 0 ou pelo menos {MIN_RESPONSE_SIZE} "
+            "(o tamanho da mensagem padrão)"
+        )
+    return args
 
-def start_server():
-    with socketserver.TCPServer(("", PORT), MyHandler) as httpd:
-        print(f"Dummy Node.js Server (Python) running on port {PORT}")
-        httpd.serve_forever()
 
-def signal_handler(sig, frame):
-    print("Dummy Node.js Server received signal. Exiting...")
-    sys.exit(0)
+ARGS = parse_args()
+HEALTH_BODY = b'{"status": "ok"}\n'
 
-if __name__ == "__main__":
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    start_server()
-"""
 
-    go_dummy_content = """
-import http.server
-import socketserver
-import os
-import signal
-import sys
-import datetime
+def build_body(path):
+    """Retorna (content-type, corpo) para o caminho requisitado."""
+    if path.split("?", 1)[0] == "/health":
+        return "application/json", HEALTH_BODY
+    message = (
+        f"Hello from {SERVER_LABEL} (Python)! "
+        f"Time: {datetime.datetime.now().strftime('%H:%M:%S')}\n"
+    ).encode("utf-8")
+    if ARGS.response_size > len(message):
+        message += b"." * (ARGS.response_size - len(message) - 1) + b"\n"
+    return "text/plain", message
+
 
-PORT = 8080
+class DummyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Mantém a conexão aberta (keep-alive)
+    disable_nagle_algorithm = True  # Evita atraso de ~40 ms entre cabeçalho e corpo
 
-class MyGoHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
+        if ARGS.latency_ms:
+            time.sleep(ARGS.latency_ms / 1000)
+        content_type, body = build_body(self.path)
         self.send_response(200)
-        self.send_header("Content-type", "text/plain")
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(f"Hello from Dummy Go Server (Python)! Time: {datetime.datetime.now().strftime('%H:%M:%S')}\\n".encode('utf-8'))
+        self.wfile.write(body)
 
     def log_message(self, format, *args):
         # Suppress HTTP request logging
         pass
 
+
+class ThreadedServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SingleServer(http.server.HTTPServer):
+    allow_reuse_address = True
+
+
+async def handle_connection(reader, writer):
+    """Atende requisições HTTP/1.1 em uma conexão keep-alive (modo asyncio)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = not request_line.rstrip().endswith(b"HTTP/1.0")
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "connection":
+                    keep_alive = value.strip().lower() != "close"
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if ARGS.latency_ms:
+                await asyncio.sleep(ARGS.latency_ms / 1000)
+            content_type, body = build_body(path)
+            writer.write(
+                (
+                    "HTTP/1.1 200 OK\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_asyncio():
+    server = await asyncio.start_server(handle_connection, "", ARGS.port)
+    async with server:
+        await server.serve_forever()
+
+
 def start_server():
-    with socketserver.TCPServer(("", PORT), MyGoHandler) as httpd:
-        print(f"Dummy Go Server (Python) running on port {PORT}")
+    print(
+        f"{SERVER_LABEL} (Python) running on port {ARGS.port} "
+        f"(mode={ARGS.mode}, response_size={ARGS.response_size}, "
+        f"latency_ms={ARGS.latency_ms:g})"
+    )
+    if ARGS.mode == "asyncio":
+        asyncio.run(serve_asyncio())
+        return
+    server_class = ThreadedServer if ARGS.mode == "threaded" else SingleServer
+    with server_class(("", ARGS.port), DummyHandler) as httpd:
         httpd.serve_forever()
 
+
 def signal_handler(sig, frame):
-    print("Dummy Go Server received signal. Exiting...")
+    print(f"{SERVER_LABEL} received signal. Exiting...")
     sys.exit(0)
 
+
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     start_server()
-"""
+'''
 
-    try:
-        with open("node_dummy_server.py", "w") as f:
-            f.write(node_content)
-        print("Created node_dummy_server.py")
-    except IOError as e:
-        print(f"Error creating node_dummy_server.py: {e}")
+DUMMY_SERVERS = {
+    "node_dummy_server.py": ("Dummy Node.js Server", 3000),
+    "go_dummy_server.py": ("Dummy Go Server", 8080),
+}
 
-    try:
-        with open("go_dummy_server.py", "w") as f:
-            f.write(go_dummy_content)
-        print("Created go_dummy_server.py")
-    except IOError as e:
-        print(f"Error creating go_dummy_server.py: {e}")
+
+def create_dummy_files():
+    """Cria arquivos dummy para demonstração.
+
+    Os servidores gerados aceitam a porta por argumento (`--port` ou posicional)
+    ou pela variável de ambiente PORT, atendem em modo threaded (padrão), asyncio
+    ou single, mantêm conexões keep-alive e expõem um endpoint `/health`.
+    """
+    for file_name, (label, default_port) in DUMMY_SERVERS.items():
+        content = DUMMY_SERVER_TEMPLATE.replace("__SERVER_LABEL__", label).replace(
+            "__DEFAULT_PORT__", str(default_port)
+        )
+        try:
+            with open(file_name, "w") as f:
+                f.write(content)
+            print(f"Created {file_name}")
+        except IOError as e:
+            print(f"Error creating {file_name}: {e}")
 
 
-running_servers = {}
+# Registro único de todos os servidores (substitui as antigas lista/dicionários globais)
+server_registry = ServerRegistry()
+run_history = RunHistory()  # Execuções gravadas em logs/history.sqlite3
+diagnostics = Diagnostics()  # Instrumentação do loop do Tk (aba Diagnóstico)
+metrics_store = TimeSeriesStore()  # Séries das métricas em logs/timeseries
+tail_loop = TailLoop()  # Uma thread lê os logs de todos os servidores
+front_proxy = None  # ReverseProxy da GUI (atribuído em main)
 editing_server_obj = None  # Variável global para o servidor sendo editado
 
 
@@ -481,12 +1849,13 @@ def open_log_file(file_path):
 
 
 def main():
-    global editing_server_obj, servers_instances_widgets  # Necessário para modificar globalmente
+    global editing_server_obj, front_proxy  # Necessário para modificar globalmente
 
     root = tk.Tk()
     root.title("Gerenciador de Servidores de Banco de Dados/APIs (Python)")
     root.geometry("800x700")
     root.minsize(850, 750)  # Define um tamanho mínimo para a janela
+    diagnostics.start(root)  # Antes de qualquer after(), para contar todos
 
     # Aplica um tema ttk e define estilos para os labels de status
     style = ttk.Style()
@@ -591,6 +1960,25 @@ def main():
         row=1, column=1, sticky="ew", pady=5, padx=10
     )  # Ajustado padx
 
+    # Grupo (stack) e tags, usados pelas ações em grupo da aba de servidores
+    group_tags_frame = ttk.Frame(add_server_frame)
+    group_tags_frame.grid(row=1, column=2, columnspan=2, sticky="w", pady=5, padx=10)
+    ttk.Label(group_tags_frame, text="Grupo:").pack(side="left")
+    group_var = tk.StringVar(root)
+    ttk.Entry(group_tags_frame, textvariable=group_var, width=14).pack(
+        side="left", padx=(5, 10)
+    )
+    ttk.Label(group_tags_frame, text="Tags (vírgulas):").pack(side="left")
+    tags_var = tk.StringVar(root)
+    ttk.Entry(group_tags_frame, textvariable=tags_var, width=20).pack(
+        side="left", padx=(5, 10)
+    )
+    ttk.Label(group_tags_frame, text="Agenda (;):").pack(side="left")
+    schedule_var = tk.StringVar(root)
+    ttk.Entry(group_tags_frame, textvariable=schedule_var, width=30).pack(
+        side="left", padx=(5, 0)
+    )
+
     command_args_label = ttk.Label(add_server_frame, text="Argumentos/Caminho:")
     command_args_label.grid(row=2, column=0, sticky="w", pady=5, padx=10)
 
@@ -629,6 +2017,30 @@ def main():
     port_entry = ttk.Entry(add_server_frame, textvariable=server_port_var)
     port_entry.grid(row=4, column=1, sticky="ew", pady=5, padx=10)
 
+    # Réplicas em portas consecutivas, com balanceador opcional na porta informada
+    replicas_frame = ttk.Frame(add_server_frame)
+    replicas_frame.grid(row=4, column=2, sticky="w", pady=5, padx=10)
+    ttk.Label(replicas_frame, text="Réplicas:").pack(side="left")
+    replicas_var = tk.StringVar(root, value="1")
+    ttk.Spinbox(
+        replicas_frame, from_=1, to=64, width=4, textvariable=replicas_var
+    ).pack(side="left", padx=(5, 10))
+    balancer_var = tk.StringVar(root, value="")
+    ttk.Combobox(
+        replicas_frame,
+        textvariable=balancer_var,
+        values=("",) + BALANCE_STRATEGIES,
+        state="readonly",
+        width=12,
+    ).pack(side="left")
+
+    # Rota no proxy reverso: prefixo de caminho ("/api") ou host ("api.localhost")
+    proxy_route_label = ttk.Label(add_server_frame, text="Rota no Proxy (opcional):")
+    proxy_route_label.grid(row=5, column=0, sticky="w", pady=5, padx=10)
+    proxy_route_var = tk.StringVar(root)
+    proxy_route_entry = ttk.Entry(add_server_frame, textvariable=proxy_route_var)
+    proxy_route_entry.grid(row=5, column=1, sticky="ew", pady=5, padx=10)
+
     autostart_checkbox_var = tk.BooleanVar(root)  # Nova variável para o autostart
     autostart_checkbox = ttk.Checkbutton(
         add_server_frame,
@@ -636,11 +2048,47 @@ def main():
         variable=autostart_checkbox_var,
     )
     autostart_checkbox.grid(
-        row=5, column=0, columnspan=3, sticky="w", pady=10, padx=10
+        row=6, column=0, sticky="w", pady=10, padx=10
     )  # Aumentado pady
 
+    # Compila uma vez (ex: "go run") e executa o binário em cache nos inícios seguintes
+    build_cache_checkbox_var = tk.BooleanVar(root)
+    build_cache_checkbox = ttk.Checkbutton(
+        add_server_frame,
+        text="Cache de build (go run)",
+        variable=build_cache_checkbox_var,
+    )
+    build_cache_checkbox.grid(row=6, column=1, sticky="w", pady=10, padx=10)
+
+    # Escuta na porta e só inicia o processo na primeira conexão (requer porta)
+    on_demand_checkbox_var = tk.BooleanVar(root)
+    on_demand_checkbox = ttk.Checkbutton(
+        add_server_frame,
+        text="Sob demanda (inicia na 1ª conexão)",
+        variable=on_demand_checkbox_var,
+    )
+    on_demand_checkbox.grid(row=6, column=2, sticky="w", pady=10, padx=10)
+
+    # Observa o diretório de trabalho e reinicia quando o código muda
+    watch_checkbox_var = tk.BooleanVar(root)
+    watch_checkbox = ttk.Checkbutton(
+        add_server_frame,
+        text="Reiniciar ao alterar o código",
+        variable=watch_checkbox_var,
+    )
+    watch_checkbox.grid(row=6, column=3, sticky="w", pady=10, padx=10)
+
+    # Pipe na entrada padrão para enviar comandos (consoles de administração, REPLs)
+    stdin_checkbox_var = tk.BooleanVar(root)
+    stdin_checkbox = ttk.Checkbutton(
+        add_server_frame,
+        text="Entrada interativa (stdin)",
+        variable=stdin_checkbox_var,
+    )
+    stdin_checkbox.grid(row=6, column=4, sticky="w", pady=10, padx=10)
+
     add_save_button = ttk.Button(add_server_frame, text="Adicionar Servidor")
-    add_save_button.grid(row=6, column=0, columnspan=3, pady=15)  # Aumentado pady
+    add_save_button.grid(row=7, column=0, columnspan=3, pady=15)  # Aumentado pady
 
     def on_command_type_selected(*args):
         selected_type_key = command_type_var.get()
@@ -658,22 +2106,40 @@ def main():
         if details.get("is_http", False):
             port_label.grid(row=4, column=0, sticky="w", pady=5, padx=10)
             port_entry.grid(row=4, column=1, sticky="ew", pady=5, padx=10)
+            replicas_frame.grid(row=4, column=2, sticky="w", pady=5, padx=10)
             server_port_var.set(
                 str(details.get("default_port", ""))
             )  # Define porta padrão
+            proxy_route_label.grid(row=5, column=0, sticky="w", pady=5, padx=10)
+            proxy_route_entry.grid(row=5, column=1, sticky="ew", pady=5, padx=10)
             autostart_checkbox.grid(
-                row=5, column=0, columnspan=3, sticky="w", pady=10, padx=10
+                row=6, column=0, sticky="w", pady=10, padx=10
             )  # Ajusta linha do checkbox
+            build_cache_checkbox.grid(row=6, column=1, sticky="w", pady=10, padx=10)
+            on_demand_checkbox.grid(row=6, column=2, sticky="w", pady=10, padx=10)
+            watch_checkbox.grid(row=6, column=3, sticky="w", pady=10, padx=10)
+            stdin_checkbox.grid(row=6, column=4, sticky="w", pady=10, padx=10)
             add_save_button.grid(
-                row=6, column=0, columnspan=3, pady=15
+                row=7, column=0, columnspan=3, pady=15
             )  # Ajusta linha do botão
         else:
             port_label.grid_forget()
             port_entry.grid_forget()
             server_port_var.set("")  # Limpa o valor da porta
+            replicas_frame.grid_forget()
+            replicas_var.set("1")
+            balancer_var.set("")
+            proxy_route_label.grid_forget()
+            proxy_route_entry.grid_forget()
+            proxy_route_var.set("")
             autostart_checkbox.grid(
-                row=4, column=0, columnspan=3, sticky="w", pady=10, padx=10
+                row=4, column=0, sticky="w", pady=10, padx=10
             )  # Ajusta linha do checkbox
+            build_cache_checkbox.grid(row=4, column=1, sticky="w", pady=10, padx=10)
+            on_demand_checkbox.grid_forget()  # Sem porta não há o que escutar
+            on_demand_checkbox_var.set(False)
+            watch_checkbox.grid(row=4, column=2, sticky="w", pady=10, padx=10)
+            stdin_checkbox.grid(row=4, column=3, sticky="w", pady=10, padx=10)
             add_save_button.grid(
                 row=5, column=0, columnspan=3, pady=15
             )  # Ajusta linha do botão
@@ -737,92 +2203,838 @@ def main():
                 ("Arquivos Go", "*.go"),
             ),
         )
-        if file_path:
-            prefix_to_use = (
-                prefix_or_func(file_path)
-                if callable(prefix_or_func)
-                else prefix_or_func
+        if file_path:
+            prefix_to_use = (
+                prefix_or_func(file_path)
+                if callable(prefix_or_func)
+                else prefix_or_func
+            )
+            final_path_arg = f'"{file_path}"' if " " in file_path else file_path
+            entry_widget.delete(0, tk.END)
+            entry_widget.insert(0, f"{prefix_to_use}{final_path_arg}".strip())
+
+    def browse_folder_for_command(entry_widget, prefix):
+        dir_path = filedialog.askdirectory(title="Selecionar Pasta Frontend")
+        if dir_path:
+            final_path_arg = f'"{dir_path}"' if " " in dir_path else dir_path
+            entry_widget.delete(0, tk.END)
+            entry_widget.insert(0, f"{prefix}{final_path_arg}".strip())
+
+    def browse_folder_or_file_for_simple_http(entry_widget, base_command):
+        """Permite selecionar uma pasta para o Python SimpleHTTPServer."""
+        dir_path = filedialog.askdirectory(title="Selecionar Pasta para Servir HTTP")
+        if dir_path:
+            entry_widget.delete(0, tk.END)
+            # O SimpleHTTPServer serve a pasta onde é executado, então o working_dir será a pasta selecionada
+            # O comando args aqui será apenas a porta
+            entry_widget.insert(
+                0, base_command
+            )  # O comando base é o que vai na entrada
+            server_working_dir_entry.delete(0, tk.END)
+            server_working_dir_entry.insert(0, dir_path)
+            messagebox.showinfo(
+                "Diretório de Trabalho Definido",
+                f"O diretório de trabalho foi definido como:\n{dir_path}\n"
+                "O comando de porta será adicionado automaticamente.",
+            )
+
+    servers_instances_widgets = {}  # Mapeia o id do servidor para o frame na GUI
+    schedule_labels = {}  # id do servidor -> (servidor, label da próxima ação agendada)
+
+    # --- Tab 2: Lista de Servidores (com Scroll) ---
+    servers_tab = ttk.Frame(notebook)
+    notebook.add(servers_tab, text="Servidores Atuais")  # Renomeado para maior clareza
+
+    # Barra de ações globais (acima da lista de servidores)
+    servers_toolbar = ttk.Frame(servers_tab)
+    servers_toolbar.pack(side="top", fill=tk.X, padx=10, pady=(10, 0))
+
+    # Canvas + Scrollbar para lista de servidores
+    server_canvas = tk.Canvas(servers_tab)
+    server_scrollbar = ttk.Scrollbar(
+        servers_tab, orient="vertical", command=server_canvas.yview
+    )
+    server_scrollable_frame = ttk.Frame(server_canvas)
+
+    server_scrollable_frame.bind(
+        "<Configure>",
+        lambda e: server_canvas.configure(scrollregion=server_canvas.bbox("all")),
+    )
+
+    server_canvas.create_window((0, 0), window=server_scrollable_frame, anchor="nw")
+    server_canvas.configure(yscrollcommand=server_scrollbar.set)
+
+    server_canvas.pack(
+        side="left", fill="both", expand=True, padx=10, pady=10
+    )  # Ajustado padding
+    server_scrollbar.pack(side="right", fill="y")
+
+    # --- Tab 3: Log Geral do Sistema ---
+    system_log_tab = ttk.Frame(notebook)
+    notebook.add(system_log_tab, text="Log do Sistema")
+
+    # Eventos ficam no EventStore (limitado, indexado e persistido em
+    # logs/serverflow.log); o widget só mostra os mais recentes, em lotes.
+    event_store = EventStore()
+    SYSTEM_LOG_MAX_LINES = 2000  # Linhas mantidas no widget
+    SYSTEM_LOG_BATCH_LIMIT = 500  # Eventos renderizados por ciclo
+    SYSTEM_LOG_REFRESH_MS = 250
+
+    system_log_filter_frame = ttk.Frame(system_log_tab)
+    system_log_filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+    ttk.Label(system_log_filter_frame, text="Servidor:").pack(side="left")
+    system_log_server_var = tk.StringVar(root, value="Todos")
+    system_log_server_combo = ttk.Combobox(
+        system_log_filter_frame,
+        textvariable=system_log_server_var,
+        values=["Todos"],
+        state="readonly",
+        width=30,
+    )
+    system_log_server_combo.pack(side="left", padx=(5, 15))
+
+    ttk.Label(system_log_filter_frame, text="Severidade mínima:").pack(side="left")
+    system_log_level_var = tk.StringVar(root, value="Todas")
+    system_log_level_combo = ttk.Combobox(
+        system_log_filter_frame,
+        textvariable=system_log_level_var,
+        values=["Todas", *LEVELS[1:]],
+        state="readonly",
+        width=10,
+    )
+    system_log_level_combo.pack(side="left", padx=5)
+
+    system_log = scrolledtext.ScrolledText(
+        system_log_tab, wrap=tk.WORD, height=25, state=tk.DISABLED  # Altura ajustada
+    )
+    system_log.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    system_log.tag_configure("ERROR", foreground="red")
+    system_log.tag_configure("WARNING", foreground="orange")
+    system_log.tag_configure("DEBUG", foreground="gray")
+
+    def current_system_log_filter():
+        server = system_log_server_var.get()
+        level = system_log_level_var.get()
+        return (
+            None if server == "Todos" else server,
+            None if level == "Todas" else level,
+        )
+
+    def render_system_log_events(events, replace=False, dropped=0):
+        """Insere um lote de eventos no widget, respeitando o limite de linhas."""
+        system_log.config(state=tk.NORMAL)
+        if replace:
+            system_log.delete(1.0, tk.END)
+        if dropped:
+            system_log.insert(
+                tk.END, f"... {dropped} eventos omitidos na exibição ...\n", "WARNING"
+            )
+        for event in events:
+            system_log.insert(tk.END, event.format() + "\n", event.level)
+        line_count = int(system_log.index("end-1c").split(".")[0])
+        if line_count > SYSTEM_LOG_MAX_LINES:
+            system_log.delete(1.0, f"{line_count - SYSTEM_LOG_MAX_LINES + 1}.0")
+        system_log.see(tk.END)
+        system_log.config(state=tk.DISABLED)
+
+    def refresh_system_log_filter(*args):
+        """Redesenha o log a partir dos índices do EventStore."""
+        server, level = current_system_log_filter()
+        event_store.drain_pending()  # Já incluídos na consulta abaixo
+        render_system_log_events(
+            event_store.query(server, level, limit=SYSTEM_LOG_MAX_LINES), replace=True
+        )
+
+    def flush_system_log():
+        """Renderiza em lote os eventos novos desde o último ciclo."""
+        events, dropped = event_store.drain_pending()
+        if events or dropped:
+            server, level = current_system_log_filter()
+            visible = [e for e in events if event_store.matches(e, server, level)]
+            if len(visible) > SYSTEM_LOG_BATCH_LIMIT:
+                dropped += len(visible) - SYSTEM_LOG_BATCH_LIMIT
+                visible = visible[-SYSTEM_LOG_BATCH_LIMIT:]
+            if visible or dropped:
+                render_system_log_events(visible, dropped=dropped)
+            known_servers = ["Todos", *event_store.servers()]
+            if list(system_log_server_combo["values"]) != known_servers:
+                system_log_server_combo["values"] = known_servers
+        root.after(SYSTEM_LOG_REFRESH_MS, flush_system_log)
+
+    system_log_server_combo.bind("<<ComboboxSelected>>", refresh_system_log_filter)
+    system_log_level_combo.bind("<<ComboboxSelected>>", refresh_system_log_filter)
+    root.after(SYSTEM_LOG_REFRESH_MS, flush_system_log)
+
+    def log_system_message(message, level="INFO"):
+        """Registra no log do sistema um evento que não pertence a um servidor."""
+        event_store.add(None, level, message)
+
+    # --- Tab 4: Histórico de execuções ---
+    history_tab = ttk.Frame(notebook)
+    notebook.add(history_tab, text="Histórico")
+
+    try:
+        run_history.start()
+    except (sqlite3.Error, OSError) as e:
+        log_system_message(f"Histórico de execuções indisponível: {e}\n", "ERROR")
+
+    HISTORY_PERIODS = {"24 horas": 1, "7 dias": 7, "30 dias": 30, "Tudo": None}
+    HISTORY_MAX_RUNS = 200  # Execuções listadas
+
+    history_filter_frame = ttk.Frame(history_tab)
+    history_filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+    ttk.Label(history_filter_frame, text="Servidor:").pack(side="left")
+    history_server_var = tk.StringVar(root, value="Todos")
+    history_server_combo = ttk.Combobox(
+        history_filter_frame,
+        textvariable=history_server_var,
+        values=["Todos"],
+        state="readonly",
+        width=30,
+    )
+    history_server_combo.pack(side="left", padx=(5, 15))
+
+    ttk.Label(history_filter_frame, text="Período:").pack(side="left")
+    history_period_var = tk.StringVar(root, value="7 dias")
+    history_period_combo = ttk.Combobox(
+        history_filter_frame,
+        textvariable=history_period_var,
+        values=list(HISTORY_PERIODS),
+        state="readonly",
+        width=10,
+    )
+    history_period_combo.pack(side="left", padx=5)
+
+    history_text = scrolledtext.ScrolledText(
+        history_tab, wrap=tk.NONE, height=25, font=("Consolas", 10)
+    )
+    history_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def format_seconds(value):
+        return "-" if value is None else f"{value:.2f} s"
+
+    def format_rss(value):
+        return "-" if not value else f"{value / (1024 * 1024):.1f} MB"
+
+    def format_clock(timestamp):
+        return time.strftime("%d/%m %H:%M:%S", time.localtime(timestamp))
+
+    SPARK_CHARS = "▁▂▃▄▅▆▇█"
+    SPARK_WIDTH = 60
+    SERIES_LABELS = {
+        "cpu_percent": "CPU %",
+        "rss_mb": "Memória MB",
+        "lines_per_second": "Linhas/s",
+        "latency_ms": "Latência ms",
+    }
+    SERIES_MAX_SPAN = 8 * 7 * 86400  # Alcance do nível mais grosso das séries
+
+    def sparkline(values):
+        present = [value for value in values if value == value]  # Sem NaN
+        if not present:
+            return " " * len(values), None
+        low, high = min(present), max(present)
+        scale = (len(SPARK_CHARS) - 1) / (high - low) if high > low else 0
+        chars = "".join(
+            SPARK_CHARS[int((value - low) * scale)] if value == value else " "
+            for value in values
+        )
+        return chars, (low, high, present[-1])
+
+    def trend_lines(server, since):
+        """Mini-gráficos das séries temporais do servidor no período."""
+        now = time.time()
+        start = max(since or 0, now - SERIES_MAX_SPAN)
+        lines = []
+        for metric in SERIES_METRICS:
+            series = metrics_store.query(server, metric, start, now)
+            if series is None:
+                return ["(sem séries temporais para este servidor)"]
+            _, resolution, values = series
+            chars, stats = sparkline(resample(values, SPARK_WIDTH))
+            summary = (
+                f"mín {stats[0]:.1f}  máx {stats[1]:.1f}  último {stats[2]:.1f}"
+                if stats
+                else "sem amostras"
+            )
+            lines.append(f"  {SERIES_LABELS[metric]:<13}{chars}  {summary}")
+        span = (now - start) / SPARK_WIDTH
+        if span >= 3600:
+            column = f"{span / 3600:.0f} h"
+        elif span >= 60:
+            column = f"{span / 60:.0f} min"
+        else:
+            column = f"{span:.0f} s"
+        return [
+            f"Tendência (cada coluna ~{column}, resolução {resolution} s):",
+            *lines,
+        ]
+
+    def refresh_history(*args):
+        """Consulta o histórico com os filtros atuais e redesenha a aba."""
+        server = history_server_var.get()
+        server = None if server == "Todos" else server
+        since = period_start(HISTORY_PERIODS.get(history_period_var.get()))
+        t0 = time.perf_counter()
+        try:
+            summary = run_history.summary(server, since)
+            trend = run_history.ready_trend(server, since) if server else []
+            runs = run_history.recent(server, since, limit=HISTORY_MAX_RUNS)
+            servers = run_history.servers()
+        except sqlite3.Error as e:
+            log_system_message(f"Erro ao consultar o histórico: {e}\n", "ERROR")
+            return
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        lines = [
+            f"{'Servidor':<24}{'Execuções':>10}{'Quedas':>8}{'Pronto p50':>12}"
+            f"{'Pronto p95':>12}{'Pico RSS':>12}  Último início"
+        ]
+        for row in summary:
+            lines.append(
+                f"{row['server']:<24}{row['runs']:>10}{row['crashes'] or 0:>8}"
+                f"{format_seconds(row['median_ready_seconds']):>12}"
+                f"{format_seconds(row['p95_ready_seconds']):>12}"
+                f"{format_rss(row['peak_rss_bytes']):>12}  "
+                f"{format_clock(row['last_started_at'])}"
+            )
+        if not summary:
+            lines.append("(nenhuma execução no período)")
+        if trend:
+            lines += ["", "Tempo até pronto (mediana por dia):"]
+            for day, median, count in trend:
+                lines.append(f"  {day}  {median:>8.2f} s  ({count} execuções)")
+        lines += [
+            "",
+            f"{'Início':<16}{'Servidor':<24}{'Duração':>10}{'Pronto':>10}"
+            f"{'Código':>8}  {'Motivo':<10}{'Reinícios':>10}{'Pico RSS':>11}"
+            f"{'Linhas out/err':>16}",
+        ]
+        for run in runs:
+            duration = (
+                run["stopped_at"] - run["started_at"] if run["stopped_at"] else None
+            )
+            exit_code = "-" if run["exit_code"] is None else run["exit_code"]
+            lines.append(
+                f"{format_clock(run['started_at']):<16}{run['server']:<24}"
+                f"{format_seconds(duration):>10}"
+                f"{format_seconds(run['ready_seconds']):>10}{exit_code:>8}  "
+                f"{run['stop_reason'] or '-':<10}{run['restarts']:>10}"
+                f"{format_rss(run['peak_rss_bytes']):>11}"
+                f"{run['stdout_lines']:>10}/{run['stderr_lines']:<5}"
+            )
+        if server:
+            lines += ["", *trend_lines(server, since)]
+        lines += ["", f"Consulta em {elapsed_ms:.1f} ms."]
+
+        history_text.config(state=tk.NORMAL)
+        history_text.delete(1.0, tk.END)
+        history_text.insert(tk.END, "\n".join(lines))
+        history_text.config(state=tk.DISABLED)
+        known_servers = ["Todos", *servers]
+        if list(history_server_combo["values"]) != known_servers:
+            history_server_combo["values"] = known_servers
+
+    def on_notebook_tab_changed(event):
+        if notebook.select() == str(history_tab):
+            refresh_history()
+
+    ttk.Button(history_filter_frame, text="Atualizar", command=refresh_history).pack(
+        side="right"
+    )
+    history_server_combo.bind("<<ComboboxSelected>>", refresh_history)
+    history_period_combo.bind("<<ComboboxSelected>>", refresh_history)
+    notebook.bind("<<NotebookTabChanged>>", on_notebook_tab_changed, add="+")
+
+    # --- Tab 5: Diagnóstico do próprio ServerFlow ---
+    diagnostics_tab = ttk.Frame(notebook)
+    notebook.add(diagnostics_tab, text="Diagnóstico")
+    DIAGNOSTICS_REFRESH_MS = 1000
+
+    diagnostics_toolbar = ttk.Frame(diagnostics_tab)
+    diagnostics_toolbar.pack(fill=tk.X, padx=10, pady=(10, 0))
+    profile_mode_var = tk.StringVar(root, value=PROFILE_MODES[0])
+    ttk.Label(diagnostics_toolbar, text="Perfil:").pack(side="left")
+    ttk.Combobox(
+        diagnostics_toolbar,
+        textvariable=profile_mode_var,
+        values=PROFILE_MODES,
+        state="readonly",
+        width=12,
+    ).pack(side="left", padx=(5, 5))
+    profile_session = {"current": None}
+
+    diagnostics_text = scrolledtext.ScrolledText(
+        diagnostics_tab, wrap=tk.NONE, font=("Consolas", 10)
+    )
+    diagnostics_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def toggle_profile():
+        """Inicia ou encerra o perfil do app (na thread principal)."""
+        session = profile_session["current"]
+        if session is None:
+            profile_session["current"] = ProfileSession(profile_mode_var.get()).start()
+            profile_button.config(text="Parar Perfil")
+            log_system_message(f"Perfil ({profile_mode_var.get()}) iniciado.\n")
+            return
+        profile_session["current"] = None
+        profile_button.config(text="Iniciar Perfil")
+        try:
+            diagnostics.last_profile = session.stop()
+        except OSError as e:
+            log_system_message(f"Erro ao gravar o perfil: {e}\n", "ERROR")
+            return
+        log_system_message(
+            f"Perfil gravado em {diagnostics.last_profile['path']} "
+            f"({diagnostics.last_profile['duration_seconds']:.1f} s).\n"
+        )
+        refresh_diagnostics()
+
+    def export_diagnostics():
+        try:
+            path = diagnostics.export()
+        except OSError as e:
+            messagebox.showerror("Diagnóstico", f"Não foi possível exportar: {e}")
+            return
+        log_system_message(f"Diagnóstico exportado para {path}.\n")
+
+    profile_button = ttk.Button(
+        diagnostics_toolbar, text="Iniciar Perfil", command=toggle_profile
+    )
+    profile_button.pack(side="left")
+    ttk.Button(
+        diagnostics_toolbar, text="Exportar JSON", command=export_diagnostics
+    ).pack(side="right")
+
+    def refresh_diagnostics():
+        """Redesenha a aba (só quando visível, para não se medir à toa)."""
+        if notebook.select() != str(diagnostics_tab):
+            return
+        snapshot = diagnostics.snapshot()
+        loop = snapshot["loop"]
+        lag = loop["lag_ms"]
+
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        lines = [
+            f"Atraso do loop principal (batimento a cada {loop['heartbeat_ms']} ms, "
+            f"{loop['samples']} amostras): p50 {ms(lag['p50'])} ms | "
+            f"p95 {ms(lag['p95'])} ms | p99 {ms(lag['p99'])} ms | "
+            f"máx {ms(lag['max'])} ms | travamentos >= {loop['stall_ms']} ms: "
+            f"{loop['stalls_total']}",
+            "",
+            f"{'Handler':<48}{'Execuções':>10}{'Total ms':>11}{'Média ms':>10}"
+            f"{'Máx ms':>9}",
+        ]
+        handlers = sorted(
+            snapshot["handlers"].items(), key=lambda item: -item[1]["total_ms"]
+        )
+        for name, stats in handlers[:40]:
+            lines.append(
+                f"{name[:47]:<48}{stats['count']:>10}{stats['total_ms']:>11.1f}"
+                f"{stats['mean_ms']:>10.2f}{stats['max_ms']:>9.1f}"
             )
-            final_path_arg = f'"{file_path}"' if " " in file_path else file_path
-            entry_widget.delete(0, tk.END)
-            entry_widget.insert(0, f"{prefix_to_use}{final_path_arg}".strip())
+        lines += [
+            "",
+            f"{'Callbacks after() por origem':<48}{'Agendados':>10}"
+            f"{'Executados':>11}{'Pendentes':>10}",
+        ]
+        after = sorted(
+            snapshot["after"].items(), key=lambda item: -item[1]["scheduled"]
+        )
+        for source, counts in after[:40]:
+            lines.append(
+                f"{source[:47]:<48}{counts['scheduled']:>10}"
+                f"{counts['executed']:>11}{counts['pending']:>10}"
+            )
+        profile = snapshot["profile"]
+        if profile:
+            lines += [
+                "",
+                f"Último perfil ({profile['mode']}, {profile['duration_seconds']} s): "
+                f"{profile['path']}",
+                profile["top"],
+            ]
+        diagnostics_text.config(state=tk.NORMAL)
+        diagnostics_text.delete(1.0, tk.END)
+        diagnostics_text.insert(tk.END, "\n".join(lines))
+        diagnostics_text.config(state=tk.DISABLED)
+
+    def diagnostics_tick():
+        refresh_diagnostics()
+        root.after(DIAGNOSTICS_REFRESH_MS, diagnostics_tick)
+
+    root.after(DIAGNOSTICS_REFRESH_MS, diagnostics_tick)
+
+    # --- Tab 6: Nós remotos (agentes rodando em outras máquinas) ---
+    remote_tab = ttk.Frame(notebook)
+    notebook.add(remote_tab, text="Nós Remotos")
+    REMOTE_POLL_MS = 200
+    REMOTE_BATCH = 500  # Mensagens aplicadas por ciclo, para não travar a GUI
+    REMOTE_OUTPUT_LINES = 1000  # Linhas mantidas no painel de saída
+
+    remote_events = queue.SimpleQueue()  # Compartilhada por todos os clientes
+    remote_clients = {}  # "host:porta" -> AgentClient
+    remote_state = RemoteState()
+    remote_choices = {}  # Rótulo do combobox -> (nó, servidor)
+    remote_selected = {"key": None}
+
+    remote_toolbar = ttk.Frame(remote_tab)
+    remote_toolbar.pack(fill=tk.X, padx=10, pady=(10, 0))
+    ttk.Label(remote_toolbar, text="Agente (host:porta):").pack(side="left")
+    remote_address_var = tk.StringVar(root)
+    ttk.Entry(remote_toolbar, textvariable=remote_address_var, width=28).pack(
+        side="left", padx=5
+    )
+    ttk.Label(remote_toolbar, text="Token:").pack(side="left")
+    remote_token_var = tk.StringVar(root)
+    ttk.Entry(remote_toolbar, textvariable=remote_token_var, width=16, show="*").pack(
+        side="left", padx=5
+    )
 
-    def browse_folder_for_command(entry_widget, prefix):
-        dir_path = filedialog.askdirectory(title="Selecionar Pasta Frontend")
-        if dir_path:
-            final_path_arg = f'"{dir_path}"' if " " in dir_path else dir_path
-            entry_widget.delete(0, tk.END)
-            entry_widget.insert(0, f"{prefix}{final_path_arg}".strip())
+    remote_actions = ttk.Frame(remote_tab)
+    remote_actions.pack(fill=tk.X, padx=10, pady=(5, 0))
+    ttk.Label(remote_actions, text="Servidor:").pack(side="left")
+    remote_server_var = tk.StringVar(root)
+    remote_server_combo = ttk.Combobox(
+        remote_actions, textvariable=remote_server_var, state="readonly", width=45
+    )
+    remote_server_combo.pack(side="left", padx=5)
 
-    def browse_folder_or_file_for_simple_http(entry_widget, base_command):
-        """Permite selecionar uma pasta para o Python SimpleHTTPServer."""
-        dir_path = filedialog.askdirectory(title="Selecionar Pasta para Servir HTTP")
-        if dir_path:
-            entry_widget.delete(0, tk.END)
-            # O SimpleHTTPServer serve a pasta onde é executado, então o working_dir será a pasta selecionada
-            # O comando args aqui será apenas a porta
-            entry_widget.insert(
-                0, base_command
-            )  # O comando base é o que vai na entrada
-            server_working_dir_entry.delete(0, tk.END)
-            server_working_dir_entry.insert(0, dir_path)
-            messagebox.showinfo(
-                "Diretório de Trabalho Definido",
-                f"O diretório de trabalho foi definido como:\n{dir_path}\n"
-                "O comando de porta será adicionado automaticamente.",
-            )
+    remote_table = scrolledtext.ScrolledText(
+        remote_tab, wrap=tk.NONE, height=15, font=("Consolas", 10)
+    )
+    remote_table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+    remote_output = scrolledtext.ScrolledText(
+        remote_tab, wrap=tk.NONE, height=12, font=("Consolas", 10)
+    )
+    remote_output.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
-    servers_instances = []  # List to keep track of Server objects
-    servers_instances_widgets = (
-        {}
-    )  # Mapeia nome do servidor para o frame do widget na GUI
+    def save_remote_nodes():
+        nodes = [
+            {"address": node, "token": client.token}
+            for node, client in remote_clients.items()
+        ]
+        try:
+            save_nodes(nodes)
+        except OSError as e:
+            log_system_message(f"Erro ao salvar os nós remotos: {e}\n", "ERROR")
 
-    # --- Tab 2: Lista de Servidores (com Scroll) ---
-    servers_tab = ttk.Frame(notebook)
-    notebook.add(servers_tab, text="Servidores Atuais")  # Renomeado para maior clareza
+    def connect_remote_node(address, token):
+        try:
+            host, port = parse_address(address)
+        except ValueError:
+            messagebox.showerror("Nós Remotos", f"Endereço inválido: '{address}'")
+            return False
+        node = f"{host}:{port}"
+        if node in remote_clients:
+            return False
+        client = remote_clients[node] = AgentClient(host, port, remote_events, token)
+        remote_state.add_node(node)
+        client.start()
+        return True
 
-    # Canvas + Scrollbar para lista de servidores
-    server_canvas = tk.Canvas(servers_tab)
-    server_scrollbar = ttk.Scrollbar(
-        servers_tab, orient="vertical", command=server_canvas.yview
+    def on_remote_connect():
+        if connect_remote_node(remote_address_var.get(), remote_token_var.get()):
+            save_remote_nodes()
+            log_system_message(f"Conectando ao agente {remote_address_var.get()}.\n")
+
+    def on_remote_disconnect():
+        try:
+            host, port = parse_address(remote_address_var.get())
+        except ValueError:
+            return
+        client = remote_clients.pop(f"{host}:{port}", None)
+        if client is None:
+            return
+        client.stop()
+        remote_state.forget_node(client.node)
+        save_remote_nodes()
+        log_system_message(f"Agente {client.node} desconectado.\n")
+
+    def remote_request(op):
+        key = remote_choices.get(remote_server_var.get())
+        if key is None:
+            return
+        node, name = key
+        client = remote_clients.get(node)
+        if client is None or client.request(op, server=name) is None:
+            log_system_message(f"Nó {node} está desconectado.\n", "WARNING")
+
+    def render_remote_table():
+        lines = [
+            f"{'Nó':<24}{'Servidor':<28}{'Estado':<12}{'PID':>8}{'Porta':>7}  Status"
+        ]
+        servers_by_node = collections.defaultdict(list)
+        for (node, name), status in remote_state.servers.items():
+            servers_by_node[node].append(status)
+        for node in sorted(remote_state.nodes):
+            info = remote_state.nodes[node]
+            if not info["connected"]:
+                error = f": {info['error']}" if info["error"] else ""
+                lines.append(f"{node:<24}(desconectado{error})")
+                continue
+            for status in sorted(servers_by_node[node], key=lambda s: s["name"]):
+                lines.append(
+                    f"{node[:23]:<24}{status['name'][:27]:<28}"
+                    f"{status['state']:<12}{status['pid'] or '-':>8}"
+                    f"{status['port'] or '-':>7}  {status['status']}"
+                )
+        remote_table.config(state=tk.NORMAL)
+        remote_table.delete(1.0, tk.END)
+        remote_table.insert(tk.END, "\n".join(lines))
+        remote_table.config(state=tk.DISABLED)
+        # Reconstrói as opções só quando o conjunto de servidores muda
+        labels = {
+            f"{node} / {name}": (node, name) for node, name in remote_state.servers
+        }
+        if labels.keys() != remote_choices.keys():
+            remote_choices.clear()
+            remote_choices.update(labels)
+            remote_server_combo["values"] = sorted(labels)
+
+    def show_remote_output(lines=None):
+        """Acrescenta `lines` ao painel (ou redesenha tudo, se None)."""
+        remote_output.config(state=tk.NORMAL)
+        if lines is None:
+            remote_output.delete(1.0, tk.END)
+            lines = remote_state.output.get(remote_selected["key"], ())
+        remote_output.insert(tk.END, "".join(lines))
+        excess = int(remote_output.index("end-1c").split(".")[0]) - REMOTE_OUTPUT_LINES
+        if excess > 0:
+            remote_output.delete(1.0, f"{excess + 1}.0")
+        remote_output.see(tk.END)
+        remote_output.config(state=tk.DISABLED)
+
+    def on_remote_server_selected(event=None):
+        key = remote_choices.get(remote_server_var.get())
+        remote_selected["key"] = key
+        show_remote_output()
+        if key is not None and not remote_state.output.get(key):
+            client = remote_clients.get(key[0])
+            if client is not None:
+                client.request("tail", server=key[1])
+
+    def drain_remote_events():
+        """Aplica em lote as mensagens de todos os agentes (thread principal)."""
+        selected = remote_selected["key"]
+        selected_lines = []
+        redraw_output = False
+        more = True
+        for _ in range(REMOTE_BATCH):
+            try:
+                node, message = remote_events.get_nowait()
+            except queue.Empty:
+                more = False
+                break
+            new_lines = remote_state.apply(node, message)
+            if selected in new_lines:
+                if new_lines[selected] is None:
+                    redraw_output = True
+                else:
+                    selected_lines.extend(new_lines[selected])
+        for error in remote_state.pop_errors():
+            log_system_message(f"{error}\n", "WARNING")
+        if remote_state.dirty:
+            remote_state.dirty = False
+            render_remote_table()
+        if redraw_output:
+            show_remote_output()
+        elif selected_lines:
+            show_remote_output(selected_lines)
+        # Com mensagens sobrando, continua logo após processar os eventos do Tk
+        root.after(0 if more else REMOTE_POLL_MS, drain_remote_events)
+
+    ttk.Button(remote_toolbar, text="Conectar", command=on_remote_connect).pack(
+        side="left", padx=(10, 5)
+    )
+    ttk.Button(remote_toolbar, text="Desconectar", command=on_remote_disconnect).pack(
+        side="left"
+    )
+    for label, op in (
+        ("Iniciar", "start"),
+        ("Parar", "stop"),
+        ("Reiniciar", "restart"),
+    ):
+        ttk.Button(
+            remote_actions, text=label, command=lambda op=op: remote_request(op)
+        ).pack(side="left", padx=(5, 0))
+    remote_server_combo.bind("<<ComboboxSelected>>", on_remote_server_selected)
+
+    for entry in load_nodes():
+        connect_remote_node(entry["address"], entry.get("token", ""))
+    root.after(REMOTE_POLL_MS, drain_remote_events)
+
+    # --- Métricas: amostragem de supervisão e endpoint Prometheus opcional ---
+    metrics_sampler = MetricsSampler(
+        lambda: with_replicas(server_registry.all()),
+        store=metrics_store,
+        on_sample=Server.check_sockets,
+    )
+    metrics_exporter = MetricsExporter(
+        lambda: with_replicas(server_registry.all()),
+        port=int(os.environ.get("SERVERFLOW_METRICS_PORT", DEFAULT_METRICS_PORT)),
+    )
+    metrics_enabled_var = tk.BooleanVar(
+        root, value=bool(os.environ.get("SERVERFLOW_METRICS_PORT"))
     )
-    server_scrollable_frame = ttk.Frame(server_canvas)
 
-    server_scrollable_frame.bind(
-        "<Configure>",
-        lambda e: server_canvas.configure(scrollregion=server_canvas.bbox("all")),
+    def toggle_metrics_exporter():
+        """Liga ou desliga o endpoint /metrics conforme o checkbox."""
+        if metrics_enabled_var.get():
+            try:
+                metrics_exporter.start()
+                log_system_message(
+                    f"Métricas disponíveis em http://{metrics_exporter.host}:"
+                    f"{metrics_exporter.port}/metrics\n"
+                )
+            except OSError as e:
+                metrics_enabled_var.set(False)
+                log_system_message(
+                    f"Erro ao iniciar endpoint de métricas: {e}\n", "ERROR"
+                )
+        else:
+            metrics_exporter.stop()
+            log_system_message("Endpoint de métricas desligado.\n")
+        update_metrics_sampler()
+
+    def update_metrics_sampler():
+        """A amostragem (probes de porta, /proc) só roda quando alguém usa o
+        resultado: o endpoint /metrics ligado ou algum servidor em execução
+        (séries dos gráficos e avisos de sockets)."""
+        if metrics_enabled_var.get() or server_registry.running():
+            metrics_sampler.start()
+        else:
+            metrics_sampler.stop()
+
+    def on_sampler_registry_event(event, server_obj, info):
+        if event in (STATE, REMOVED):
+            root.after(0, update_metrics_sampler)
+
+    server_registry.subscribe(on_sampler_registry_event)
+
+    ttk.Checkbutton(
+        servers_toolbar,
+        text=f"Exportar Métricas (:{metrics_exporter.port})",
+        variable=metrics_enabled_var,
+        command=toggle_metrics_exporter,
+    ).pack(side="right")
+    if metrics_enabled_var.get():
+        toggle_metrics_exporter()
+    update_metrics_sampler()  # Servidores readotados já estão em execução
+
+    # --- Proxy reverso: uma porta para a stack inteira, roteada por servidor ---
+    proxy_routes = {"table": None}  # Reconstruída sob demanda após mudanças
+
+    def current_proxy_routes():
+        table = proxy_routes["table"]
+        if table is None:
+            table = proxy_routes["table"] = RouteTable(server_registry.all())
+        return table
+
+    def invalidate_proxy_routes(event, server_obj, info):
+        if event != STATE:
+            proxy_routes["table"] = None
+
+    server_registry.subscribe(invalidate_proxy_routes)
+    reverse_proxy = ReverseProxy(
+        current_proxy_routes,
+        port=int(os.environ.get("SERVERFLOW_PROXY_PORT", DEFAULT_PROXY_PORT)),
+    )
+    front_proxy = reverse_proxy  # Reinícios trocam a rota sem derrubar clientes
+    proxy_enabled_var = tk.BooleanVar(
+        root, value=bool(os.environ.get("SERVERFLOW_PROXY_PORT"))
     )
 
-    server_canvas.create_window((0, 0), window=server_scrollable_frame, anchor="nw")
-    server_canvas.configure(yscrollcommand=server_scrollbar.set)
+    def toggle_reverse_proxy():
+        """Liga ou desliga o proxy reverso conforme o checkbox."""
+        if proxy_enabled_var.get():
+            try:
+                reverse_proxy.start()
+                routes = ", ".join(
+                    f"{route.pattern} -> {route.name}"
+                    for route in current_proxy_routes().routes()
+                )
+                log_system_message(
+                    f"Proxy reverso em http://{reverse_proxy.host}:{reverse_proxy.port} "
+                    f"({routes or 'nenhuma rota configurada'})\n"
+                )
+            except OSError as e:
+                proxy_enabled_var.set(False)
+                log_system_message(f"Erro ao iniciar o proxy reverso: {e}\n", "ERROR")
+        else:
+            reverse_proxy.stop()
+            log_system_message("Proxy reverso desligado.\n")
+
+    def show_proxy_stats():
+        """Janela com latência e vazão por rota, atualizada a cada segundo."""
+        window = tk.Toplevel(root)
+        window.title("Proxy Reverso - Rotas")
+        window.geometry("760x320")
+        stats_text = scrolledtext.ScrolledText(
+            window, wrap=tk.NONE, font=("Consolas", 10)
+        )
+        stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-    server_canvas.pack(
-        side="left", fill="both", expand=True, padx=10, pady=10
-    )  # Ajustado padding
-    server_scrollbar.pack(side="right", fill="y")
+        def refresh():
+            if not window.winfo_exists():
+                return
+            snapshot = reverse_proxy.snapshot()
+            lines = [
+                f"{'Rota':<18}{'Servidor':<22}{'Req':>8}{'Erros':>7}{'req/s':>8}"
+                f"{'KB/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'Reuso':>7}"
+            ]
+            for route in current_proxy_routes().routes():
+                s = snapshot.get(route.name)
+                if s is None:
+                    lines.append(f"{route.pattern:<18}{route.name:<22}{'-':>8}")
+                    continue
+                lines.append(
+                    f"{route.pattern:<18}{route.name:<22}{s['requests_total']:>8}"
+                    f"{s['errors_total']:>7}{s['requests_per_second']:>8.1f}"
+                    f"{s['bytes_per_second'] / 1024:>9.1f}{s['p50_ms']:>8.2f}"
+                    f"{s['p95_ms']:>8.2f}{s['p99_ms']:>8.2f}"
+                    f"{s['reuse_ratio'] * 100:>6.0f}%"
+                )
+            lines.append("")
+            lines.append(
+                f"Conexões ociosas no pool: {reverse_proxy.pool.idle_count()} | "
+                f"proxy {'ligado' if reverse_proxy.running else 'desligado'}"
+            )
+            stats_text.config(state=tk.NORMAL)
+            stats_text.delete(1.0, tk.END)
+            stats_text.insert(tk.END, "\n".join(lines))
+            stats_text.config(state=tk.DISABLED)
+            window.after(1000, refresh)
 
-    # --- Tab 3: Log Geral do Sistema ---
-    system_log_tab = ttk.Frame(notebook)
-    notebook.add(system_log_tab, text="Log do Sistema")
+        refresh()
 
-    system_log = scrolledtext.ScrolledText(
-        system_log_tab, wrap=tk.WORD, height=25, state=tk.DISABLED  # Altura ajustada
+    ttk.Button(servers_toolbar, text="Rotas", command=show_proxy_stats).pack(
+        side="right", padx=(5, 0)
     )
-    system_log.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-    system_log.insert(tk.END, "Logs do Sistema:\n")
+    ttk.Checkbutton(
+        servers_toolbar,
+        text=f"Proxy Reverso (:{reverse_proxy.port})",
+        variable=proxy_enabled_var,
+        command=toggle_reverse_proxy,
+    ).pack(side="right", padx=(10, 0))
+    if proxy_enabled_var.get():
+        toggle_reverse_proxy()
 
     def add_server_widget_to_gui(server_obj, scrollable_frame, canvas_widget):
         """Adiciona widgets do servidor à GUI."""
         # Se o servidor já tem um widget, remova-o antes de recriar
-        if server_obj.name in servers_instances_widgets:
-            servers_instances_widgets[server_obj.name].destroy()
-            del servers_instances_widgets[server_obj.name]
+        if server_obj.id in servers_instances_widgets:
+            servers_instances_widgets.pop(server_obj.id).destroy()
 
         server_frame = ttk.LabelFrame(
             scrollable_frame, text=f"Servidor: {server_obj.name}", padding=10
         )
         server_frame.pack(fill=tk.X, pady=5, padx=5)
-        servers_instances_widgets[server_obj.name] = (
+        servers_instances_widgets[server_obj.id] = (
             server_frame  # Armazena o frame do widget
         )
 
@@ -850,7 +3062,7 @@ def main():
             buttons_frame,
             text="Iniciar",
             command=lambda s=server_obj: threading.Thread(
-                target=s.start, daemon=True
+                target=start_checked, args=([s],), daemon=True
             ).start(),
         )
         start_button.grid(row=0, column=col_idx, padx=3, pady=2)
@@ -866,6 +3078,16 @@ def main():
         stop_button.grid(row=0, column=col_idx, padx=3, pady=2)
         col_idx += 1
 
+        restart_button = ttk.Button(
+            buttons_frame,
+            text="Reiniciar",
+            command=lambda s=server_obj: threading.Thread(
+                target=restart_server, args=(s,), daemon=True
+            ).start(),
+        )
+        restart_button.grid(row=0, column=col_idx, padx=3, pady=2)
+        col_idx += 1
+
         edit_button = ttk.Button(
             buttons_frame,
             text="Editar",
@@ -899,6 +3121,14 @@ def main():
         view_log_button.grid(row=0, column=col_idx, padx=3, pady=2)
         col_idx += 1
 
+        summary_button = ttk.Button(
+            buttons_frame,
+            text="Resumo",
+            command=lambda s=server_obj: show_log_summary(s),
+        )
+        summary_button.grid(row=0, column=col_idx, padx=3, pady=2)
+        col_idx += 1
+
         # O botão "Abrir no Navegador" só aparece se houver uma porta esperada
         if server_obj.expected_port:
             open_browser_button = ttk.Button(
@@ -909,10 +3139,26 @@ def main():
             open_browser_button.grid(row=0, column=col_idx, padx=3, pady=2)
             col_idx += 1  # Incrementa para futuras expansões
 
+            load_test_button = ttk.Button(
+                buttons_frame,
+                text="Teste de Carga",
+                command=lambda s=server_obj: load_test_action(s),
+            )
+            load_test_button.grid(row=0, column=col_idx, padx=3, pady=2)
+            col_idx += 1
+
         # Label de Status
-        status_label = ttk.Label(top_row_frame, text="Parado", style="Gray.TLabel")
+        status_label = ttk.Label(
+            top_row_frame, text=server_obj.status_text, style=server_obj.status_style
+        )
         status_label.grid(row=0, column=1, sticky="e", padx=5)  # À direita dos botões
         server_obj.status_label_widget = status_label
+        schedule_labels.pop(server_obj.id, None)
+        if server_obj.schedule:
+            schedule_label = ttk.Label(top_row_frame, text="", style="Gray.TLabel")
+            schedule_label.grid(row=1, column=0, columnspan=2, sticky="w", padx=5)
+            schedule_labels[server_obj.id] = (server_obj, schedule_label)
+            update_schedule_label(server_obj)
 
         server_output_text = scrolledtext.ScrolledText(
             server_frame, wrap=tk.WORD, height=5, state=tk.DISABLED
@@ -920,65 +3166,231 @@ def main():
         # Usando grid para a área de saída para consistência
         server_output_text.grid(row=1, column=0, sticky="nsew", pady=5, padx=5)
         server_obj.output_label = server_output_text
+        if not server_obj.output_buffer and not server_registry.is_active(server_obj):
+            server_obj.show_log_tail()  # Histórico da última execução
+        if server_obj.output_buffer:
+            server_obj._update_output_label()
+
+        # Entrada padrão e sinais (recarregar configuração, despejar perfil...)
+        if server_obj.stdin or os.name == "posix":
+            console_frame = ttk.Frame(server_frame)
+            console_frame.grid(row=2, column=0, sticky="ew", pady=(0, 5), padx=5)
+        if server_obj.stdin:
+            input_var = tk.StringVar(root)
+            input_entry = ttk.Entry(console_frame, textvariable=input_var, width=50)
+            input_entry.pack(side="left", fill=tk.X, expand=True)
+
+            def send_input(event=None, s=server_obj, var=input_var):
+                if s.send_input(var.get() + "\n"):
+                    var.set("")
+
+            input_entry.bind("<Return>", send_input)
+            ttk.Button(console_frame, text="Enviar", command=send_input).pack(
+                side="left", padx=(5, 10)
+            )
+        if os.name == "posix":
+            signal_var = tk.StringVar(root, value=SIGNAL_CHOICES[0])
+            ttk.Combobox(
+                console_frame,
+                textvariable=signal_var,
+                values=SIGNAL_CHOICES,
+                width=9,
+            ).pack(side="right")
+
+            def send_signal(s=server_obj, var=signal_var):
+                try:
+                    s.send_signal(var.get())
+                except ValueError as e:
+                    messagebox.showerror("Sinal", str(e))
+
+            ttk.Button(console_frame, text="Enviar Sinal", command=send_signal).pack(
+                side="right", padx=(0, 5)
+            )
+
+    def show_log_summary(server_obj):
+        """Janela com os modelos de linha mais frequentes e os surgidos há pouco,
+        atualizada a cada segundo."""
+        window = tk.Toplevel(root)
+        window.title(f"Resumo da Saída: {server_obj.name}")
+        window.geometry("900x480")
+        summary_text = scrolledtext.ScrolledText(
+            window, wrap=tk.NONE, font=("Consolas", 10)
+        )
+        summary_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def rows(templates):
+            return [
+                f"{t.count:>9}  {time.strftime('%H:%M:%S', time.localtime(t.first_seen))}"
+                f"  {time.strftime('%H:%M:%S', time.localtime(t.last_seen))}  {t.text}"
+                for t in templates
+            ]
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            miner = server_obj.templates
+            header = f"{'Linhas':>9}  {'Primeira':<8}  {'Última':<8}  Modelo"
+            recent = miner.new_since(time.time() - SPIKE_WINDOW, limit=None)
+            lines = [
+                f"{miner.lines_total} linhas em {len(miner)} modelos "
+                f"({miner.evicted_total} descartados por limite de memória)",
+                "",
+                f"Modelos novos no último minuto: {len(recent)}",
+                header,
+                *rows(recent[:10]),
+                "",
+                "Mais frequentes:",
+                header,
+                *rows(miner.top(30)),
+            ]
+            summary_text.config(state=tk.NORMAL)
+            summary_text.delete(1.0, tk.END)
+            summary_text.insert(tk.END, "\n".join(lines))
+            summary_text.config(state=tk.DISABLED)
+            window.after(1000, refresh)
+
+        refresh()
+
+    def load_test_action(server_obj):
+        """Abre uma janela para executar um teste de carga HTTP contra o servidor."""
+        dialog = tk.Toplevel(root)
+        dialog.title(f"Teste de Carga: {server_obj.name}")
+        dialog.geometry("620x480")
+
+        form = ttk.Frame(dialog, padding=10)
+        form.pack(fill=tk.X)
+        form.columnconfigure(1, weight=1)
+
+        fields = {}
+        for row, (label, default) in enumerate(
+            (
+                ("Caminho:", "/"),
+                ("Concorrência:", "10"),
+                ("Duração (s):", "10"),
+                ("Taxa alvo (req/s, opcional):", ""),
+            )
+        ):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky="w", pady=3)
+            entry = ttk.Entry(form)
+            entry.insert(0, default)
+            entry.grid(row=row, column=1, sticky="ew", pady=3, padx=10)
+            fields[label] = entry
+
+        run_button = ttk.Button(form, text="Executar")
+        run_button.grid(row=4, column=0, columnspan=2, pady=10)
+
+        report_text = scrolledtext.ScrolledText(
+            dialog, wrap=tk.NONE, height=15, state=tk.DISABLED
+        )
+        report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        def show_report(text):
+            if not report_text.winfo_exists():
+                return
+            report_text.config(state=tk.NORMAL)
+            report_text.delete(1.0, tk.END)
+            report_text.insert(tk.END, text)
+            report_text.config(state=tk.DISABLED)
+            run_button.config(state=tk.NORMAL)
 
-        # Atualiza a área de rolagem do Canvas
-        canvas_widget.update_idletasks()
-        canvas_widget.config(scrollregion=canvas_widget.bbox("all"))
+        def run_test():
+            try:
+                path = fields["Caminho:"].get().strip() or "/"
+                concurrency = int(fields["Concorrência:"].get())
+                duration = float(fields["Duração (s):"].get())
+                rate_value = fields["Taxa alvo (req/s, opcional):"].get().strip()
+                rate = float(rate_value) if rate_value else None
+            except ValueError:
+                messagebox.showerror(
+                    "Erro", "Concorrência, duração e taxa devem ser números.", parent=dialog
+                )
+                return
+            if concurrency < 1 or duration <= 0 or (rate is not None and rate <= 0):
+                messagebox.showerror(
+                    "Erro", "Use valores positivos para concorrência, duração e taxa.",
+                    parent=dialog,
+                )
+                return
+
+            show_report("Executando teste de carga...\n")
+            run_button.config(state=tk.DISABLED)
+            server_obj._log_system(
+                f"Teste de carga em '{server_obj.name}' (porta {server_obj.expected_port}, "
+                f"{concurrency} conexões, {duration:g} s) iniciado.\n"
+            )
+
+            def worker():
+                result = run_load_test(
+                    server_obj.expected_port,
+                    path=path,
+                    concurrency=concurrency,
+                    duration=duration,
+                    rate=rate,
+                )
+                server_obj._log_system(
+                    f"Teste de carga em '{server_obj.name}' concluído: "
+                    f"{result.throughput:.1f} req/s, erros {result.error_rate:.2%}, "
+                    f"p99 {result.percentile(99):.2f} ms.\n"
+                )
+                root.after(0, lambda: show_report(result.summary()))
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        run_button.config(command=run_test)
 
     def delete_server_action(server_obj_to_delete):
         """Remove um servidor da lista e da GUI."""
-        if messagebox.askyesno(
+        if not messagebox.askyesno(
             "Confirmar Exclusão",
             f"Tem certeza que deseja excluir o servidor '{server_obj_to_delete.name}'?",
         ):
-            if (
-                server_obj_to_delete.process
-                and server_obj_to_delete.process.poll() is None
-            ):
-                server_obj_to_delete.stop()  # Tenta parar o processo antes de excluir
+            return
+        # Pelo estado, não pelo processo: o pai de réplicas não tem um próprio e
+        # um servidor sob demanda em espera só tem o listener na porta pública
+        if server_registry.is_active(server_obj_to_delete):
 
-            # Remove da lista de instâncias
-            servers_instances.remove(server_obj_to_delete)
+            def stop_then_delete():
+                server_obj_to_delete.stop()  # Réplicas, balanceador ou listener
+                root.after(0, lambda: finish_delete(server_obj_to_delete))
 
-            # Remove o widget da GUI
-            if server_obj_to_delete.name in servers_instances_widgets:
-                servers_instances_widgets[server_obj_to_delete.name].destroy()
-                del servers_instances_widgets[server_obj_to_delete.name]
+            # Parar pode levar segundos: fora da thread do Tk
+            threading.Thread(target=stop_then_delete, daemon=True).start()
+        else:
+            finish_delete(server_obj_to_delete)
 
-            save_configs(servers_instances)  # Salva as configurações atualizadas
-            server_obj_to_delete._log_system(
-                f"Servidor '{server_obj_to_delete.name}' excluído.\n"
-            )
-            messagebox.showinfo(
-                "Sucesso",
-                f"Servidor '{server_obj_to_delete.name}' excluído com sucesso!",
-            )
+    def finish_delete(server_obj):
+        if server_registry.get_by_id(server_obj.id) is not server_obj:
+            return  # Já excluído (pedido repetido enquanto parava)
+        # Remove do registro (o widget é removido pela notificação)
+        server_registry.remove(server_obj)
 
-            # Atualiza a área de rolagem do Canvas após a remoção
-            server_canvas.update_idletasks()
-            server_canvas.config(scrollregion=server_canvas.bbox("all"))
+        save_configs(server_registry.all())  # Salva as configurações atualizadas
+        server_obj._log_system(f"Servidor '{server_obj.name}' excluído.\n")
+        messagebox.showinfo(
+            "Sucesso",
+            f"Servidor '{server_obj.name}' excluído com sucesso!",
+        )
 
     def duplicate_server_action(server_obj_to_duplicate):
         """Duplica um servidor existente."""
-        new_name = f"{server_obj_to_duplicate.name} (Cópia)"
-        # Garantir nome único
-        i = 1
-        while any(s.name == new_name for s in servers_instances):
-            new_name = f"{server_obj_to_duplicate.name} (Cópia {i})"
-            i += 1
+        base_name = server_obj_to_duplicate.name
+        # Garantir nome único (busca O(1) no índice de nomes do registro)
+        new_name = server_registry.unique_name(
+            f"{base_name} (Cópia)", lambda i: f"{base_name} (Cópia {i})"
+        )
 
         new_server = Server(
             new_name,
             server_obj_to_duplicate.command,
             server_obj_to_duplicate.working_dir,
-            system_log,
+            event_store,
             root,
             server_obj_to_duplicate.autostart_var.get(),
             server_obj_to_duplicate.expected_port,
+            **Server.optional_fields_from(server_obj_to_duplicate.to_dict()),
         )
-        servers_instances.append(new_server)
-        add_server_widget_to_gui(new_server, server_scrollable_frame, server_canvas)
-        save_configs(servers_instances)
+        server_registry.add(new_server)
+        save_configs(server_registry.all())
         new_server._log_system(f"Servidor '{new_name}' duplicado com sucesso.\n")
         messagebox.showinfo("Sucesso", f"Servidor '{new_name}' duplicado com sucesso!")
 
@@ -1113,6 +3525,16 @@ def main():
         server_working_dir_entry.insert(0, server_obj.working_dir)
 
         autostart_checkbox_var.set(server_obj.autostart_var.get())
+        build_cache_checkbox_var.set(server_obj.build_cache)
+        on_demand_checkbox_var.set(server_obj.on_demand)
+        watch_checkbox_var.set(bool(server_obj.watch))
+        stdin_checkbox_var.set(server_obj.stdin)
+        group_var.set(server_obj.group)
+        tags_var.set(", ".join(server_obj.tags))
+        schedule_var.set("; ".join(server_obj.schedule))
+        proxy_route_var.set(server_obj.proxy_route)
+        replicas_var.set(str(server_obj.replicas))
+        balancer_var.set(server_obj.balancer)
 
         # Atualizar o texto do botão
         add_save_button.config(
@@ -1130,6 +3552,43 @@ def main():
         base_command_part = command_args_entry.get().strip()
         working_dir = server_working_dir_entry.get().strip()
         autostart = autostart_checkbox_var.get()
+        build_cache = build_cache_checkbox_var.get()
+        on_demand = on_demand_checkbox_var.get()
+        stdin = stdin_checkbox_var.get()
+        # Mantém paths/globs/ignore já configurados no arquivo
+        watch = {}
+        if watch_checkbox_var.get():
+            current = (
+                editing_server_obj.watch if is_editing and editing_server_obj else {}
+            )
+            watch = current or {"paths": ["."]}
+        proxy_route = proxy_route_var.get().strip()
+        group = group_var.get().strip()
+        tags = [tag.strip() for tag in tags_var.get().split(",") if tag.strip()]
+        schedule = [
+            rule.strip() for rule in schedule_var.get().split(";") if rule.strip()
+        ]
+        try:
+            parse_schedule(schedule)
+        except ValueError as e:
+            messagebox.showerror("Agenda inválida", str(e))
+            return
+        balancer = balancer_var.get()
+        try:
+            replicas = int(replicas_var.get())
+            if replicas < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror(
+                "Erro", "O número de réplicas deve ser um inteiro maior que zero."
+            )
+            return
+        if replicas > 1 and on_demand:
+            messagebox.showerror(
+                "Erro",
+                "Início sob demanda não funciona com réplicas: escolha um dos dois.",
+            )
+            return
         port_value = server_port_var.get().strip()
         expected_port = None
 
@@ -1189,20 +3648,31 @@ def main():
                 )
                 return
 
+        existing = server_registry.get(name)
+        if existing is not None and not (is_editing and existing is editing_server_obj):
+            messagebox.showerror("Erro", f"Já existe um servidor chamado '{name}'.")
+            return
+
         if is_editing and editing_server_obj:
-            old_name = editing_server_obj.name
             editing_server_obj.update_details(
-                name, final_command_str, working_dir, autostart, expected_port
+                name,
+                final_command_str,
+                working_dir,
+                autostart,
+                expected_port,
+                build_cache=build_cache,
+                on_demand=on_demand,
+                proxy_route=proxy_route,
+                replicas=replicas,
+                balancer=balancer,
+                watch=watch,
+                group=group,
+                tags=tags,
+                schedule=schedule,
+                stdin=stdin,
             )
-            if old_name != name:
-                if old_name in running_servers:
-                    server_to_move = running_servers.pop(old_name)
-                    running_servers[name] = server_to_move
-
-                # Recria o widget para refletir a mudança de nome no título do frame
-                add_server_widget_to_gui(
-                    editing_server_obj, server_scrollable_frame, server_canvas
-                )
+            # Atualiza os índices; a notificação recria o widget (nome/porta)
+            server_registry.reindex(editing_server_obj)
 
             editing_server_obj._log_system(f"Servidor '{name}' editado com sucesso.\n")
             messagebox.showinfo("Sucesso", f"Servidor '{name}' editado com sucesso!")
@@ -1211,17 +3681,28 @@ def main():
                 name,
                 final_command_str,
                 working_dir,
-                system_log,
+                event_store,
                 root,
                 autostart,
                 expected_port,
+                build_cache=build_cache,
+                on_demand=on_demand,
+                proxy_route=proxy_route,
+                replicas=replicas,
+                balancer=balancer,
+                watch=watch,
+                group=group,
+                tags=tags,
+                schedule=schedule,
+                stdin=stdin,
             )
-            servers_instances.append(new_server)
-            add_server_widget_to_gui(new_server, server_scrollable_frame, server_canvas)
+            server_registry.add(new_server)
             new_server._log_system(f"Servidor '{name}' adicionado com sucesso.\n")
             messagebox.showinfo("Sucesso", f"Servidor '{name}' adicionado com sucesso!")
 
-        save_configs(servers_instances)  # Salva as configurações após adicionar/editar
+        save_configs(
+            server_registry.all()
+        )  # Salva as configurações após adicionar/editar
 
         # Resetar formulário
         server_name_entry.delete(0, tk.END)
@@ -1231,6 +3712,16 @@ def main():
         command_args_entry.delete(0, tk.END)
         command_args_entry.config(state=tk.NORMAL)
         autostart_checkbox_var.set(False)
+        build_cache_checkbox_var.set(False)
+        on_demand_checkbox_var.set(False)
+        watch_checkbox_var.set(False)
+        stdin_checkbox_var.set(False)
+        group_var.set("")
+        tags_var.set("")
+        schedule_var.set("")
+        proxy_route_var.set("")
+        replicas_var.set("1")
+        balancer_var.set("")
         server_port_var.set("")  # Limpa o campo da porta
 
         # Restaurar o botão para "Adicionar Servidor"
@@ -1239,23 +3730,372 @@ def main():
 
     add_save_button.config(command=add_new_server_action)
 
+    # --- Notificações do registro: a GUI aplica as mudanças em lote ---
+    REGISTRY_FLUSH_MS = 50
+    registry_events = collections.deque()
+    registry_flush_pending = threading.Event()
+
+    running_count_label = ttk.Label(servers_toolbar, text="")
+    running_count_label.pack(side="left")
+
+    def import_servers_action():
+        """Importa um Procfile ou compose inteiro: um registro em lote, uma
+        gravação da configuração e um único diálogo de resumo."""
+        path = filedialog.askopenfilename(
+            title="Importar Serviços",
+            filetypes=(
+                ("Procfile / compose", "Procfile* *.yml *.yaml *.json"),
+                ("Todos os arquivos", "*.*"),
+            ),
+        )
+        if not path:
+            return
+        try:
+            result = import_file(path, existing=server_registry)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Importar Serviços", f"Não foi possível importar: {e}")
+            return
+        servers = [
+            Server.from_dict(entry, event_store, root) for entry in result.entries
+        ]
+        try:
+            server_registry.add_many(servers)  # A GUI recebe tudo em um só flush
+        except ValueError as e:  # Nome criado enquanto o diálogo estava aberto
+            messagebox.showerror("Importar Serviços", str(e))
+            return
+        if servers:
+            save_configs(server_registry.all())
+        log_system_message(
+            f"{len(servers)} servidores importados de {path}"
+            + (f" ({len(result.skipped)} pulados)" if result.skipped else "")
+            + ".\n"
+        )
+        messagebox.showinfo("Importar Serviços", result.format())
+
+    ttk.Button(servers_toolbar, text="Importar...", command=import_servers_action).pack(
+        side="left", padx=(10, 0)
+    )
+
+    # --- Ações em grupo: iniciar/parar/reiniciar um grupo ou tag em paralelo ---
+    GROUP_PREFIX, TAG_PREFIX = "Grupo: ", "Tag: "
+    group_selection_var = tk.StringVar(root)
+    group_combobox = ttk.Combobox(
+        servers_toolbar, textvariable=group_selection_var, state="readonly", width=22
+    )
+    group_combobox.pack(side="left", padx=(15, 5))
+    group_buttons = []
+    group_progress = ttk.Progressbar(servers_toolbar, length=120, maximum=1)
+    group_progress_label = ttk.Label(servers_toolbar, text="")
+
+    def refresh_group_choices():
+        choices = [GROUP_PREFIX + group for group in server_registry.groups()] + [
+            TAG_PREFIX + tag for tag in server_registry.tags()
+        ]
+        group_combobox.config(values=choices)
+        if group_selection_var.get() not in choices:
+            group_selection_var.set(choices[0] if choices else "")
+
+    def selected_group_servers():
+        selection = group_selection_var.get()
+        if selection.startswith(GROUP_PREFIX):
+            return server_registry.by_group(selection[len(GROUP_PREFIX) :])
+        if selection.startswith(TAG_PREFIX):
+            return server_registry.by_tag(selection[len(TAG_PREFIX) :])
+        return []
+
+    def group_action(verb, action, wanted):
+        """Executa `action` nos servidores selecionados para os quais `wanted`
+        é verdadeiro, mostrando o progresso."""
+        selection = group_selection_var.get()
+        servers = [s for s in selected_group_servers() if wanted(s)]
+        if not servers:
+            group_progress_label.config(text=f"Nada a fazer em {selection}.")
+            return
+
+        def show_progress(operation):
+            root.after(
+                0,
+                lambda: (
+                    group_progress.config(
+                        maximum=operation.total, value=operation.done
+                    ),
+                    group_progress_label.config(
+                        text=f"{verb}: {operation.done}/{operation.total}"
+                    ),
+                ),
+            )
+
+        def finish_early(text):
+            for button in group_buttons:
+                button.config(state=tk.NORMAL)
+            group_progress_label.config(text=text)
+
+        def finished(operation):
+            for button in group_buttons:
+                button.config(state=tk.NORMAL)
+            summary = (
+                f"{selection}: {operation.total - len(operation.failed)}/"
+                f"{operation.total} em {operation.elapsed:.2f} s"
+            )
+            if operation.failed:
+                summary += f" ({len(operation.failed)} falha(s))"
+            group_progress_label.config(text=summary)
+            log_system_message(
+                f"{verb} {selection} ({', '.join(s.name for s in servers)}): "
+                f"concluído em {operation.elapsed:.2f} s.\n"
+            )
+            for name, reason in operation.failed:
+                log_system_message(f"Falha em '{name}': {reason}\n", "ERROR")
+
+        def run():
+            if verb == "Iniciando" and not preflight_servers(servers).ok:
+                # Falha rápida: nenhum servidor do grupo é iniciado
+                root.after(0, lambda: finish_early(f"{selection}: verificação falhou"))
+                return
+            operation = BulkOperation(servers, action, on_progress=show_progress)
+            operation.run()
+            root.after(0, lambda: finished(operation))
+
+        for button in group_buttons:
+            button.config(state=tk.DISABLED)
+        group_progress.config(maximum=len(servers), value=0)
+        group_progress_label.config(text=f"{verb}: 0/{len(servers)}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop_and_check(server_obj):
+        server_obj.stop()
+        return not server_registry.is_active(server_obj)
+
+    def restart_and_check(server_obj):
+        restart_server(server_obj)
+        return server_obj.start_and_wait()
+
+    for text, verb, action, wanted in (
+        (
+            "Iniciar Grupo",
+            "Iniciando",
+            lambda s: s.start_and_wait(),
+            lambda s: not server_registry.is_active(s),
+        ),
+        ("Parar Grupo", "Parando", stop_and_check, server_registry.is_active),
+        ("Reiniciar Grupo", "Reiniciando", restart_and_check, lambda s: True),
+    ):
+        button = ttk.Button(
+            servers_toolbar,
+            text=text,
+            command=lambda v=verb, a=action, w=wanted: group_action(v, a, w),
+        )
+        button.pack(side="left", padx=(0, 5))
+        group_buttons.append(button)
+    group_progress.pack(side="left", padx=(5, 5))
+    group_progress_label.pack(side="left")
+
+    def on_registry_event(event, server_obj, info):
+        """Recebe notificações de qualquer thread e agenda um único flush."""
+        registry_events.append((event, server_obj))
+        if not registry_flush_pending.is_set():
+            registry_flush_pending.set()
+            root.after(REGISTRY_FLUSH_MS, flush_registry_events)
+
+    def flush_registry_events():
+        """Cria, recria ou remove os widgets afetados desde o último flush."""
+        registry_flush_pending.clear()
+        rebuilt = set()
+        layout_changed = False
+        while registry_events:
+            event, server_obj = registry_events.popleft()
+            if event in (ADDED, UPDATED):
+                current = server_registry.get_by_id(server_obj.id)
+                if current is server_obj and server_obj.id not in rebuilt:
+                    add_server_widget_to_gui(
+                        server_obj, server_scrollable_frame, server_canvas
+                    )
+                    rebuilt.add(server_obj.id)
+                    layout_changed = True
+            elif event == REMOVED:
+                schedule_labels.pop(server_obj.id, None)
+                # Threads do servidor ainda podem atualizar status e saída
+                server_obj.status_label_widget = None
+                server_obj.output_label = None
+                frame = servers_instances_widgets.pop(server_obj.id, None)
+                if frame is not None:
+                    frame.destroy()
+                    layout_changed = True
+        running_count_label.config(
+            text=f"{len(server_registry.running())}/{len(server_registry)} em execução"
+        )
+        if layout_changed:
+            refresh_group_choices()  # Grupos e tags podem ter mudado
+            # Recalcula a área de rolagem uma única vez por lote
+            with diagnostics.timed("lista: área de rolagem"):
+                server_canvas.update_idletasks()
+                server_canvas.config(scrollregion=server_canvas.bbox("all"))
+
+    server_registry.subscribe(on_registry_event)
+
+    # --- Agenda: uma única roda de temporização para todos os servidores ---
+    SCHEDULE_LABEL_REFRESH_MS = 30000
+    SCHEDULE_VERBS = {"start": "iniciar", "stop": "parar", "restart": "reiniciar"}
+
+    def run_scheduled_action(server_obj, action):
+        """Executa uma ação agendada (thread principal)."""
+        if server_registry.get_by_id(server_obj.id) is not server_obj:
+            return  # Removido nesse meio tempo
+        active = server_registry.is_active(server_obj)
+        if (action == "start" and active) or (action == "stop" and not active):
+            return
+        server_obj._log_system(
+            f"Agenda: {SCHEDULE_VERBS[action]} '{server_obj.name}'.\n"
+        )
+        if action == "start":
+            target, args = start_checked, ([server_obj],)
+        elif action == "stop":
+            target, args = server_obj.stop, ()
+        else:
+            target, args = restart_server, (server_obj,)
+        threading.Thread(target=target, args=args, daemon=True).start()
+        update_schedule_label(server_obj)
+
+    scheduler = Scheduler(
+        lambda server_obj, action: root.after(
+            0, lambda: run_scheduled_action(server_obj, action)
+        )
+    )
+
+    server_schedules = {}  # id do servidor -> Schedule interpretada
+
+    def schedule_for(server_obj):
+        """A agenda interpretada do servidor (vazia se inválida, com aviso)."""
+        try:
+            return parse_schedule(server_obj.schedule)
+        except ValueError as e:
+            server_obj._log_system(
+                f"Agenda de '{server_obj.name}' ignorada: {e}\n", "ERROR"
+            )
+            return parse_schedule([])
+
+    def should_autostart(server_obj):
+        schedule = server_schedules.get(server_obj.id)
+        in_window = schedule.in_window() if schedule is not None else None
+        return server_obj.autostart_var.get() if in_window is None else in_window
+
+    def on_schedule_registry_event(event, server_obj, info):
+        # Qualquer thread; o Scheduler é thread-safe
+        if event in (ADDED, UPDATED):
+            schedule = server_schedules[server_obj.id] = schedule_for(server_obj)
+            scheduler.set_schedule(server_obj, schedule)
+        elif event == REMOVED:
+            server_schedules.pop(server_obj.id, None)
+            scheduler.remove(server_obj)
+
+    def update_schedule_label(server_obj):
+        entry = schedule_labels.get(server_obj.id)
+        if entry is None:
+            return
+        runs = scheduler.next_runs(server_obj)
+        if runs:
+            when, action = runs[0]
+            text = (
+                f"Agenda: próxima ação {SCHEDULE_VERBS[action]} em "
+                f"{time.strftime('%d/%m %H:%M', time.localtime(when))}"
+            )
+        else:
+            text = "Agenda: nenhuma ação futura"
+        entry[1].config(text=text)
+
+    def refresh_schedule_labels():
+        for server_obj, _ in list(schedule_labels.values()):
+            update_schedule_label(server_obj)
+        root.after(SCHEDULE_LABEL_REFRESH_MS, refresh_schedule_labels)
+
+    server_registry.subscribe(on_schedule_registry_event)
+    scheduler.start()
+    root.after(SCHEDULE_LABEL_REFRESH_MS, refresh_schedule_labels)
+
     create_dummy_files()
 
+    # --- Readoção: processos que continuaram rodando após a GUI fechar ---
+    runtime_state = RuntimeState()
+    RUNTIME_STATE_INTERVAL_MS = 2000
+
+    def adopt_running_servers():
+        """Adota os processos da sessão anterior que ainda estão vivos e
+        retorna os nomes dos servidores readotados."""
+        adopted = set()
+        for name, entry in runtime_state.load().items():
+            process = verify(entry)
+            if process is None:
+                continue  # Já terminou (ou o PID agora é de outro processo)
+            server_obj = server_registry.get(name)
+            if (
+                server_obj is not None
+                and server_obj.can_adopt(entry)
+                and server_obj.adopt(process, entry)
+            ):
+                adopted.add(name)
+                continue
+            # Não dá para retomar (réplica, sob demanda, removido ou comando
+            # alterado): encerra para liberar a porta
+            process.terminate()
+            log_system_message(
+                f"Processo remanescente de '{name}' (PID: {process.pid}) encerrado: "
+                "não pode ser readotado.\n",
+                "WARNING",
+            )
+        return adopted
+
+    def save_runtime_state():
+        entries = {}
+        for server_obj in with_replicas(server_registry.all()):
+            entry = server_obj.runtime_entry()
+            if entry is not None:
+                entries[server_obj.name] = entry
+        runtime_state.save(entries)
+
+    def persist_runtime_state():
+        save_runtime_state()
+        root.after(RUNTIME_STATE_INTERVAL_MS, persist_runtime_state)
+
     # Carregar configurações e iniciar servidores
+    def preflight_servers(servers_to_check):
+        """Valida os servidores em paralelo; havendo problemas, registra cada um e
+        mostra um único relatório. Retorna o PreflightReport."""
+        report = run_preflight(servers_to_check)
+        for warning in report.warnings:
+            log_system_message(f"Verificação: {warning}\n", "WARNING")
+        if not report.ok:
+            for problem in report.problems:
+                log_system_message(f"Verificação: {problem}\n", "ERROR")
+            root.after(
+                0,
+                lambda: messagebox.showerror(
+                    "Verificação antes de iniciar", report.format()
+                ),
+            )
+        return report
+
+    def start_checked(servers_to_start):
+        """Inicia os servidores que passaram na verificação prévia."""
+        report = preflight_servers(
+            [s for s in servers_to_start if not server_registry.is_active(s)]
+        )
+        for server_obj in report.passed:
+            threading.Thread(target=server_obj.start, daemon=True).start()
+
     loaded_servers_data = load_configs()
     if not loaded_servers_data:
         # Se não houver configurações salvas, adicione alguns exemplos
         initial_servers_data = [
             {
                 "name": "Python HTTP (Dummy Node.js)",
-                "command": "python -u node_dummy_server.py",
+                "command": "python -u node_dummy_server.py --port 3000",
                 "working_dir": ".",
                 "autostart": False,
                 "expected_port": 3000,  # Adicionado porta esperada
             },
             {
                 "name": "Python HTTP (Dummy Go)",
-                "command": "python -u go_dummy_server.py",
+                "command": "python -u go_dummy_server.py --port 8080",
                 "working_dir": ".",
                 "autostart": False,
                 "expected_port": 8080,  # Adicionado porta esperada
@@ -1275,41 +4115,159 @@ def main():
                 "expected_port": 8000,
             },
         ]
-        # Adicionar os exemplos à lista de instâncias para que sejam exibidos e salvos
-        for s_data in initial_servers_data:
-            s_obj = Server(
-                s_data["name"],
-                s_data["command"],
-                s_data["working_dir"],
-                system_log,
-                root,
-                s_data["autostart"],
-                s_data.get("expected_port"),
-            )
-            servers_instances.append(s_obj)
-            add_server_widget_to_gui(s_obj, server_scrollable_frame, server_canvas)
-        save_configs(servers_instances)  # Salvar os exemplos inicialmente
+        # Adicionar os exemplos ao registro para que sejam exibidos e salvos
+        server_registry.add_many(
+            [
+                Server.from_dict(s_data, event_store, root)
+                for s_data in initial_servers_data
+            ]
+        )
+        save_configs(server_registry.all())  # Salvar os exemplos inicialmente
     else:
         # Reconstruir objetos Server a partir das configurações carregadas
         for s_data in loaded_servers_data:
-            s_obj = Server(
-                s_data["name"],
-                s_data["command"],
-                s_data["working_dir"],
-                system_log,
-                root,
-                s_data.get("autostart", False),
-                s_data.get("expected_port"),
+            if s_data.get("name") in server_registry:
+                log_system_message(
+                    f"Servidor duplicado '{s_data['name']}' ignorado em {CONFIG_FILE}.\n",
+                    "WARNING",
+                )
+                continue
+            server_registry.add(Server.from_dict(s_data, event_store, root))
+        adopted = adopt_running_servers()
+        # Iniciar servidores com autostart=True (exceto os readotados); com uma
+        # janela na agenda, vale a janela: só inicia se estiver dentro dela
+        autostart = [
+            s_obj
+            for s_obj in server_registry.all()
+            if s_obj.name not in adopted and should_autostart(s_obj)
+        ]
+        if autostart:
+            threading.Thread(
+                target=start_checked, args=(autostart,), daemon=True
+            ).start()
+
+    def restart_server(server_obj):
+        """Reinicia o servidor (de forma gradual quando possível) ou o inicia se parado."""
+        if server_registry.is_active(server_obj):
+            server_obj.restart()
+        else:
+            server_obj.start()
+
+    removing_servers = set()  # ids parando antes de sair do registro
+
+    def remove_from_config(server_obj):
+        removing_servers.discard(server_obj.id)
+        if server_registry.get_by_id(server_obj.id) is server_obj:
+            server_registry.remove(server_obj)
+            server_obj._log_system(
+                f"Servidor '{server_obj.name}' removido pela configuração.\n"
+            )
+
+    def stop_and_remove(server_obj):
+        """Para o servidor (em uma thread) e só então o tira do registro, para
+        a parada não atualizar widgets já destruídos."""
+        server_obj.stop()
+        root.after(0, lambda: remove_from_config(server_obj))
+
+    def apply_config_diff(diff):
+        """Aplica apenas o que mudou no arquivo, sem tocar nos demais servidores."""
+        for server_obj in diff.removed:
+            if server_obj.id in removing_servers:
+                continue  # Ainda parando desde um recarregamento anterior
+            if server_registry.is_active(server_obj):
+                removing_servers.add(server_obj.id)
+                threading.Thread(
+                    target=stop_and_remove, args=(server_obj,), daemon=True
+                ).start()
+            else:
+                remove_from_config(server_obj)
+
+        for entry in diff.added:
+            server_obj = Server.from_dict(entry, event_store, root)
+            server_registry.add(server_obj)
+            server_obj._log_system(
+                f"Servidor '{server_obj.name}' adicionado pela configuração.\n"
+            )
+            if server_obj.autostart_var.get():
+                threading.Thread(target=server_obj.start, daemon=True).start()
+
+        for server_obj, entry in diff.restart:
+            was_running = server_registry.is_active(server_obj)
+            server_obj.update_details(
+                entry["name"],
+                entry["command"],
+                entry.get("working_dir", ""),
+                entry.get("autostart", False),
+                entry.get("expected_port"),
+                **Server.optional_fields_from(entry),
+            )
+            server_registry.reindex(server_obj)  # A porta pode ter mudado
+            if was_running:
+                server_obj._log_system(
+                    f"Configuração de '{server_obj.name}' mudou; reiniciando.\n"
+                )
+                threading.Thread(
+                    target=restart_server, args=(server_obj,), daemon=True
+                ).start()
+
+        for server_obj, entry in diff.update:
+            server_obj.update_details(
+                entry["name"],
+                server_obj.command,
+                server_obj.working_dir,
+                entry.get("autostart", False),
+                server_obj.expected_port,
+                **Server.optional_fields_from(entry),
+            )
+            server_registry.reindex(server_obj)  # Rota do proxy pode ter mudado
+
+    def reload_configs_from_disk():
+        """Recarrega o arquivo de configuração e aplica o diff (thread principal)."""
+        t0 = time.perf_counter()
+        try:
+            entries = load_configs_if_changed()
+        except ValueError as e:
+            log_system_message(
+                f"Configuração inválida em {CONFIG_FILE}, mantendo a atual: {e}\n",
+                "ERROR",
             )
-            servers_instances.append(s_obj)
-            add_server_widget_to_gui(s_obj, server_scrollable_frame, server_canvas)
-            # Iniciar servidores com autostart=True
-            if s_obj.autostart_var.get():
-                threading.Thread(target=s_obj.start, daemon=True).start()
+            return
+        if entries is None:
+            return
+        diff = diff_configs(server_registry.all(), entries)
+        if diff.is_empty():
+            return
+        apply_config_diff(diff)
+        log_system_message(
+            f"Configuração recarregada em {(time.perf_counter() - t0) * 1000:.1f} ms: "
+            f"{diff.summary()}.\n"
+        )
+
+    config_watcher = FileWatcher(
+        CONFIG_FILE, lambda: root.after(0, reload_configs_from_disk)
+    )
+    config_watcher.start()
+    log_system_message(
+        f"Observando {CONFIG_FILE} para recarregamento automático "
+        f"({config_watcher.backend}).\n"
+    )
 
     on_command_type_selected()  # Chamada inicial para configurar a UI
 
+    root.after(RUNTIME_STATE_INTERVAL_MS, persist_runtime_state)
     root.mainloop()
+    if profile_session["current"] is not None:
+        profile_session["current"].stop()  # Grava o perfil em andamento
+    save_runtime_state()  # Os servidores continuam rodando e serão readotados
+    config_watcher.stop()
+    reverse_proxy.stop()
+    for client in remote_clients.values():
+        client.stop()
+    scheduler.stop()
+    metrics_sampler.stop()
+    metrics_store.close()
+    run_history.close()
+    event_store.close()
 
 
 if __name__ == "__main__":
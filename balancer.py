@@ -0,0 +1,96 @@
+"""Balanceador TCP para as réplicas de um servidor.
+
+Escuta na porta pública do servidor e distribui cada conexão entre as portas
+das réplicas em execução, em rodízio (round robin) ou para a réplica com menos
+conexões abertas (least connections). Se uma réplica recusar a conexão, tenta a
+próxima.
+"""
+
+import asyncio
+import collections
+
+from netutil import AsyncioService, pipe
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_conn"
+STRATEGIES = (ROUND_ROBIN, LEAST_CONNECTIONS)
+
+
+class TcpBalancer(AsyncioService):
+    """Distribui conexões entre as portas retornadas por `get_backends()`."""
+
+    def __init__(
+        self,
+        port,
+        get_backends,
+        strategy=ROUND_ROBIN,
+        host=None,
+        backend_host="127.0.0.1",
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de balanceamento desconhecida: {strategy}")
+        super().__init__()
+        self.port = port
+        self.get_backends = get_backends
+        self.strategy = strategy
+        self.host = host  # None = todas as interfaces
+        self.backend_host = backend_host
+        self.active = collections.Counter()  # porta -> conexões abertas
+        self.connections_total = collections.Counter()  # porta -> conexões atendidas
+        self.failures_total = 0  # Conexões sem nenhuma réplica disponível
+        self._next = 0
+        self._server = None
+
+    async def _open(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, reuse_address=True
+        )
+
+    async def _close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await super()._close()
+
+    def _candidates(self):
+        """Portas das réplicas na ordem em que devem ser tentadas."""
+        backends = list(self.get_backends())
+        if not backends:
+            return backends
+        start = self._next % len(backends)
+        self._next += 1
+        ordered = backends[start:] + backends[:start]
+        if self.strategy == LEAST_CONNECTIONS:
+            # Ordenação estável: empates continuam em rodízio
+            ordered.sort(key=lambda port: self.active[port])
+        return ordered
+
+    async def _handle(self, client_reader, client_writer):
+        upstream_writer = None
+        port = None
+        try:
+            for candidate in self._candidates():
+                try:
+                    upstream_reader, upstream_writer = await asyncio.open_connection(
+                        self.backend_host, candidate
+                    )
+                except OSError:
+                    continue
+                port = candidate
+                break
+            if port is None:
+                self.failures_total += 1
+                return
+            self.active[port] += 1
+            self.connections_total[port] += 1
+            await asyncio.gather(
+                pipe(client_reader, upstream_writer),
+                pipe(upstream_reader, client_writer),
+            )
+        except (OSError, asyncio.CancelledError):
+            pass  # Cliente desconectou ou o balanceador está sendo encerrado
+        finally:
+            if port is not None:
+                self.active[port] -= 1
+            for writer in (upstream_writer, client_writer):
+                if writer is not None:
+                    writer.close()
@@ -0,0 +1,243 @@
+"""Cache de binários compilados para comandos do tipo "compila e executa".
+
+Um comando como `go run main.go --flag` recompila o programa a cada início. No
+modo de cache, o ServerFlow compila uma vez para um diretório de cache cuja
+chave é o hash das entradas do build (fontes, go.mod/go.sum, flags e
+toolchain) e passa a executar o binário diretamente, recompilando apenas quando
+alguma entrada muda.
+
+Outros presets podem se registrar com `register_builder`, implementando a
+interface de `Builder`.
+"""
+
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_CACHE_DIR = ".serverflow-cache"
+KEEP_BUILDS = 3  # Builds antigos mantidos por programa
+
+
+class BuildError(Exception):
+    """Falha ao compilar; `output` traz a saída do compilador."""
+
+    def __init__(self, message, output=""):
+        super().__init__(message)
+        self.output = output
+
+
+class BuildPlan:
+    """Descreve como compilar e executar um comando reconhecido por um Builder."""
+
+    def __init__(self, builder, name, cwd, inputs, build_argv, run_args, extra_key=""):
+        self.builder = builder
+        self.name = name  # Nome do programa (usado no diretório de cache)
+        self.cwd = cwd
+        self.inputs = inputs  # Arquivos cujo conteúdo entra na chave
+        self.build_argv = build_argv  # Comando de build; "{output}" é o binário
+        self.run_args = run_args  # Argumentos repassados ao binário
+        self.extra_key = extra_key
+
+    def cache_key(self):
+        digest = hashlib.sha256()
+        digest.update(self.builder.name.encode())
+        digest.update(self.extra_key.encode())
+        digest.update("\0".join(self.build_argv).encode())
+        for path in sorted(self.inputs):
+            digest.update(os.path.relpath(path, self.cwd).encode())
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:20]
+
+
+class BuildResult:
+    """Resultado da preparação: comando final e tempo gasto no build."""
+
+    def __init__(self, command, binary, cached, build_seconds):
+        self.command = command
+        self.binary = binary
+        self.cached = cached
+        self.build_seconds = build_seconds
+
+
+class Builder:
+    """Interface de plugin para presets compila-então-executa."""
+
+    name = ""
+
+    def plan(self, command, working_dir):
+        """Retorna um BuildPlan se reconhecer o comando, senão None."""
+        raise NotImplementedError
+
+
+class GoRunBuilder(Builder):
+    """Reconhece `go run [flags] <arquivos .go | pacote> [args]`."""
+
+    name = "go"
+    SKIP_DIRS = {".git", "node_modules", "testdata"}
+
+    def plan(self, command, working_dir):
+        try:
+            argv = shlex.split(command, posix=os.name != "nt")
+        except ValueError:
+            return None
+        if len(argv) < 3 or os.path.basename(argv[0]) not in ("go", "go.exe"):
+            return None
+        if argv[1] != "run":
+            return None
+
+        cwd = os.path.abspath(working_dir or ".")
+        index = 2
+        flags = []
+        while index < len(argv) and argv[index].startswith("-"):
+            flags.append(argv[index])
+            index += 1
+        targets = []
+        while index < len(argv) and argv[index].endswith(".go"):
+            targets.append(argv[index])
+            index += 1
+        if not targets and index < len(argv):
+            targets.append(argv[index])  # Caminho de pacote (ex: "." ou ./cmd/api)
+            index += 1
+        if not targets:
+            return None
+        run_args = argv[index:]
+
+        first = os.path.join(cwd, targets[0])
+        target_dir = first if os.path.isdir(first) else os.path.dirname(first)
+        module_root = self._module_root(target_dir)
+        inputs = self._inputs(module_root)
+        if not inputs:
+            return None
+        go = shutil.which(argv[0]) or argv[0]
+        try:
+            toolchain = f"{go}:{os.stat(go).st_mtime_ns}"
+        except OSError:
+            toolchain = go
+        env_key = ",".join(
+            f"{k}={os.environ.get(k, '')}" for k in ("GOOS", "GOARCH", "CGO_ENABLED")
+        )
+        name = os.path.splitext(os.path.basename(os.path.normpath(first)))[0]
+        if name in ("", "."):
+            name = os.path.basename(module_root)
+        return BuildPlan(
+            self,
+            name,
+            cwd,
+            inputs,
+            [argv[0], "build", *flags, "-o", "{output}", *targets],
+            run_args,
+            extra_key=f"{toolchain};{env_key}",
+        )
+
+    @staticmethod
+    def _module_root(start_dir):
+        directory = start_dir
+        while True:
+            if os.path.isfile(os.path.join(directory, "go.mod")):
+                return directory
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return start_dir
+            directory = parent
+
+    def _inputs(self, module_root):
+        inputs = []
+        for directory, dirnames, filenames in os.walk(module_root):
+            dirnames[:] = [
+                d for d in dirnames if d not in self.SKIP_DIRS and not d.startswith(".")
+            ]
+            for filename in filenames:
+                if filename in ("go.mod", "go.sum") or (
+                    filename.endswith(".go") and not filename.endswith("_test.go")
+                ):
+                    inputs.append(os.path.join(directory, filename))
+        return inputs
+
+
+BUILDERS = [GoRunBuilder()]
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def register_builder(builder):
+    """Adiciona um Builder (tem prioridade sobre os já registrados)."""
+    BUILDERS.insert(0, builder)
+
+
+def find_plan(command, working_dir):
+    """Retorna o BuildPlan do primeiro Builder que reconhecer o comando."""
+    for builder in BUILDERS:
+        plan = builder.plan(command, working_dir)
+        if plan is not None:
+            return plan
+    return None
+
+
+def _lock_for(path):
+    with _build_locks_guard:
+        return _build_locks.setdefault(path, threading.Lock())
+
+
+def prepare(command, working_dir, cache_dir=DEFAULT_CACHE_DIR):
+    """Garante o binário em cache para o comando e retorna um BuildResult.
+
+    Retorna None se nenhum Builder reconhecer o comando (ele roda sem cache).
+    Levanta BuildError se a compilação falhar.
+    """
+    plan = find_plan(command, working_dir)
+    if plan is None:
+        return None
+    key = plan.cache_key()
+    program_dir = os.path.abspath(
+        os.path.join(cache_dir, f"{plan.builder.name}-{plan.name}")
+    )
+    suffix = ".exe" if sys.platform == "win32" else ""
+    binary = os.path.join(program_dir, key, plan.name + suffix)
+
+    with _lock_for(binary):
+        cached = os.path.isfile(binary)
+        build_seconds = 0.0
+        if not cached:
+            os.makedirs(os.path.dirname(binary), exist_ok=True)
+            tmp_binary = f"{binary}.tmp{os.getpid()}"
+            argv = [arg.replace("{output}", tmp_binary) for arg in plan.build_argv]
+            t0 = time.perf_counter()
+            completed = subprocess.run(
+                argv, cwd=plan.cwd, capture_output=True, text=True
+            )
+            build_seconds = time.perf_counter() - t0
+            if completed.returncode != 0:
+                shutil.rmtree(os.path.dirname(binary), ignore_errors=True)
+                raise BuildError(
+                    f"Build falhou (código {completed.returncode})",
+                    completed.stdout + completed.stderr,
+                )
+            os.replace(tmp_binary, binary)
+            _prune(program_dir, keep=os.path.basename(os.path.dirname(binary)))
+
+    run_command = " ".join(
+        [shlex.quote(binary)] + [shlex.quote(arg) for arg in plan.run_args]
+    )
+    return BuildResult(run_command, binary, cached, build_seconds)
+
+
+def _prune(program_dir, keep):
+    """Remove builds antigos do programa, mantendo os KEEP_BUILDS mais recentes."""
+    try:
+        entries = [
+            os.path.join(program_dir, d)
+            for d in os.listdir(program_dir)
+            if d != keep and os.path.isdir(os.path.join(program_dir, d))
+        ]
+    except OSError:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for old in entries[KEEP_BUILDS - 1 :]:
+        shutil.rmtree(old, ignore_errors=True)
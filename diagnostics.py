@@ -0,0 +1,301 @@
+"""Instrumentação do próprio ServerFlow: atraso do loop do Tk e perfis.
+
+- Um "batimento" agendado com `after()` mede quanto o loop principal atrasa em
+  relação ao intervalo pedido (se um handler demora 300 ms, o batimento
+  seguinte chega ~300 ms atrasado).
+- `instrument_after(root)` substitui `root.after` por uma versão que conta os
+  callbacks agendados, pendentes e executados por origem e mede quanto cada
+  um ocupa a thread principal.
+- `timed(nome)` mede trechos pesados específicos (redesenho da saída, cálculo
+  da área de rolagem, gravação da configuração).
+- `ProfileSession` roda o app sob cProfile ou sob um perfilador por amostragem
+  da thread principal e grava o resultado em `logs/`.
+
+`snapshot()` junta tudo em um dicionário, exportável em JSON para comparar
+versões.
+"""
+
+import cProfile
+import collections
+import contextlib
+import io
+import json
+import os
+import pstats
+import statistics
+import sys
+import threading
+import time
+
+DEFAULT_HEARTBEAT_MS = 100
+STALL_MS = 100  # Atraso a partir do qual o batimento conta como travamento
+LAG_HISTORY = 600  # Batimentos guardados (1 minuto com o intervalo padrão)
+PROFILE_DIR = "logs"
+CPROFILE = "cProfile"
+SAMPLING = "Amostragem"
+PROFILE_MODES = (CPROFILE, SAMPLING)
+SAMPLE_INTERVAL = 0.005  # Segundos entre amostras da pilha
+PROFILE_TOP = 25  # Funções listadas no resumo de um perfil
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def callback_name(func):
+    """Nome legível de um callback agendado (lambdas levam o número da linha)."""
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or repr(func)
+    name = name.replace("main.<locals>.", "").replace(".<locals>", "")
+    code = getattr(func, "__code__", None)
+    if "<lambda>" in name and code is not None:
+        name = f"{name}:{code.co_firstlineno}"
+    return name
+
+
+class HandlerStats:
+    """Contagem e duração das execuções de um handler."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Diagnostics:
+    """Atraso do loop principal, callbacks agendados e tempo dos handlers."""
+
+    def __init__(self, heartbeat_ms=DEFAULT_HEARTBEAT_MS, stall_ms=STALL_MS):
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_ms = stall_ms
+        self.lags = collections.deque(maxlen=LAG_HISTORY)  # Atrasos em segundos
+        self.stalls_total = 0
+        self.handlers = collections.defaultdict(HandlerStats)
+        self.after_scheduled = collections.Counter()
+        self.after_executed = collections.Counter()
+        self.last_profile = None  # Resumo do último perfil gravado
+        self._lock = threading.Lock()
+        self._root = None
+        self._original_after = None
+        self._expected = None
+
+    # --- Batimento e after() ---
+
+    def start(self, root):
+        """Instrumenta `root.after` e começa a medir o atraso do loop."""
+        self._root = root
+        self.instrument_after(root)
+        self._schedule_heartbeat()
+
+    def instrument_after(self, root):
+        original = self._original_after = root.after
+
+        def after(ms, func=None, *args):
+            if func is None:
+                return original(ms)
+            source = callback_name(func)
+            with self._lock:
+                self.after_scheduled[source] += 1
+
+            def run(*call_args):
+                with self._lock:
+                    self.after_executed[source] += 1
+                with self.timed(f"after: {source}"):
+                    return func(*call_args)
+
+            return original(ms, run, *args)
+
+        root.after = after
+
+    def _schedule_heartbeat(self):
+        self._expected = time.perf_counter() + self.heartbeat_ms / 1000
+        self._original_after(self.heartbeat_ms, self._heartbeat)
+
+    def _heartbeat(self):
+        lag = max(0.0, time.perf_counter() - self._expected)
+        self.lags.append(lag)
+        if lag * 1000 >= self.stall_ms:
+            self.stalls_total += 1
+        self._schedule_heartbeat()
+
+    # --- Handlers ---
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """Mede o bloco e acumula em `handlers[name]`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.handlers[name].add(elapsed)
+
+    # --- Relatório ---
+
+    def snapshot(self):
+        """Estado atual em um dicionário serializável em JSON."""
+        lags = sorted(self.lags)
+        with self._lock:
+            after = {
+                source: {
+                    "scheduled": scheduled,
+                    "executed": self.after_executed[source],
+                    "pending": scheduled - self.after_executed[source],
+                }
+                for source, scheduled in self.after_scheduled.items()
+            }
+            handlers = {name: stats.to_dict() for name, stats in self.handlers.items()}
+        return {
+            "timestamp": time.time(),
+            "loop": {
+                "heartbeat_ms": self.heartbeat_ms,
+                "samples": len(lags),
+                "lag_ms": {
+                    "p50": round(statistics.median(lags) * 1000, 3) if lags else None,
+                    "p95": round(_percentile(lags, 0.95) * 1000, 3) if lags else None,
+                    "p99": round(_percentile(lags, 0.99) * 1000, 3) if lags else None,
+                    "max": round(lags[-1] * 1000, 3) if lags else None,
+                },
+                "stall_ms": self.stall_ms,
+                "stalls_total": self.stalls_total,
+            },
+            "after": after,
+            "handlers": handlers,
+            "profile": self.last_profile,
+        }
+
+    def export(self, directory=PROFILE_DIR):
+        """Grava o snapshot em `diagnostics-<data>.json`; retorna o caminho."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f"diagnostics-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+class SamplingProfiler:
+    """Amostra a pilha de uma thread em intervalos fixos, em uma thread própria.
+
+    Custa pouco para a thread amostrada (nenhum gancho por chamada) e as pilhas
+    agregadas podem ser gravadas no formato "folded" dos flame graphs.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def top(self, limit=PROFILE_TOP):
+        """(função, amostras próprias, amostras inclusivas) das mais presentes."""
+        own = collections.Counter()
+        inclusive = collections.Counter()
+        for stack, count in self.stacks.items():
+            if stack:
+                own[stack[-1]] += count
+            for name in set(stack):
+                inclusive[name] += count
+        return [
+            (name, own[name], count) for name, count in inclusive.most_common(limit)
+        ]
+
+
+class ProfileSession:
+    """Um perfil do app em andamento (cProfile ou amostragem da thread principal).
+
+    Deve ser iniciado e parado na thread principal: o cProfile só mede a
+    thread em que foi ativado.
+    """
+
+    def __init__(self, mode, directory=PROFILE_DIR):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfil desconhecido: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.started_at = None
+        self._profile = None
+        self._sampler = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self.mode == CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = SamplingProfiler(threading.get_ident())
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        """Encerra o perfil, grava o arquivo e retorna o resumo (dicionário)."""
+        duration = time.perf_counter() - self.started_at
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+        if self.mode == CPROFILE:
+            self._profile.disable()
+            path = f"{base}.pstats"
+            self._profile.dump_stats(path)
+            text = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=text)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+            top = text.getvalue()
+        else:
+            self._sampler.stop()
+            path = f"{base}.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self._sampler.stacks.most_common():
+                    f.write(f"{';'.join(stack)} {count}\n")
+            top = "\n".join(
+                [f"{'Próprias':>9}{'Inclusivas':>11}  Função"]
+                + [
+                    f"{own:>9}{inclusive:>11}  {name}"
+                    for name, own, inclusive in self._sampler.top()
+                ]
+                + [f"\n{self._sampler.samples} amostras"]
+            )
+        return {
+            "mode": self.mode,
+            "duration_seconds": round(duration, 3),
+            "path": path,
+            "top": top,
+        }
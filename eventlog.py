@@ -0,0 +1,171 @@
+"""Histórico estruturado e limitado dos eventos do sistema.
+
+Cada mensagem do log do sistema vira um SystemEvent guardado em um deque com
+tamanho máximo. Índices por servidor e por severidade (aparados junto com o
+deque principal, então nunca seguram eventos descartados) permitem filtrar sem
+varrer texto, e os eventos ainda não exibidos ficam em uma fila que
+a GUI consome em lotes. Tudo também é persistido em `logs/serverflow.log`, com
+rotação por tamanho.
+"""
+
+import collections
+import heapq
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+SYSTEM_SOURCE = "ServerFlow"  # Origem dos eventos que não pertencem a um servidor
+
+DEFAULT_LOG_PATH = os.path.join("logs", "serverflow.log")
+
+
+class SystemEvent:
+    """Um evento do log do sistema."""
+
+    __slots__ = ("seq", "timestamp", "server", "level", "message")
+
+    def __init__(self, seq, timestamp, server, level, message):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.server = server
+        self.level = level
+        self.message = message
+
+    def format(self):
+        clock = time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+        return f"[{clock}] [{self.level}] [{self.server}] {self.message}"
+
+
+class EventStore:
+    """Armazena eventos com capacidade fixa e índices por servidor e severidade."""
+
+    def __init__(
+        self,
+        max_events=5000,
+        log_path=DEFAULT_LOG_PATH,
+        max_bytes=2 * 1024 * 1024,
+        backup_count=3,
+        max_pending=10000,
+    ):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._events = collections.deque()
+        self._by_server = {}
+        self._by_level = {level: collections.deque() for level in LEVELS}
+        self._pending = collections.deque(maxlen=max_pending)
+        self._dropped_pending = 0
+        self._logger = self._build_logger(log_path, max_bytes, backup_count)
+
+    def _build_logger(self, log_path, max_bytes, backup_count):
+        """Cria o logger persistente; a escrita em disco fica em uma thread própria."""
+        logger = logging.getLogger("serverflow.events")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        self._listener = None
+        if not log_path:
+            return logger
+        try:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+            )
+        except OSError as e:
+            print(f"Erro ao abrir {log_path}: {e}")
+            return logger
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s [%(server)s] %(message)s")
+        )
+        records = queue.SimpleQueue()
+        for old_handler in list(logger.handlers):
+            logger.removeHandler(old_handler)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        return logger
+
+    def close(self):
+        """Grava os eventos pendentes em disco e encerra a thread de escrita."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def add(self, server, level, message):
+        """Registra um evento. Pode ser chamado de qualquer thread."""
+        level = level if level in LEVELS else "INFO"
+        server = server or SYSTEM_SOURCE
+        message = message.rstrip("\n")
+        with self._lock:
+            self._seq += 1
+            event = SystemEvent(self._seq, time.time(), server, level, message)
+            if len(self._events) >= self.max_events:
+                # O mais antigo também é o primeiro dos índices dele
+                evicted = self._events.popleft()
+                self._by_server[evicted.server].popleft()
+                self._by_level[evicted.level].popleft()
+            self._events.append(event)
+            index = self._by_server.get(server)
+            if index is None:
+                index = self._by_server[server] = collections.deque()
+            index.append(event)
+            self._by_level[level].append(event)
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped_pending += 1
+            self._pending.append(event)
+        self._logger.log(getattr(logging, level), message, extra={"server": server})
+        return event
+
+    def drain_pending(self):
+        """Retorna (eventos ainda não exibidos, quantos foram descartados da fila)."""
+        with self._lock:
+            events = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped_pending = self._dropped_pending, 0
+        return events, dropped
+
+    def servers(self):
+        """Nomes das origens que já registraram eventos."""
+        with self._lock:
+            return sorted(self._by_server)
+
+    def query(self, server=None, min_level=None, limit=None):
+        """Retorna eventos em ordem, filtrados por servidor e severidade mínima.
+
+        Usa os índices: o filtro de servidor lê apenas o deque daquele servidor e
+        o de severidade mescla os deques das severidades aceitas.
+        """
+        levels = LEVELS[LEVELS.index(min_level) :] if min_level in LEVELS else None
+        with self._lock:
+            if server is not None:
+                source = [
+                    e
+                    for e in self._by_server.get(server, ())
+                    if levels is None or e.level in levels
+                ]
+            elif levels is not None:
+                source = list(
+                    heapq.merge(
+                        *(self._by_level[level] for level in levels),
+                        key=lambda e: e.seq,
+                    )
+                )
+            else:
+                source = list(self._events)
+        if limit is not None:
+            source = source[-limit:]
+        return source
+
+    def matches(self, event, server=None, min_level=None):
+        """Indica se um evento passa pelo filtro (comparando atributos, não texto)."""
+        if server is not None and event.server != server:
+            return False
+        if min_level in LEVELS and LEVELS.index(event.level) < LEVELS.index(min_level):
+            return False
+        return True
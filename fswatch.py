@@ -0,0 +1,461 @@
+"""Observação de arquivos com inotify (Linux) e fallback por polling de mtime.
+
+O inotify é acessado via ctypes, sem dependências externas. Quando não está
+disponível (outras plataformas, limite de watches atingido), os observadores
+caem automaticamente para polling de `os.stat`.
+
+`FileWatcher` observa um único arquivo (a configuração); `TreeWatcher` observa
+árvores de código-fonte inteiras e agrupa rajadas de mudanças em uma chamada.
+"""
+
+import ctypes
+import ctypes.util
+import errno as errno_codes
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+
+# Máscaras de eventos do inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Wrapper mínimo sobre inotify_init1/inotify_add_watch/read."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify só está disponível no Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask):
+        """Adiciona um watch e retorna seu descritor (wd)."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def remove_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """Espera até `timeout` segundos e retorna [(wd, mask, nome)]."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileWatcher:
+    """Chama `callback()` quando um arquivo é modificado, criado ou substituído.
+
+    Observa o diretório pai para pegar também editores que salvam gravando um
+    arquivo temporário e renomeando. Eventos próximos são agrupados (debounce).
+    """
+
+    def __init__(self, path, callback, poll_interval=1.0, debounce=0.2):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.backend = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        inotify = None
+        try:
+            inotify = Inotify()
+            inotify.add_watch(
+                os.path.dirname(self.path),
+                IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ATTRIB,
+            )
+            self.backend = "inotify"
+        except OSError:
+            if inotify:
+                inotify.close()
+            inotify = None
+            self.backend = "polling"
+        self._thread = threading.Thread(
+            target=self._run_inotify if inotify else self._run_polling,
+            args=(inotify,) if inotify else (),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run_inotify(self, inotify):
+        name = os.path.basename(self.path)
+        try:
+            while not self._stop_event.is_set():
+                events = inotify.read_events(0.5)
+                if not any(n == name or m & IN_Q_OVERFLOW for _, m, n in events):
+                    continue
+                # Agrupa a rajada de eventos de um salvamento em uma única chamada
+                while inotify.read_events(self.debounce):
+                    pass
+                self._notify()
+        finally:
+            inotify.close()
+
+    def _run_polling(self):
+        last = _stat_signature(self.path)
+        while not self._stop_event.wait(self.poll_interval):
+            current = _stat_signature(self.path)
+            if current != last:
+                last = current
+                self._notify()
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"Erro no callback do observador de '{self.path}': {e}")
+
+
+# Diretórios e arquivos que nunca disparam reinício (gerados, VCS, editores)
+DEFAULT_IGNORE = (
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "__pycache__",
+    ".serverflow-cache",
+    "logs",
+    "*.log",
+    "*.swp",
+    "*.swx",
+    "*~",
+    ".#*",
+    "*.tmp",
+)
+
+TREE_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+
+
+class TreeWatcher:
+    """Chama `callback(paths)` com os arquivos alterados dentro de `roots`.
+
+    - `globs`: só arquivos que casam (pelo nome ou caminho relativo) contam;
+      vazio = todos;
+    - `ignore`: nomes/padrões de arquivos e diretórios ignorados (os diretórios
+      ignorados nem são percorridos);
+    - eventos são acumulados até passarem `debounce` segundos sem novidades,
+      por mais que a rajada dure, então um `git checkout` de milhares de
+      arquivos vira uma única chamada.
+
+    Com inotify há um watch por diretório e nada é varrido periodicamente. No
+    fallback por polling, cada ciclo confere o mtime de todos os diretórios (só
+    os que mudaram são listados de novo) e no máximo `poll_batch` arquivos,
+    percorrendo a árvore aos poucos. Achada uma mudança, os arquivos dos
+    diretórios onde ela ocorreu são revistos a cada ciclo, e o aviso sai quando
+    tudo fica `debounce` segundos quieto, sem esperar a volta completa.
+    """
+
+    def __init__(
+        self,
+        roots,
+        callback,
+        globs=(),
+        ignore=DEFAULT_IGNORE,
+        debounce=0.3,
+        poll_interval=1.0,
+        poll_batch=2000,
+    ):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.callback = callback
+        self.globs = tuple(globs)
+        self.ignore = tuple(ignore)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.poll_batch = poll_batch
+        self.backend = None
+        self.watched_dirs = 0
+        self.batches_total = 0
+        self._dirs = {}  # wd -> diretório (inotify)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        inotify = None
+        try:
+            inotify = Inotify()
+            self._dirs = {}
+            for root in self.roots:
+                self._add_tree(inotify, root, None)
+            self.backend = "inotify"
+        except OSError:
+            # Sem inotify ou sem watches suficientes (fs.inotify.max_user_watches)
+            if inotify:
+                inotify.close()
+            inotify = None
+            self.backend = "polling"
+        self._thread = threading.Thread(
+            target=self._run_inotify if inotify else self._run_polling,
+            args=(inotify,) if inotify else (),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    # --- Filtros ---
+
+    def _relative(self, path):
+        for root in self.roots:
+            if path == root or path.startswith(root + os.sep):
+                return os.path.relpath(path, root).replace(os.sep, "/")
+        return os.path.basename(path)
+
+    def _ignored(self, path):
+        name = os.path.basename(path)
+        rel = self._relative(path)
+        return any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel, pattern)
+            for pattern in self.ignore
+        )
+
+    def _relevant(self, path):
+        if self._ignored(path):
+            return False
+        if not self.globs:
+            return True
+        name = os.path.basename(path)
+        rel = self._relative(path)
+        return any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel, pattern)
+            for pattern in self.globs
+        )
+
+    def _scan(self, directory):
+        """Retorna (subdiretórios não ignorados, arquivos relevantes) de um diretório."""
+        dirs, files = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if not self._ignored(entry.path):
+                            dirs.append(entry.path)
+                    elif self._relevant(entry.path):
+                        files.append(entry.path)
+        except OSError:
+            pass
+        return dirs, files
+
+    # --- inotify ---
+
+    def _add_tree(self, inotify, root, found):
+        """Adiciona watches em `root` e subdiretórios; arquivos já existentes vão
+        para `found` (diretórios criados depois do início, ex: por um checkout)."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                wd = inotify.add_watch(directory, TREE_MASK)
+            except OSError as e:
+                if e.errno == errno_codes.ENOSPC:
+                    raise  # Limite de watches: o chamador decide o fallback
+                continue  # Removido nesse meio-tempo ou sem permissão
+            self._dirs[wd] = directory
+            dirs, files = self._scan(directory)
+            stack.extend(dirs)
+            if found is not None:
+                found.update(files)
+        self.watched_dirs = len(self._dirs)
+
+    def _run_inotify(self, inotify):
+        pending = set()
+        try:
+            while not self._stop_event.is_set():
+                events = inotify.read_events(self.debounce if pending else 0.5)
+                for wd, mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        # Eventos perdidos: não dá para saber o que mudou
+                        pending.update(self.roots)
+                        continue
+                    if mask & IN_IGNORED:
+                        self._dirs.pop(wd, None)
+                        continue
+                    directory = self._dirs.get(wd)
+                    if directory is None:
+                        continue
+                    path = os.path.join(directory, name)
+                    if mask & IN_ISDIR:
+                        if self._ignored(path):
+                            continue
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            try:
+                                self._add_tree(inotify, path, pending)
+                            except OSError:
+                                pass  # Sem watches: o diretório novo fica de fora
+                        else:
+                            pending.add(path)
+                    elif self._relevant(path):
+                        pending.add(path)
+                if pending and not events:
+                    self._notify(pending)
+                    pending = set()
+        finally:
+            inotify.close()
+
+    # --- Polling incremental ---
+
+    def _run_polling(self):
+        signatures = {}  # caminho -> assinatura do stat
+        dirs = set()
+        children = {}  # diretório -> arquivos conhecidos dentro dele
+        pending = set()
+        hot = set()  # Diretórios com mudanças no lote atual
+
+        def add_file(path):
+            signatures[path] = _stat_signature(path)
+            children.setdefault(os.path.dirname(path), set()).add(path)
+
+        def add_tree(root, report):
+            stack = [root]
+            while stack:
+                directory = stack.pop()
+                dirs.add(directory)
+                signatures[directory] = _stat_signature(directory)
+                subdirs, files = self._scan(directory)
+                stack.extend(d for d in subdirs if d not in dirs)
+                for path in files:
+                    if path not in signatures:
+                        add_file(path)
+                        if report:
+                            pending.add(path)
+
+        def check(path):
+            """Compara a assinatura de `path`; True se ele mudou."""
+            if path not in signatures:
+                return False
+            current = _stat_signature(path)
+            if current == signatures[path]:
+                return False
+            signatures[path] = current
+            if path not in dirs:
+                pending.add(path)
+                hot.add(os.path.dirname(path))
+                if current is None:
+                    del signatures[path]
+                    children.get(os.path.dirname(path), set()).discard(path)
+                return True
+            if current is None:
+                # Diretório removido: esquece tudo abaixo dele
+                prefix = path + os.sep
+                for known in [p for p in signatures if p.startswith(prefix)]:
+                    del signatures[known]
+                    dirs.discard(known)
+                    children.pop(known, None)
+                del signatures[path]
+                dirs.discard(path)
+                children.pop(path, None)
+                pending.add(path)
+                return True
+            # Entradas criadas ou removidas mudam o mtime do diretório
+            hot.add(path)
+            add_tree(path, report=True)
+            return True
+
+        for root in self.roots:
+            add_tree(root, report=False)
+        self.watched_dirs = len(dirs)
+        order = [path for path in signatures if path not in dirs]
+        cursor = 0
+        while not self._stop_event.wait(
+            self.debounce if pending else self.poll_interval
+        ):
+            changed = False
+            # Diretórios a cada ciclo: arquivos criados, removidos ou salvos
+            # por renomeação (a maioria dos editores) aparecem na hora
+            for directory in list(dirs):
+                changed = check(directory) or changed
+            # Onde algo acabou de mudar, o resto da rajada é visto já no
+            # próximo ciclo, em vez de só na próxima volta pela árvore
+            for directory in list(hot):
+                for path in list(children.get(directory, ())):
+                    changed = check(path) or changed
+            for _ in range(min(self.poll_batch, len(order))):
+                if cursor >= len(order):
+                    cursor = 0
+                    # Incorpora entradas novas/removidas
+                    order = [path for path in signatures if path not in dirs]
+                    if not order:
+                        break
+                path = order[cursor]
+                cursor += 1
+                changed = check(path) or changed
+            self.watched_dirs = len(dirs)
+            if pending and not changed:
+                self._notify(pending)
+                pending.clear()
+                hot.clear()
+
+    def _notify(self, paths):
+        self.batches_total += 1
+        try:
+            self.callback(sorted(paths))
+        except Exception as e:
+            print(f"Erro no callback do observador de {self.roots}: {e}")
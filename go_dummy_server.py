@@ -1,33 +1,163 @@
 
+import argparse
+import asyncio
+import datetime
 import http.server
-import socketserver
 import os
 import signal
+import socketserver
 import sys
-import datetime
+import time
+
+SERVER_LABEL = "Dummy Go Server"
+DEFAULT_PORT = 8080
+# Tamanho da mensagem padrão (o horário tem largura fixa): o menor corpo possível
+MIN_RESPONSE_SIZE = len(f"Hello from {SERVER_LABEL} (Python)! Time: 00:00:00\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=f"{SERVER_LABEL} (Python)")
+    parser.add_argument(
+        "port", nargs="?", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT))
+    )
+    parser.add_argument("--port", dest="port_option", type=int, default=None)
+    parser.add_argument(
+        "--mode",
+        choices=("threaded", "asyncio", "single"),
+        default=os.environ.get("DUMMY_MODE", "threaded"),
+    )
+    parser.add_argument(
+        "--response-size",
+        type=int,
+        default=int(os.environ.get("DUMMY_RESPONSE_SIZE", "0")),
+        help="Tamanho do corpo da resposta em bytes (0 = mensagem curta; "
+        f"mínimo {MIN_RESPONSE_SIZE})",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=float(os.environ.get("DUMMY_LATENCY_MS", "0")),
+        help="Latência artificial por requisição",
+    )
+    args = parser.parse_args()
+    if args.port_option is not None:
+        args.port = args.port_option
+    if args.response_size and args.response_size < MIN_RESPONSE_SIZE:
+        parser.error(
+            f"--response-size deve ser 0 ou pelo menos {MIN_RESPONSE_SIZE} "
+            "(o tamanho da mensagem padrão)"
+        )
+    return args
+
+
+ARGS = parse_args()
+HEALTH_BODY = b'{"status": "ok"}\n'
+
+
+def build_body(path):
+    """Retorna (content-type, corpo) para o caminho requisitado."""
+    if path.split("?", 1)[0] == "/health":
+        return "application/json", HEALTH_BODY
+    message = (
+        f"Hello from {SERVER_LABEL} (Python)! "
+        f"Time: {datetime.datetime.now().strftime('%H:%M:%S')}\n"
+    ).encode("utf-8")
+    if ARGS.response_size > len(message):
+        message += b"." * (ARGS.response_size - len(message) - 1) + b"\n"
+    return "text/plain", message
+
 
-PORT = 8080
+class DummyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Mantém a conexão aberta (keep-alive)
+    disable_nagle_algorithm = True  # Evita atraso de ~40 ms entre cabeçalho e corpo
 
-class MyGoHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
+        if ARGS.latency_ms:
+            time.sleep(ARGS.latency_ms / 1000)
+        content_type, body = build_body(self.path)
         self.send_response(200)
-        self.send_header("Content-type", "text/plain")
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(f"Hello from Dummy Go Server (Python)! Time: {datetime.datetime.now().strftime('%H:%M:%S')}\n".encode('utf-8'))
+        self.wfile.write(body)
 
     def log_message(self, format, *args):
         # Suppress HTTP request logging
         pass
 
+
+class ThreadedServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SingleServer(http.server.HTTPServer):
+    allow_reuse_address = True
+
+
+async def handle_connection(reader, writer):
+    """Atende requisições HTTP/1.1 em uma conexão keep-alive (modo asyncio)."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = not request_line.rstrip().endswith(b"HTTP/1.0")
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "connection":
+                    keep_alive = value.strip().lower() != "close"
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if ARGS.latency_ms:
+                await asyncio.sleep(ARGS.latency_ms / 1000)
+            content_type, body = build_body(path)
+            writer.write(
+                (
+                    "HTTP/1.1 200 OK\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_asyncio():
+    server = await asyncio.start_server(handle_connection, "", ARGS.port)
+    async with server:
+        await server.serve_forever()
+
+
 def start_server():
-    with socketserver.TCPServer(("", PORT), MyGoHandler) as httpd:
-        print(f"Dummy Go Server (Python) running on port {PORT}")
+    print(
+        f"{SERVER_LABEL} (Python) running on port {ARGS.port} "
+        f"(mode={ARGS.mode}, response_size={ARGS.response_size}, "
+        f"latency_ms={ARGS.latency_ms:g})"
+    )
+    if ARGS.mode == "asyncio":
+        asyncio.run(serve_asyncio())
+        return
+    server_class = ThreadedServer if ARGS.mode == "threaded" else SingleServer
+    with server_class(("", ARGS.port), DummyHandler) as httpd:
         httpd.serve_forever()
 
+
 def signal_handler(sig, frame):
-    print("Dummy Go Server received signal. Exiting...")
+    print(f"{SERVER_LABEL} received signal. Exiting...")
     sys.exit(0)
 
+
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -0,0 +1,58 @@
+"""Ações em grupo: iniciar, parar ou reiniciar vários servidores de uma vez.
+
+Os servidores de um grupo (ou com uma tag) são processados em paralelo por um
+pool limitado de threads, já que cada ação passa a maior parte do tempo
+esperando (o processo subir, a porta abrir, o processo terminar). O progresso
+agregado é informado a cada servidor concluído e o tempo total da operação fica
+em `elapsed`.
+"""
+
+import concurrent.futures
+import time
+
+DEFAULT_WORKERS = 4  # Servidores processados ao mesmo tempo
+
+
+class BulkOperation:
+    """Executa `action(server)` para cada servidor, em paralelo.
+
+    `action` retorna True se a ação deu certo; exceções contam como falha.
+    `on_progress(operation)` é chamado (na thread do pool) após cada servidor.
+    """
+
+    def __init__(self, servers, action, max_workers=DEFAULT_WORKERS, on_progress=None):
+        self.servers = list(servers)
+        self.action = action
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self.done = 0
+        self.failed = []  # (nome, motivo) dos servidores em que a ação falhou
+        self.elapsed = None  # Segundos da operação inteira, ao terminar
+
+    @property
+    def total(self):
+        return len(self.servers)
+
+    def run(self):
+        """Executa a ação em todos os servidores e espera terminar; retorna self."""
+        t0 = time.perf_counter()
+        if self.servers:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(self.servers)),
+                thread_name_prefix="grupo",
+            ) as pool:
+                futures = {
+                    pool.submit(self.action, server): server for server in self.servers
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    server = futures[future]
+                    try:
+                        if not future.result():
+                            self.failed.append((server.name, "não concluiu"))
+                    except Exception as e:
+                        self.failed.append((server.name, str(e)))
+                    self.done += 1
+                    if self.on_progress:
+                        self.on_progress(self)
+        self.elapsed = time.perf_counter() - t0
+        return self
@@ -0,0 +1,248 @@
+"""Histórico persistente das execuções dos servidores em um banco SQLite local.
+
+Cada execução (do início do processo até ele terminar) vira uma linha da tabela
+`runs`. As inserções passam por uma fila e são gravadas em lotes por uma thread
+própria, em uma única transação por lote, para não bloquear a supervisão dos
+processos. Os índices por servidor e por horário de início deixam as consultas
+da aba "Histórico" (quedas na semana, tendência do tempo de partida) rápidas
+mesmo com muitas execuções.
+"""
+
+import os
+import queue
+import sqlite3
+import statistics
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join("logs", "history.sqlite3")
+
+# Motivos de parada gravados em `stop_reason`
+STOP_MANUAL = "parado"  # Botão Parar / encerramento pela GUI
+STOP_RESTART = "reinício"  # Substituído por um reinício
+STOP_IDLE = "ocioso"  # Parado por ociosidade (modo sob demanda)
+STOP_EXITED = "saiu"  # Terminou sozinho com código 0
+STOP_CRASH = "queda"  # Terminou sozinho com código diferente de 0
+
+COLUMNS = (
+    "server",
+    "started_at",
+    "stopped_at",
+    "ready_seconds",
+    "exit_code",
+    "stop_reason",
+    "restarts",
+    "peak_rss_bytes",
+    "stdout_lines",
+    "stderr_lines",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    server TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    stopped_at REAL,
+    ready_seconds REAL,
+    exit_code INTEGER,
+    stop_reason TEXT,
+    restarts INTEGER NOT NULL DEFAULT 0,
+    peak_rss_bytes INTEGER,
+    stdout_lines INTEGER NOT NULL DEFAULT 0,
+    stderr_lines INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_server_started ON runs (server, started_at);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+"""
+
+
+class RunHistory:
+    """Grava execuções em lote e responde às consultas da GUI.
+
+    `record()` pode ser chamado de qualquer thread antes ou depois de `start()`;
+    as consultas abrem uma conexão de leitura por thread (modo WAL, então não
+    esperam a thread de escrita).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=200, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written_total = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start(self):
+        """Cria o banco (se preciso) e inicia a thread de escrita.
+
+        Levanta sqlite3.Error/OSError se o arquivo não puder ser aberto.
+        """
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Grava o que estiver na fila e encerra a thread de escrita."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def record(self, **run):
+        """Enfileira uma execução; campos ausentes ficam com o padrão da tabela."""
+        self._queue.put(tuple(run.get(column) for column in COLUMNS))
+
+    def _run(self):
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        insert = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            # Junta o que já estiver na fila em uma única transação
+            while True:
+                if item is None:
+                    closing = True
+                else:
+                    batch.append(item)
+                if closing or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                with conn:
+                    conn.executemany(insert, batch)
+                self.written_total += len(batch)
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar o histórico de execuções: {e}")
+        conn.close()
+
+    # --- Consultas ---
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @staticmethod
+    def _filter(server, since):
+        clauses, params = [], []
+        if server is not None:
+            clauses.append("server = ?")
+            params.append(server)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def servers(self):
+        """Nomes dos servidores com execuções gravadas."""
+        rows = self._reader().execute("SELECT DISTINCT server FROM runs ORDER BY 1")
+        return [row[0] for row in rows]
+
+    def recent(self, server=None, since=None, limit=200):
+        """Execuções mais recentes primeiro."""
+        where, params = self._filter(server, since)
+        return (
+            self._reader()
+            .execute(
+                f"SELECT * FROM runs{where} ORDER BY started_at DESC LIMIT ?",
+                params + [limit],
+            )
+            .fetchall()
+        )
+
+    def summary(self, server=None, since=None):
+        """Por servidor: execuções, quedas, mediana e p95 do tempo até pronto,
+        maior pico de memória e início mais recente."""
+        where, params = self._filter(server, since)
+        totals = (
+            self._reader()
+            .execute(
+                f"SELECT server, COUNT(*) AS runs, "
+                f"SUM(stop_reason = ?) AS crashes, "
+                f"MAX(peak_rss_bytes) AS peak_rss_bytes, "
+                f"MAX(started_at) AS last_started_at "
+                f"FROM runs{where} GROUP BY server ORDER BY server",
+                [STOP_CRASH, *params],
+            )
+            .fetchall()
+        )
+        ready = {}
+        for row in self._reader().execute(
+            f"SELECT server, ready_seconds FROM runs{where}"
+            f"{' AND' if where else ' WHERE'} ready_seconds IS NOT NULL",
+            params,
+        ):
+            ready.setdefault(row[0], []).append(row[1])
+        result = []
+        for row in totals:
+            values = sorted(ready.get(row["server"], ()))
+            result.append(
+                {
+                    **dict(row),
+                    "median_ready_seconds": (
+                        statistics.median(values) if values else None
+                    ),
+                    "p95_ready_seconds": (
+                        values[min(len(values) - 1, int(len(values) * 0.95))]
+                        if values
+                        else None
+                    ),
+                }
+            )
+        return result
+
+    def ready_trend(self, server, since=None):
+        """Mediana diária do tempo até pronto: lista de (dia, mediana, execuções)."""
+        where, params = self._filter(server, since)
+        days = {}
+        for row in self._reader().execute(
+            f"SELECT date(started_at, 'unixepoch', 'localtime'), ready_seconds "
+            f"FROM runs{where}{' AND' if where else ' WHERE'} "
+            f"ready_seconds IS NOT NULL ORDER BY started_at",
+            params,
+        ):
+            days.setdefault(row[0], []).append(row[1])
+        return [
+            (day, statistics.median(values), len(values))
+            for day, values in days.items()
+        ]
+
+
+def stop_reason_for(exit_code, requested=None):
+    """Motivo gravado: o pedido (parar, reinício, ocioso) ou, se o processo
+    terminou sozinho, saída normal ou queda conforme o código."""
+    if requested:
+        return requested
+    return STOP_EXITED if exit_code == 0 else STOP_CRASH
+
+
+def period_start(days):
+    """Timestamp de `days` dias atrás (None = sem limite)."""
+    return None if days is None else time.time() - days * 86400
@@ -0,0 +1,256 @@
+"""Importação em lote de servidores a partir de um Procfile ou de um arquivo no
+estilo docker-compose (YAML ou JSON).
+
+- Procfile: uma linha `nome: comando` por processo; o diretório de trabalho é
+  o do próprio Procfile.
+- compose: o mapa `services` (ou o documento inteiro, se não houver a chave),
+  com `command` (texto ou lista, precedido de `entrypoint`), `working_dir` /
+  `cwd` / `build`, `environment` (mapa ou lista `CHAVE=valor`), `ports` (a
+  porta de destino da primeira entrada vira a porta esperada: fora de um
+  contêiner o processo escuta nela diretamente) e `depends_on`.
+
+O resultado são entradas no mesmo formato de `server_configs.json`, já em
+ordem de dependência (cada serviço depois dos que ele depende), então quem
+importa só precisa criar os `Server` e registrá-los de uma vez. Nomes que já
+existem (consultados no índice por nome do registro) ou repetidos no arquivo
+são pulados e listados em `skipped`, sem interromper a importação.
+
+YAML requer o PyYAML; sem ele, só JSON e Procfile.
+"""
+
+import json
+import os
+import re
+import shlex
+
+try:
+    import yaml
+except ImportError:  # Opcional: sem PyYAML, compose só em JSON
+    yaml = None
+
+PROCFILE_LINE = re.compile(r"^([A-Za-z0-9_.-]+)\s*:\s*(.+)$")
+YAML_EXTENSIONS = (".yml", ".yaml")
+
+
+class ImportResult:
+    """Entradas de configuração importadas e o que ficou de fora."""
+
+    def __init__(self, source):
+        self.source = source
+        self.entries = []  # Dicionários no formato de server_configs.json
+        self.skipped = []  # (nome, motivo)
+        self.warnings = []
+
+    def format(self):
+        """Resumo em texto para exibir em um único diálogo."""
+        lines = [f"{len(self.entries)} servidores importados de {self.source}."]
+        if self.skipped:
+            lines.append(f"\n{len(self.skipped)} pulados:")
+            lines.extend(f"  {name}: {reason}" for name, reason in self.skipped)
+        if self.warnings:
+            lines.append("\nAvisos:")
+            lines.extend(f"  {warning}" for warning in self.warnings)
+        return "\n".join(lines)
+
+
+def parse_procfile(text):
+    """[(nome, comando)] das linhas de um Procfile. Levanta ValueError."""
+    processes = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = PROCFILE_LINE.match(line)
+        if match is None:
+            raise ValueError(f"Linha {number} do Procfile inválida: '{line}'")
+        processes.append((match.group(1), match.group(2).strip()))
+    return processes
+
+
+def _command(spec):
+    parts = []
+    for key in ("entrypoint", "command"):
+        value = spec.get(key)
+        if isinstance(value, list):
+            parts.append(shlex.join(str(item) for item in value))
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def _working_dir(spec, base_dir):
+    path = spec.get("working_dir") or spec.get("cwd")
+    build = spec.get("build")
+    if not path and build:
+        path = build.get("context") if isinstance(build, dict) else build
+    if not path:
+        return base_dir
+    return os.path.normpath(os.path.join(base_dir, os.path.expanduser(str(path))))
+
+
+def _environment(spec):
+    env = spec.get("environment") or {}
+    if isinstance(env, list):
+        pairs = (str(item).partition("=") for item in env)
+        env = {key: value for key, has_value, value in pairs if has_value}
+    # "CHAVE:" sem valor no compose herda do ambiente; aqui o ambiente já é herdado
+    return {str(key): str(value) for key, value in env.items() if value is not None}
+
+
+def _first_port(text):
+    text = str(text).split("-", 1)[0]  # Intervalos: a primeira porta
+    return int(text) if text.isdigit() else None
+
+
+def parse_port(entry):
+    """(porta publicada, porta do processo) de uma entrada de `ports`
+    ("8080:80", "127.0.0.1:8080:80", "3000", 3000 ou {"published", "target"});
+    sem publicação explícita as duas são iguais. None onde não houver."""
+    if isinstance(entry, dict):
+        target = _first_port(entry.get("target", ""))
+        return _first_port(entry.get("published", "")) or target, target
+    parts = str(entry).split("/", 1)[0].split(":")  # "8080:80/tcp"
+    target = _first_port(parts[-1])
+    published = _first_port(parts[-2]) if len(parts) > 1 else target
+    return published, target
+
+
+def _depends_on(spec):
+    depends = spec.get("depends_on") or []
+    if isinstance(depends, dict):
+        return list(depends)
+    return [str(name) for name in depends]
+
+
+def _dependency_order(services, existing, result):
+    """Ordena os nomes de `services` com as dependências antes (busca em
+    profundidade sem recursão: cadeias longas não estouram a pilha). Ciclos e
+    nomes desconhecidos geram avisos e mantêm a ordem do arquivo."""
+    skipped = {name for name, _ in result.skipped}
+    order = []
+    done = set()
+    for first in services:
+        if first in done:
+            continue
+        stack = [(first, iter(services[first]["depends_on"]))]
+        visiting = {first}
+        while stack:
+            name, pending = stack[-1]
+            for dependency in pending:
+                if dependency not in services:
+                    if dependency not in existing and dependency not in skipped:
+                        result.warnings.append(
+                            f"'{name}' depende de '{dependency}', que não está "
+                            "no arquivo."
+                        )
+                elif dependency in visiting:
+                    path = [entry for entry, _ in stack]
+                    cycle = path[path.index(dependency) :] + [dependency]
+                    result.warnings.append(
+                        f"Dependência circular: {' -> '.join(cycle)}"
+                    )
+                elif dependency not in done:
+                    visiting.add(dependency)
+                    stack.append((dependency, iter(services[dependency]["depends_on"])))
+                    break
+            else:
+                stack.pop()
+                visiting.discard(name)
+                done.add(name)
+                order.append(name)
+    return order
+
+
+def _load_compose(path, text):
+    if path.lower().endswith(YAML_EXTENSIONS):
+        if yaml is None:
+            raise ValueError("Instale o PyYAML para importar YAML (ou use JSON).")
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"YAML inválido: {e}") from None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido: {e}") from None
+
+
+def is_procfile(path):
+    return os.path.basename(path).lower().startswith("procfile")
+
+
+def import_file(path, existing=(), group=None):
+    """Lê `path` e retorna um ImportResult.
+
+    `existing` é consultado com `nome in existing` (o registro usa o índice por
+    nome). `group` é o grupo dado aos servidores; por padrão o `name` do
+    compose ou o nome do diretório do arquivo. Levanta ValueError (ou OSError)
+    se o arquivo não puder ser lido.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    base_dir = os.path.dirname(os.path.abspath(path))
+    result = ImportResult(os.path.basename(path))
+    services = {}
+
+    if is_procfile(path):
+        specs = [(name, {"command": command}) for name, command in parse_procfile(text)]
+        project = None
+    else:
+        data = _load_compose(path, text)
+        if not isinstance(data, dict):
+            raise ValueError("O arquivo deve conter um mapa de serviços.")
+        project = data.get("name") if "services" in data else None
+        data = data.get("services", data)
+        if not isinstance(data, dict):
+            raise ValueError("'services' deve ser um mapa de nome para serviço.")
+        specs = list(data.items())
+    if group is None:
+        group = str(project or os.path.basename(base_dir))
+
+    for name, spec in specs:
+        name = str(name)
+        if not isinstance(spec, dict):
+            result.skipped.append((name, "definição não é um mapa"))
+            continue
+        if name in services:
+            result.skipped.append((name, "nome repetido no arquivo"))
+            continue
+        if name in existing:
+            result.skipped.append((name, "já existe um servidor com esse nome"))
+            continue
+        command = _command(spec)
+        if not command:
+            result.skipped.append((name, "sem command (só image não é suportado)"))
+            continue
+        # Sem contêiner não há mapeamento: o processo escuta na porta de destino
+        ports = [parse_port(entry) for entry in spec.get("ports") or []]
+        ports = [(published, target) for published, target in ports if target]
+        entry = {
+            "name": name,
+            "command": command,
+            "working_dir": _working_dir(spec, base_dir),
+            "autostart": False,
+            "expected_port": ports[0][1] if ports else None,
+        }
+        env = _environment(spec)
+        if env:
+            entry["env"] = env
+        if group:
+            entry["group"] = group
+        if len(ports) > 1:
+            result.warnings.append(
+                f"'{name}' declara {len(ports)} portas; usada a {ports[0][1]}."
+            )
+        if ports and ports[0][0] != ports[0][1]:
+            result.warnings.append(
+                f"'{name}' publica {ports[0][0]} -> {ports[0][1]}; sem contêiner "
+                f"o processo é acessado direto na {ports[0][1]}."
+            )
+        services[name] = {"entry": entry, "depends_on": _depends_on(spec)}
+
+    result.entries = [
+        services[name]["entry"]
+        for name in _dependency_order(services, existing, result)
+    ]
+    return result
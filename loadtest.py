@@ -0,0 +1,310 @@
+"""Gerador de carga HTTP embutido para testar rapidamente os servidores gerenciados.
+
+Usa um pool de threads em que cada worker mantém uma conexão keep-alive própria
+(http.client). A carga pode ser limitada por concorrência (padrão) ou por uma
+taxa alvo em requisições por segundo, dividida entre os workers.
+
+Também pode ser executado direto pela linha de comando, por exemplo contra os
+servidores dummy incluídos no projeto:
+
+    python loadtest.py 3000 --path / --concurrency 20 --duration 5
+
+`AvailabilityProbe` mede por quanto tempo a porta ficou sem responder enquanto
+algo acontece em paralelo (usado para reportar a indisponibilidade no reinício).
+"""
+
+import argparse
+import bisect
+import http.client
+import math
+import socket
+import threading
+import time
+
+# Limites superiores (em ms) dos baldes do histograma de latência
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LoadTestResult:
+    """Resultado agregado de uma execução de teste de carga."""
+
+    def __init__(self, url, concurrency, target_rate):
+        self.url = url
+        self.concurrency = concurrency
+        self.target_rate = target_rate
+        self.duration = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.latencies = []  # Latências (em segundos) das requisições bem-sucedidas
+        self.status_counts = {}
+        self.error_kinds = {}
+
+    @property
+    def throughput(self):
+        """Requisições concluídas por segundo."""
+        return self.requests / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def error_rate(self):
+        """Fração das requisições que falharam (erro de rede ou status >= 500)."""
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, p):
+        """Retorna o percentil `p` (0-100) das latências, em milissegundos."""
+        if not self.latencies:
+            return 0.0
+        index = math.ceil(p / 100 * len(self.latencies)) - 1
+        return self.latencies[min(max(index, 0), len(self.latencies) - 1)] * 1000
+
+    def histogram(self):
+        """Retorna uma lista de (rótulo do balde, contagem) das latências."""
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for latency in self.latencies:
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, latency * 1000)] += 1
+        labels = [f"<= {b} ms" for b in HISTOGRAM_BUCKETS_MS]
+        labels.append(f"> {HISTOGRAM_BUCKETS_MS[-1]} ms")
+        return list(zip(labels, counts))
+
+    def summary(self):
+        """Gera um relatório em texto para exibição na GUI ou no terminal."""
+        lines = [
+            f"URL: {self.url}",
+            f"Concorrência: {self.concurrency}"
+            + (f" | Taxa alvo: {self.target_rate:g} req/s" if self.target_rate else ""),
+            f"Duração: {self.duration:.2f} s",
+            f"Requisições: {self.requests} | Erros: {self.errors} ({self.error_rate:.2%})",
+            f"Throughput: {self.throughput:.1f} req/s"
+            f" | Recebido: {self.bytes_received / 1024:.1f} KiB",
+            f"Latência p50: {self.percentile(50):.2f} ms"
+            f" | p95: {self.percentile(95):.2f} ms"
+            f" | p99: {self.percentile(99):.2f} ms",
+        ]
+        if self.status_counts:
+            statuses = ", ".join(
+                f"{code}: {count}" for code, count in sorted(self.status_counts.items())
+            )
+            lines.append(f"Status HTTP: {statuses}")
+        if self.error_kinds:
+            kinds = ", ".join(f"{kind}: {count}" for kind, count in self.error_kinds.items())
+            lines.append(f"Tipos de erro: {kinds}")
+        lines.append("Histograma de latência:")
+        total = len(self.latencies) or 1
+        for label, count in self.histogram():
+            if count:
+                bar = "#" * max(1, int(40 * count / total))
+                lines.append(f"  {label:>10}  {count:>8}  {bar}")
+        return "\n".join(lines) + "\n"
+
+
+class _Pacer:
+    """Distribui horários de envio entre os workers para respeitar uma taxa alvo."""
+
+    def __init__(self, rate, start):
+        self.interval = 1.0 / rate
+        self.next_at = start
+        self.lock = threading.Lock()
+
+    def wait_turn(self, deadline, stop_event):
+        with self.lock:
+            send_at = self.next_at
+            self.next_at += self.interval
+        if send_at >= deadline:
+            return False
+        delay = send_at - time.perf_counter()
+        if delay > 0:
+            stop_event.wait(delay)
+        return not stop_event.is_set()
+
+
+def run_load_test(
+    port,
+    path="/",
+    host="localhost",
+    concurrency=10,
+    duration=10.0,
+    rate=None,
+    timeout=5.0,
+    stop_event=None,
+):
+    """Executa um teste de carga contra http://host:port/path e retorna um LoadTestResult.
+
+    `rate` (req/s) é opcional; sem ele cada worker envia o mais rápido possível.
+    `stop_event` permite interromper o teste antes do fim da duração.
+    """
+    if not path.startswith("/"):
+        path = "/" + path
+    concurrency = max(1, int(concurrency))
+    stop_event = stop_event or threading.Event()
+    result = LoadTestResult(f"http://{host}:{port}{path}", concurrency, rate)
+    result_lock = threading.Lock()
+
+    start = time.perf_counter()
+    deadline = start + duration
+    pacer = _Pacer(rate, start) if rate else None
+
+    def worker():
+        conn = None
+        latencies = []
+        statuses = {}
+        error_kinds = {}
+        requests = errors = received = 0
+        while not stop_event.is_set() and time.perf_counter() < deadline:
+            if pacer and not pacer.wait_turn(deadline, stop_event):
+                break
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=timeout)
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                response = conn.getresponse()
+                body = response.read()
+                elapsed = time.perf_counter() - t0
+                requests += 1
+                received += len(body)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status >= 500:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+                if response.will_close:
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException) as e:
+                requests += 1
+                errors += 1
+                kind = type(e).__name__
+                error_kinds[kind] = error_kinds.get(kind, 0) + 1
+                conn.close()
+                conn = None
+                if isinstance(e, (ConnectionRefusedError, socket.gaierror)):
+                    # Evita girar em falso quando o servidor nem está escutando
+                    stop_event.wait(0.05)
+        if conn is not None:
+            conn.close()
+        with result_lock:
+            result.requests += requests
+            result.errors += errors
+            result.bytes_received += received
+            result.latencies.extend(latencies)
+            for code, count in statuses.items():
+                result.status_counts[code] = result.status_counts.get(code, 0) + count
+            for kind, count in error_kinds.items():
+                result.error_kinds[kind] = result.error_kinds.get(kind, 0) + count
+
+    threads = [
+        threading.Thread(target=worker, daemon=True) for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result.duration = time.perf_counter() - start
+    result.latencies.sort()
+    return result
+
+
+class AvailabilityProbe:
+    """Mede a indisponibilidade de uma porta HTTP enquanto algo acontece (ex: um reinício).
+
+    Uma thread envia um GET em conexão nova a cada `interval` segundos. Qualquer
+    resposta conta como disponível, exceto 502/503/504 (gateway sem destino);
+    recusa, reset ou timeout contam como falha. `gap` é o maior intervalo entre
+    a última resposta boa antes de uma falha e a primeira boa depois dela.
+    `host_header` substitui o Host enviado (rota por nome no proxy reverso).
+    """
+
+    def __init__(
+        self,
+        port,
+        path="/",
+        host="localhost",
+        interval=0.02,
+        timeout=1.0,
+        host_header=None,
+    ):
+        self.port = port
+        self.path = path
+        self.host = host
+        self.host_header = host_header
+        self.interval = interval
+        self.timeout = timeout
+        self.probes = 0
+        self.failures = 0
+        self.gap = 0.0
+        self._down_since = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Para a medição e retorna o maior intervalo de indisponibilidade (s)."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._down_since is not None:
+            # Terminou ainda fora do ar: conta até agora
+            self.gap = max(self.gap, time.perf_counter() - self._down_since)
+        return self.gap
+
+    def _check(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            headers = {"Connection": "close"}
+            if self.host_header:
+                headers["Host"] = self.host_header
+            conn.request("GET", self.path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status not in (502, 503, 504)
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def _run(self):
+        last_ok = time.perf_counter()
+        while not self._stop_event.is_set():
+            ok = self._check()
+            now = time.perf_counter()
+            self.probes += 1
+            if ok:
+                if self._down_since is not None:
+                    self.gap = max(self.gap, now - self._down_since)
+                    self._down_since = None
+                last_ok = now
+            else:
+                self.failures += 1
+                if self._down_since is None:
+                    self._down_since = last_ok
+            self._stop_event.wait(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga HTTP do ServerFlow.")
+    parser.add_argument("port", type=int, help="Porta do servidor alvo")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    parser.add_argument("-r", "--rate", type=float, default=None, help="req/s alvo")
+    args = parser.parse_args()
+
+    result = run_load_test(
+        args.port,
+        path=args.path,
+        host=args.host,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        rate=args.rate,
+    )
+    print(result.summary(), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Agrupamento incremental das linhas de log em modelos (estilo Drain).
+
+Serviços ruidosos imprimem milhares de linhas quase iguais ("GET /api/x 200 3ms",
+"retry 4/10 ..."). O minerador transforma cada linha em um modelo, trocando
+as partes variáveis por `<*>`, e conta quantas linhas caíram em cada um:
+
+1. números, endereços, UUIDs e hexadecimais são mascarados por expressões
+   regulares;
+2. a linha é separada em palavras e procurada em uma árvore de profundidade
+   fixa (quantidade de palavras, depois as primeiras palavras), como no Drain;
+3. entre os modelos da folha, o mais parecido (fração de palavras iguais acima
+   de `similarity`) recebe a linha e tem as posições divergentes generalizadas;
+   se nenhum for parecido o bastante, um novo modelo é criado.
+
+A memória é limitada: há no máximo `max_templates` modelos por servidor (o
+menos recentemente visto é descartado) e cada linha é truncada em
+`MAX_TOKENS` palavras. O custo por linha é o das expressões regulares mais
+algumas buscas em dicionário e a comparação com os poucos modelos da folha.
+"""
+
+import re
+import threading
+import time
+
+WILDCARD = "<*>"
+DEFAULT_MAX_TEMPLATES = 500
+DEFAULT_SIMILARITY = 0.5
+DEFAULT_DEPTH = 2  # Palavras iniciais usadas para escolher a folha
+MAX_TOKENS = 64  # Palavras consideradas por linha
+MAX_CLUSTERS_PER_LEAF = 32
+SPIKE_WINDOW = 60  # Segundos em que um modelo novo conta como "recente"
+
+# Aplicadas em ordem; cada trecho reconhecido vira um único <*>
+MASKS = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+    r"|\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"
+    r"|\b0x[0-9a-fA-F]+\b"
+    r"|\b[0-9a-fA-F]{16,}\b"
+    r"|\b\d+(?:[.,:]\d+)*(?:ms|s|us|µs|ns|kb|mb|gb|b|%)?\b",
+    re.IGNORECASE,
+)
+
+
+class Template:
+    """Um modelo de linha e suas contagens."""
+
+    __slots__ = ("id", "key", "tokens", "count", "first_seen", "last_seen", "example")
+
+    def __init__(self, template_id, key, tokens, now, example):
+        self.id = template_id
+        self.key = key  # Folha da árvore onde o modelo está
+        self.tokens = tokens
+        self.count = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.example = example  # Primeira linha original do modelo
+
+    @property
+    def text(self):
+        return " ".join(self.tokens)
+
+
+def tokenize(line):
+    """Palavras da linha com as partes variáveis já mascaradas."""
+    return MASKS.sub(WILDCARD, line).split()[:MAX_TOKENS]
+
+
+def _similarity(template_tokens, tokens):
+    """Fração de posições iguais (posições <*> do modelo contam como iguais)."""
+    same = sum(1 for a, b in zip(template_tokens, tokens) if a == b or a == WILDCARD)
+    return same / len(tokens)
+
+
+class TemplateMiner:
+    """Minerador incremental; `add()` pode ser chamado de uma thread e as
+    consultas de outra."""
+
+    def __init__(
+        self,
+        max_templates=DEFAULT_MAX_TEMPLATES,
+        similarity=DEFAULT_SIMILARITY,
+        depth=DEFAULT_DEPTH,
+    ):
+        self.max_templates = max_templates
+        self.similarity = similarity
+        self.depth = depth
+        self.lines_total = 0
+        self.evicted_total = 0
+        self._tree = {}  # (quantidade de palavras, palavras iniciais) -> [Template]
+        self._templates = {}  # id -> Template (ordem = menos recente primeiro)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._templates)
+
+    def _leaf_key(self, tokens):
+        prefix = tuple(
+            WILDCARD if any(c.isdigit() for c in token) else token
+            for token in tokens[: self.depth]
+        )
+        return len(tokens), prefix
+
+    def add(self, line, now=None):
+        """Classifica uma linha; retorna o Template em que ela caiu (ou None
+        para linhas em branco)."""
+        tokens = tokenize(line)
+        if not tokens:
+            return None
+        now = time.time() if now is None else now
+        key = self._leaf_key(tokens)
+        with self._lock:
+            self.lines_total += 1
+            leaf = self._tree.setdefault(key, [])
+            best, best_score = None, 0.0
+            for template in leaf:
+                score = _similarity(template.tokens, tokens)
+                if score > best_score:
+                    best, best_score = template, score
+            if best is not None and best_score >= self.similarity:
+                if best_score < 1.0:
+                    best.tokens = [
+                        a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)
+                    ]
+                best.count += 1
+                best.last_seen = now
+                # Move para o fim: o início do dicionário é o menos recente
+                del self._templates[best.id]
+                self._templates[best.id] = best
+                return best
+            template = Template(self._next_id, key, tokens, now, line.rstrip("\n"))
+            self._next_id += 1
+            if len(leaf) >= MAX_CLUSTERS_PER_LEAF:
+                self._forget(min(leaf, key=lambda t: t.last_seen))
+            leaf.append(template)
+            self._templates[template.id] = template
+            if len(self._templates) > self.max_templates:
+                oldest = next(iter(self._templates.values()))
+                self._forget(oldest)
+            return template
+
+    def _forget(self, template):
+        """Descarta um modelo (chamar com o lock)."""
+        leaf = self._tree[template.key]
+        leaf.remove(template)
+        if not leaf:
+            del self._tree[template.key]
+        del self._templates[template.id]
+        self.evicted_total += 1
+
+    def top(self, limit=20):
+        """Modelos com mais linhas, em ordem decrescente."""
+        with self._lock:
+            templates = list(self._templates.values())
+        return sorted(templates, key=lambda t: t.count, reverse=True)[:limit]
+
+    def new_since(self, since, limit=20):
+        """Modelos surgidos desde `since` (timestamp), os mais frequentes primeiro
+        (`limit=None` retorna todos). Um pico de modelos novos costuma indicar um
+        erro começando."""
+        with self._lock:
+            templates = [t for t in self._templates.values() if t.first_seen >= since]
+        return sorted(templates, key=lambda t: t.count, reverse=True)[:limit]
@@ -0,0 +1,436 @@
+"""Métricas dos servidores gerenciados e endpoint local no formato texto do Prometheus.
+
+Os contadores ficam em um objeto ServerMetrics por servidor e são atualizados
+diretamente pelos caminhos de captura de saída e de supervisão (incrementos
+simples de atributos, sem locks). O endpoint apenas lê esses valores na hora do
+scrape, então uma única requisição cobre todos os servidores da máquina.
+"""
+
+import http.server
+import socket
+import socketserver
+import threading
+import time
+
+import procstat
+
+DEFAULT_METRICS_PORT = 9464
+
+
+class ServerMetrics:
+    """Contadores e amostras de um servidor."""
+
+    def __init__(self):
+        self.starts_total = 0
+        self.stdout_lines_total = 0
+        self.stderr_lines_total = 0
+        self.stdout_bytes_total = 0
+        self.stderr_bytes_total = 0
+        self.started_at = None  # time.time() do último início
+        self.last_exit_code = None
+        self.health_latency_seconds = None  # Latência do último probe de porta
+        self.health_up = None  # Resultado do último probe (True/False)
+        self.rss_bytes = None
+        self.peak_rss_bytes = None  # Maior RSS amostrado na execução atual
+        self.cpu_seconds_total = None
+        self.process_count = None
+        self.build_seconds = None  # Tempo do último build (0 se veio do cache)
+        self.ready_seconds = None  # Do início do processo até a porta aceitar conexão
+        self.restart_gap_seconds = None  # Indisponibilidade medida no último reinício
+        self.listen_ports = None  # Portas em que a árvore de processos escuta
+        self.tcp_established = None
+        self.tcp_time_wait = None  # Atribuídas pelas portas em escuta
+        self.tcp_close_wait = None  # Crescendo sem parar indica vazamento de conexões
+
+    def record_start(self):
+        self.starts_total += 1
+        self.started_at = time.time()
+        self.last_exit_code = None
+        self.ready_seconds = None
+        self.peak_rss_bytes = None
+
+    def record_exit(self, exit_code):
+        self.last_exit_code = exit_code
+        self.health_up = None
+        self.rss_bytes = None
+        self.process_count = None
+        self.listen_ports = None
+        self.tcp_established = None
+        self.tcp_time_wait = None
+        self.tcp_close_wait = None
+
+    def record_line(self, stream_name, line):
+        size = len(line.encode("utf-8", "replace"))
+        if stream_name == "stderr":
+            self.stderr_lines_total += 1
+            self.stderr_bytes_total += size
+        else:
+            self.stdout_lines_total += 1
+            self.stdout_bytes_total += size
+
+    @property
+    def restarts_total(self):
+        return max(self.starts_total - 1, 0)
+
+
+def probe_port(port, host="127.0.0.1", timeout=1.0):
+    """Tenta conectar na porta e retorna a latência em segundos, ou None se falhar."""
+    t0 = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return time.perf_counter() - t0
+    except OSError:
+        return None
+
+
+def _probe_port(server):
+    """Porta a sondar: no modo sob demanda, a interna do processo (sondar a
+    pública acordaria o servidor e adiaria o desligamento por ociosidade); após
+    um reinício pelo proxy reverso, a porta nova do processo."""
+    listener = getattr(server, "_listener", None)
+    if listener is not None:
+        return listener.backend_port
+    return getattr(server, "backend_port", None) or server.expected_port
+
+
+def _is_running(server):
+    replicas = getattr(server, "replica_servers", None)
+    if replicas:
+        return any(_is_running(replica) for replica in replicas)
+    return _process_alive(server)
+
+
+def _process_alive(server):
+    return server.process is not None and server.process.poll() is None
+
+
+class MetricsSampler:
+    """Thread de supervisão que amostra periodicamente probes de porta e recursos.
+
+    Faz uma única varredura de /proc (processos e tabelas TCP) por ciclo para
+    todos os servidores. Com um `store`, cada ciclo também grava CPU, memória,
+    linhas por segundo e latência de cada servidor nas séries temporais.
+    """
+
+    def __init__(
+        self, get_servers, interval=1.0, probe_interval=5.0, store=None, on_sample=None
+    ):
+        self.get_servers = get_servers
+        self.on_sample = on_sample  # Chamado com cada servidor após a amostra
+        self.interval = interval
+        self.probe_interval = probe_interval  # Probes de porta são mais espaçados
+        self.store = store  # TimeSeriesStore opcional que recebe cada amostra
+        self._last_probe = 0.0
+        self._previous = {}  # nome -> (instante, CPU total, linhas totais)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop_event.is_set()
+
+    def start(self):
+        """Inicia a amostragem; pode ser chamado de novo depois de `stop()`."""
+        with self._lock:
+            if self.running and self._thread.is_alive():
+                return
+            # Um evento por thread: a anterior pode ainda estar saindo
+            self._stop_event = threading.Event()
+            self._previous = {}  # Taxas de antes da pausa não valem mais
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event,), daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stop_event.set()
+
+    def _run(self, stop_event):
+        while not stop_event.wait(self.interval):
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"Erro ao amostrar métricas: {e}")
+
+    def sample_once(self):
+        # Só entradas com processo próprio: o pai de um conjunto de réplicas não
+        # tem um (as réplicas vêm na lista e são amostradas uma a uma)
+        running = [s for s in self.get_servers() if _process_alive(s)]
+        if not running:
+            return
+        now = time.time()
+        probe = now - self._last_probe >= self.probe_interval
+        if probe:
+            self._last_probe = now
+        children_map = procstat.read_children_map()
+        tcp_table = procstat.read_tcp_table() if children_map else None
+        for server in running:
+            metrics = server.metrics
+            port = _probe_port(server) if probe else None
+            if port:
+                latency = probe_port(port)
+                metrics.health_up = latency is not None
+                metrics.health_latency_seconds = latency
+            if children_map:
+                pids = procstat.process_tree(server.process.pid, children_map)
+                sample = procstat.sample_processes(pids)
+                if sample:
+                    metrics.rss_bytes = sample["rss_bytes"]
+                    metrics.peak_rss_bytes = max(
+                        metrics.peak_rss_bytes or 0, sample["rss_bytes"]
+                    )
+                    metrics.cpu_seconds_total = sample["cpu_seconds"]
+                    metrics.process_count = len(pids)
+                sockets = procstat.socket_summary(pids, tcp_table)
+                metrics.listen_ports = sockets["listen_ports"]
+                metrics.tcp_established = sockets["established"]
+                metrics.tcp_time_wait = sockets["time_wait"]
+                metrics.tcp_close_wait = sockets["close_wait"]
+            if self.store is not None:
+                self._record(server, now, probe)
+            if self.on_sample is not None:
+                self.on_sample(server)
+
+    def _record(self, server, now, probe):
+        """Grava a amostra do servidor nas séries temporais (taxas por segundo)."""
+        metrics = server.metrics
+        lines = metrics.stdout_lines_total + metrics.stderr_lines_total
+        cpu = metrics.cpu_seconds_total
+        previous = self._previous.get(server.name)
+        self._previous[server.name] = (now, cpu, lines)
+        cpu_percent = lines_per_second = None
+        if previous is not None and now > previous[0]:
+            elapsed = now - previous[0]
+            if cpu is not None and previous[1] is not None and cpu >= previous[1]:
+                cpu_percent = (cpu - previous[1]) / elapsed * 100
+            if lines >= previous[2]:
+                lines_per_second = (lines - previous[2]) / elapsed
+        latency = metrics.health_latency_seconds if probe else None
+        self.store.record(
+            server.name,
+            {
+                "cpu_percent": cpu_percent,
+                "rss_mb": (
+                    metrics.rss_bytes / (1024 * 1024)
+                    if metrics.rss_bytes is not None
+                    else None
+                ),
+                "lines_per_second": lines_per_second,
+                "latency_ms": latency * 1000 if latency is not None else None,
+            },
+            now,
+        )
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_metrics(servers):
+    """Gera o texto de exposição do Prometheus para a lista de servidores."""
+    now = time.time()
+    families = {}
+
+    def add(name, metric_type, help_text, labels, value):
+        if value is None:
+            return
+        family = families.setdefault(name, (metric_type, help_text, []))
+        label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+        value = float(value)
+        value_text = str(int(value)) if value.is_integer() else repr(value)
+        family[2].append(f"{name}{{{label_text}}} {value_text}")
+
+    for server in servers:
+        m = server.metrics
+        labels = {"server": server.name}
+        up = _is_running(server)
+        add(
+            "serverflow_server_up",
+            "gauge",
+            "1 se o processo do servidor está em execução.",
+            labels,
+            int(up),
+        )
+        add(
+            "serverflow_server_status",
+            "gauge",
+            "Status exibido na GUI (valor sempre 1).",
+            {**labels, "status": getattr(server, "status_text", "Parado")},
+            1,
+        )
+        add(
+            "serverflow_server_uptime_seconds",
+            "gauge",
+            "Tempo desde o último início do servidor.",
+            labels,
+            now - m.started_at if up and m.started_at else 0,
+        )
+        add(
+            "serverflow_server_starts_total",
+            "counter",
+            "Inícios do servidor nesta sessão.",
+            labels,
+            m.starts_total,
+        )
+        add(
+            "serverflow_server_restarts_total",
+            "counter",
+            "Reinícios (inícios após o primeiro).",
+            labels,
+            m.restarts_total,
+        )
+        add(
+            "serverflow_server_last_exit_code",
+            "gauge",
+            "Código de saída da última execução.",
+            labels,
+            m.last_exit_code,
+        )
+        add(
+            "serverflow_server_build_seconds",
+            "gauge",
+            "Duração do último build em cache (0 quando reaproveitado).",
+            labels,
+            m.build_seconds,
+        )
+        add(
+            "serverflow_server_ready_seconds",
+            "gauge",
+            "Tempo do início do processo até a porta aceitar conexão.",
+            labels,
+            m.ready_seconds,
+        )
+        add(
+            "serverflow_server_restart_gap_seconds",
+            "gauge",
+            "Maior intervalo sem resposta na porta pública durante o último reinício.",
+            labels,
+            m.restart_gap_seconds,
+        )
+        for stream in ("stdout", "stderr"):
+            stream_labels = {**labels, "stream": stream}
+            add(
+                "serverflow_server_lines_captured_total",
+                "counter",
+                "Linhas de saída capturadas.",
+                stream_labels,
+                getattr(m, f"{stream}_lines_total"),
+            )
+            add(
+                "serverflow_server_bytes_captured_total",
+                "counter",
+                "Bytes de saída capturados.",
+                stream_labels,
+                getattr(m, f"{stream}_bytes_total"),
+            )
+        if up:
+            add(
+                "serverflow_server_health_up",
+                "gauge",
+                "1 se a porta esperada aceitou conexão no último probe.",
+                labels,
+                None if m.health_up is None else int(m.health_up),
+            )
+            add(
+                "serverflow_server_health_latency_seconds",
+                "gauge",
+                "Latência de conexão do último probe de porta.",
+                labels,
+                m.health_latency_seconds,
+            )
+            add(
+                "serverflow_server_resident_memory_bytes",
+                "gauge",
+                "RSS somado da árvore de processos.",
+                labels,
+                m.rss_bytes,
+            )
+            add(
+                "serverflow_server_cpu_seconds_total",
+                "counter",
+                "Tempo de CPU somado da árvore de processos.",
+                labels,
+                m.cpu_seconds_total,
+            )
+            add(
+                "serverflow_server_processes",
+                "gauge",
+                "Processos na árvore do servidor.",
+                labels,
+                m.process_count,
+            )
+            for state in ("established", "time_wait", "close_wait"):
+                add(
+                    "serverflow_server_tcp_connections",
+                    "gauge",
+                    "Conexões TCP da árvore de processos por estado.",
+                    {**labels, "state": state},
+                    getattr(m, f"tcp_{state}"),
+                )
+            for port in m.listen_ports or ():
+                add(
+                    "serverflow_server_listening_port",
+                    "gauge",
+                    "Portas TCP em escuta pela árvore de processos (valor sempre 1).",
+                    {**labels, "port": port},
+                    1,
+                )
+
+    lines = []
+    for name, (metric_type, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MetricsExporter:
+    """Servidor HTTP opcional que expõe /metrics em 127.0.0.1."""
+
+    def __init__(self, get_servers, port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+        self.get_servers = get_servers
+        self.port = port
+        self.host = host
+        self._httpd = None
+
+    @property
+    def running(self):
+        return self._httpd is not None
+
+    def start(self):
+        if self._httpd:
+            return
+        get_servers = self.get_servers
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render_metrics(get_servers()).encode("utf-8")
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = _ThreadingHTTPServer((self.host, self.port), Handler)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
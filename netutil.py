@@ -0,0 +1,138 @@
+"""Utilitários de rede compartilhados pelos serviços asyncio do ServerFlow.
+
+O listener sob demanda, o balanceador de réplicas e o proxy reverso rodam cada
+um em seu próprio loop asyncio, em uma thread daemon, para não depender do loop
+do Tkinter. `AsyncioService` concentra esse ciclo de vida.
+"""
+
+import asyncio
+import os
+import socket
+import threading
+
+CHUNK_SIZE = 64 * 1024
+
+
+def is_port_in_use(port, host="127.0.0.1"):
+    """Informa se não é possível escutar em `port`."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        if os.name == "posix":
+            # Conexões em TIME_WAIT não impedem o servidor de escutar na porta
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, port))
+            return False
+        except OSError:
+            return True
+
+
+def find_free_port(host="127.0.0.1"):
+    """Retorna uma porta TCP livre escolhida pelo sistema operacional."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def find_free_ports(start, count, host="127.0.0.1", limit=1000):
+    """Retorna `count` portas livres a partir de `start`, em ordem crescente.
+
+    Portas ocupadas são puladas; levanta OSError se não achar o suficiente
+    dentro de `limit` tentativas.
+    """
+    ports = []
+    port = start
+    while len(ports) < count and port < min(start + limit, 65536):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind((host, port))
+                ports.append(port)
+            except OSError:
+                pass
+        port += 1
+    if len(ports) < count:
+        raise OSError(f"Não há {count} portas livres a partir de {start}")
+    return ports
+
+
+async def pipe(reader, writer, on_data=None):
+    """Copia dados até EOF e repassa o fechamento parcial (half-close).
+
+    `on_data(n)` (opcional) é chamado a cada bloco de `n` bytes copiado.
+    """
+    try:
+        while True:
+            data = await reader.read(CHUNK_SIZE)
+            if not data:
+                break
+            if on_data is not None:
+                on_data(len(data))
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+    except OSError:
+        pass
+
+
+class AsyncioService:
+    """Serviço com loop asyncio próprio em uma thread daemon.
+
+    Subclasses implementam `_open()` (abre os sockets; um OSError ali faz
+    `start()` falhar com o mesmo erro) e podem estender `_close()`.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Inicia o serviço. Levanta OSError se a porta não puder ser usada."""
+        if self.running:
+            return
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._open())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                self._loop.close()
+                return
+            started.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                self._loop.run_until_complete(self._close())
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+
+    def stop(self):
+        """Encerra o loop, fechando os sockets e cancelando as conexões."""
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _open(self):
+        raise NotImplementedError
+
+    async def _close(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,165 @@
+"""Início sob demanda ("socket activation") com desligamento por ociosidade.
+
+O ServerFlow escuta na porta pública do servidor sem iniciar o processo. Na
+primeira conexão o servidor real é iniciado em uma porta interna livre e, assim
+que ela aceita conexões, o tráfego é repassado byte a byte (TCP, então funciona
+para HTTP, WebSocket etc.). Depois de `idle_timeout` segundos sem tráfego (bytes
+repassados em qualquer sentido; uma conexão keep-alive parada não conta), o
+processo é parado e o listener volta a esperar.
+
+O listener roda em um loop asyncio próprio, em uma thread daemon; os callbacks
+`spawn` e `shutdown` são executados em threads do executor padrão, para poderem
+bloquear (compilar, esperar o processo terminar) sem travar as conexões.
+"""
+
+import asyncio
+import collections
+import time
+
+from netutil import AsyncioService, find_free_port, pipe
+
+DEFAULT_IDLE_TIMEOUT = 300  # Segundos sem tráfego antes de parar o servidor
+READY_TIMEOUT = 60  # Segundos esperando o servidor real aceitar conexões
+
+
+class OnDemandListener(AsyncioService):
+    """Escuta em `port` e inicia o servidor real apenas quando há tráfego.
+
+    - `spawn(backend_port)` inicia o processo escutando em `backend_port` e
+      retorna True se conseguiu;
+    - `alive()` informa se o processo ainda está em execução;
+    - `shutdown()` para o processo (chamado ao atingir o tempo ocioso);
+    - `on_ready(seconds)` (opcional) recebe o tempo de partida a frio.
+    """
+
+    def __init__(
+        self,
+        port,
+        spawn,
+        alive,
+        shutdown,
+        idle_timeout=DEFAULT_IDLE_TIMEOUT,
+        on_ready=None,
+        host=None,
+        backend_host="127.0.0.1",
+    ):
+        super().__init__()
+        self.port = port
+        self.host = host  # None = todas as interfaces, como a maioria dos servidores
+        self.backend_host = backend_host
+        self.idle_timeout = idle_timeout
+        self._spawn = spawn
+        self._alive = alive
+        self._shutdown = shutdown
+        self._on_ready = on_ready
+        self.backend_port = None  # Porta interna do processo em execução
+        self.connections = 0  # Conexões abertas no momento
+        self.connections_total = 0
+        self.active = collections.Counter()  # porta interna -> conexões abertas
+        self.wakeups_total = 0
+        self.bytes_total = 0  # Bytes repassados nos dois sentidos
+        self._last_activity = time.monotonic()
+        self._server = None
+        self._wake_lock = None
+
+    def backend_exited(self):
+        """Avisa que o processo terminou; a próxima conexão inicia outro."""
+        self.backend_port = None
+
+    async def _open(self):
+        self._wake_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, reuse_address=True
+        )
+        self._idle_task = asyncio.ensure_future(self._idle_watch())
+
+    async def _close(self):
+        self._idle_task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        await super()._close()
+
+    def touch(self, nbytes=0):
+        """Adia o desligamento por ociosidade (conta como atividade)."""
+        self._last_activity = time.monotonic()
+        self.bytes_total += nbytes
+
+    def switch_backend(self, port):
+        """Envia as próximas conexões para `port` (reinício sem indisponibilidade).
+
+        As conexões já abertas continuam no processo anterior; `active` mostra
+        quantas ainda restam em cada porta.
+        """
+        self.backend_port = port
+        self.touch()
+
+    async def _ensure_backend(self):
+        """Retorna a porta do servidor real, iniciando-o se necessário."""
+        async with self._wake_lock:
+            if self.backend_port is not None and self._alive():
+                return self.backend_port
+            loop = asyncio.get_running_loop()
+            port = find_free_port(self.backend_host)
+            t0 = time.perf_counter()
+            if not await loop.run_in_executor(None, self._spawn, port):
+                return None
+            self.wakeups_total += 1
+            deadline = t0 + READY_TIMEOUT
+            while time.perf_counter() < deadline and self._alive():
+                try:
+                    _, writer = await asyncio.open_connection(self.backend_host, port)
+                except OSError:
+                    await asyncio.sleep(0.05)
+                    continue
+                writer.close()
+                self.backend_port = port
+                if self._on_ready:
+                    self._on_ready(time.perf_counter() - t0)
+                return port
+            return None
+
+    async def _handle(self, client_reader, client_writer):
+        self.connections += 1
+        self.connections_total += 1
+        self.touch()
+        upstream_writer = None
+        port = None
+        try:
+            backend = await self._ensure_backend()
+            if backend is None:
+                return
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                self.backend_host, backend
+            )
+            port = backend
+            self.active[port] += 1
+            await asyncio.gather(
+                pipe(client_reader, upstream_writer, self.touch),
+                pipe(upstream_reader, client_writer, self.touch),
+            )
+        except (OSError, asyncio.CancelledError):
+            pass  # Cliente desconectou ou o listener está sendo encerrado
+        finally:
+            self.connections -= 1
+            if port is not None:
+                self.active[port] -= 1
+            self.touch()
+            for writer in (upstream_writer, client_writer):
+                if writer is not None:
+                    writer.close()
+
+    async def _idle_watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(1.0, self.idle_timeout / 4))
+            if self.backend_port is None or not self._idle():
+                continue
+            # Conexões abertas mas paradas não seguram o processo; elas
+            # terminam quando ele para
+            async with self._wake_lock:
+                if self.backend_port is not None and self._idle():
+                    self.backend_port = None
+                    await loop.run_in_executor(None, self._shutdown)
+
+    def _idle(self):
+        return time.monotonic() - self._last_activity >= self.idle_timeout
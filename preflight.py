@@ -0,0 +1,244 @@
+"""Validação prévia ("pre-flight") dos servidores antes de iniciá-los.
+
+Em vez de descobrir um problema por vez (e só depois de tentar iniciar o
+processo), todos os servidores selecionados são verificados em paralelo:
+
+- o diretório de trabalho existe (e não é um caminho do Windows em outro SO);
+- o executável do comando é encontrado no PATH ou no caminho informado (com
+  `~`, `$VAR` e `${VAR}` expandidos e o PATH do ambiente do próprio servidor);
+- a porta esperada está livre e não se repete entre os selecionados;
+- o diretório de logs aceita escrita.
+
+O resultado é um único relatório com todos os problemas encontrados. O que não
+dá para resolver com certeza aqui (uma variável que só existe no shell, `$(...)`)
+vira um aviso, que não impede o início.
+"""
+
+import collections
+import concurrent.futures
+import os
+import re
+import shlex
+import shutil
+import time
+
+from netutil import is_port_in_use
+
+DEFAULT_WORKERS = 16
+LOG_DIR = "logs"
+
+# Caminho absoluto do Windows ("E:/projetos", "C:\\app") em um sistema POSIX
+WINDOWS_PATH_RE = re.compile(r"^[A-Za-z]:[\\/]")
+# Atribuições de variáveis antes do comando ("PORT=8080 node app.js")
+ENV_ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+# $VAR ou ${VAR}; outras formas (${VAR:-x}, $(...)) não são resolvidas aqui
+VARIABLE_RE = re.compile(r"\$(?:\{([A-Za-z_][A-Za-z0-9_]*)\}|([A-Za-z_][A-Za-z0-9_]*))")
+# Palavras resolvidas pelo próprio shell (o comando roda com shell=True)
+SHELL_WORDS = frozenset(
+    {".", ":", "[", "{", "(", "cd", "exec", "export", "source", "eval", "set"}
+    | {"ulimit", "umask", "trap", "time", "if", "for", "while", "case", "nohup"}
+)
+
+
+class Problem:
+    """Um problema encontrado em um servidor."""
+
+    def __init__(self, server, check, message, warning=False):
+        self.server = server  # Nome do servidor
+        self.check = check  # "diretório", "executável", "porta" ou "logs"
+        self.message = message
+        self.warning = warning  # Só um aviso: não impede o início
+
+    def __str__(self):
+        return f"{self.server} [{self.check}]: {self.message}"
+
+
+class PreflightReport:
+    """Resultado da validação de um conjunto de servidores."""
+
+    def __init__(self, servers, problems, elapsed):
+        self.servers = servers
+        self.problems = [problem for problem in problems if not problem.warning]
+        self.warnings = [problem for problem in problems if problem.warning]
+        self.elapsed = elapsed  # Segundos da validação inteira
+        failed = {problem.server for problem in self.problems}
+        self.passed = [server for server in servers if server.name not in failed]
+
+    @property
+    def ok(self):
+        return not self.problems
+
+    def format(self):
+        """Texto do relatório consolidado, agrupado por servidor."""
+        by_server = collections.defaultdict(list)
+        for problem in self.problems + self.warnings:
+            by_server[problem.server].append(problem)
+        failed = len({problem.server for problem in self.problems})
+        lines = [
+            f"{failed} de {len(self.servers)} servidor(es) com problemas "
+            f"(verificados em {self.elapsed * 1000:.0f} ms):"
+        ]
+        for name, problems in by_server.items():
+            lines.append(f"\n{name}:")
+            lines.extend(
+                f"  - {p.check}: {p.message}" + (" (aviso)" if p.warning else "")
+                for p in problems
+            )
+        return "\n".join(lines)
+
+
+def _check_directory(server, problems):
+    working_dir = server.working_dir
+    if not working_dir:
+        return True
+    if os.name != "nt" and WINDOWS_PATH_RE.match(working_dir.strip("\"'")):
+        problems.append(
+            Problem(
+                server.name,
+                "diretório",
+                f"'{working_dir}' é um caminho do Windows; ajuste para este sistema",
+            )
+        )
+        return False
+    if not os.path.isdir(working_dir):
+        message = f"'{working_dir}' não existe"
+        if os.path.isdir(working_dir.strip("\"'")):
+            message += " (remova as aspas do caminho)"
+        problems.append(Problem(server.name, "diretório", message))
+        return False
+    return True
+
+
+def _executable(command):
+    """Primeira palavra do comando que o shell vai executar (None se não houver)."""
+    for word in shlex.split(command, posix=os.name != "nt"):
+        if not ENV_ASSIGNMENT_RE.match(word):
+            return word
+    return None
+
+
+def _expand(word, env):
+    """Expande `~`, `$VAR` e `${VAR}` como o shell faria com o ambiente `env`.
+    Retorna None se a palavra depende de algo que não dá para resolver aqui."""
+    names = [a or b for a, b in VARIABLE_RE.findall(word)]
+    rest = VARIABLE_RE.sub("", word)
+    if any(name not in env for name in names) or "$" in rest or "`" in rest:
+        return None
+    word = VARIABLE_RE.sub(lambda m: env[m.group(1) or m.group(2)], word)
+    if word == "~" or word.startswith("~/"):
+        if not env.get("HOME"):
+            return None
+        word = env["HOME"] + word[1:]
+    elif word.startswith("~"):
+        word = os.path.expanduser(word)  # ~usuario
+        if word.startswith("~"):
+            return None
+    return word
+
+
+def _check_executable(server, problems, directory_ok):
+    try:
+        executable = _executable(server.command)
+    except ValueError as e:
+        problems.append(Problem(server.name, "executável", f"comando inválido: {e}"))
+        return
+    if executable is None:
+        problems.append(Problem(server.name, "executável", "comando vazio"))
+        return
+    if executable in SHELL_WORDS:
+        return
+    env = {**os.environ, **(getattr(server, "env", None) or {})}
+    resolved = _expand(executable, env)
+    if resolved is None:
+        problems.append(
+            Problem(
+                server.name,
+                "executável",
+                f"'{executable}' depende de expansões do shell; não verificado",
+                warning=True,
+            )
+        )
+        return
+    shown = f"'{executable}'"
+    if resolved != executable:
+        shown += f" ({resolved})"
+    if os.name != "nt" and WINDOWS_PATH_RE.match(resolved):
+        problems.append(
+            Problem(
+                server.name,
+                "executável",
+                f"{shown} é um caminho do Windows; ajuste para este sistema",
+            )
+        )
+    elif os.sep in resolved or (os.altsep and os.altsep in resolved):
+        if not directory_ok:
+            return  # Relativo a um diretório que já falhou
+        path = os.path.join(server.working_dir or ".", resolved)
+        if not os.path.isfile(path):
+            problems.append(Problem(server.name, "executável", f"{shown} não existe"))
+        elif not os.access(path, os.X_OK):
+            problems.append(
+                Problem(server.name, "executável", f"{shown} não é executável")
+            )
+    elif shutil.which(resolved, path=env.get("PATH")) is None:
+        problems.append(
+            Problem(server.name, "executável", f"{shown} não encontrado no PATH")
+        )
+
+
+def _check_port(server, problems):
+    if server.expected_port and is_port_in_use(server.expected_port):
+        problems.append(
+            Problem(server.name, "porta", f"{server.expected_port} já está em uso")
+        )
+
+
+def check_server(server):
+    """Verifica um servidor; retorna a lista de problemas (vazia se estiver ok)."""
+    problems = []
+    directory_ok = _check_directory(server, problems)
+    _check_executable(server, problems, directory_ok)
+    _check_port(server, problems)
+    return problems
+
+
+def _check_log_dir(log_dir):
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+    except OSError as e:
+        return f"não foi possível criar '{log_dir}': {e.strerror}"
+    if not os.access(log_dir, os.W_OK | os.X_OK):
+        return f"sem permissão de escrita em '{log_dir}'"
+    return None
+
+
+def run_preflight(servers, max_workers=DEFAULT_WORKERS, log_dir=LOG_DIR):
+    """Valida todos os servidores em paralelo e retorna um PreflightReport."""
+    servers = list(servers)
+    t0 = time.perf_counter()
+    problems = []
+    log_problem = _check_log_dir(log_dir)
+    if servers:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_workers, len(servers)),
+            thread_name_prefix="preflight",
+        ) as pool:
+            for server_problems in pool.map(check_server, servers):
+                problems.extend(server_problems)
+    # Verificações que dependem do conjunto inteiro
+    by_port = collections.defaultdict(list)
+    for server in servers:
+        if server.expected_port:
+            by_port[server.expected_port].append(server.name)
+        if log_problem:
+            problems.append(Problem(server.name, "logs", log_problem))
+    for port, names in by_port.items():
+        if len(names) > 1:
+            for name in names:
+                others = ", ".join(other for other in names if other != name)
+                problems.append(
+                    Problem(name, "porta", f"{port} também é usada por {others}")
+                )
+    order = {server.name: index for index, server in enumerate(servers)}
+    problems.sort(key=lambda problem: order.get(problem.server, len(order)))
+    return PreflightReport(servers, problems, time.perf_counter() - t0)
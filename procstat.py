@@ -0,0 +1,174 @@
+"""Leitura leve de /proc para amostrar recursos dos processos gerenciados.
+
+Só funciona em Linux; nas outras plataformas as funções retornam resultados
+vazios e o restante do ServerFlow segue funcionando sem as amostras.
+"""
+
+import os
+
+PROC_ROOT = "/proc"
+AVAILABLE = os.path.isdir(os.path.join(PROC_ROOT, "self"))
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+    PAGE_SIZE = 4096
+
+
+def _read_stat(pid):
+    """Retorna os campos de /proc/<pid>/stat após o nome do comando, ou None."""
+    try:
+        with open(f"{PROC_ROOT}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # O nome do comando fica entre parênteses e pode conter espaços
+    return data[data.rfind(b")") + 2 :].split()
+
+
+def read_children_map():
+    """Varre /proc uma única vez e retorna {ppid: [pids filhos]}."""
+    children = {}
+    if not AVAILABLE:
+        return children
+    for entry in os.listdir(PROC_ROOT):
+        if not entry.isdigit():
+            continue
+        fields = _read_stat(entry)
+        if fields is None:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def process_tree(root_pid, children_map):
+    """Retorna o PID raiz e todos os seus descendentes."""
+    pids = [root_pid]
+    index = 0
+    while index < len(pids):
+        pids.extend(children_map.get(pids[index], ()))
+        index += 1
+    return pids
+
+
+def descendants(pid):
+    """PIDs descendentes de `pid` (vazio sem filhos ou sem /proc)."""
+    return process_tree(pid, read_children_map())[1:]
+
+
+def process_start_ticks(pid):
+    """Retorna o instante de início do processo (em ticks desde o boot), ou None."""
+    fields = _read_stat(pid)
+    return int(fields[19]) if fields else None
+
+
+def sample_processes(pids):
+    """Soma RSS (bytes) e tempo de CPU (segundos) de uma lista de PIDs.
+
+    Retorna None se nenhum dos processos puder ser lido.
+    """
+    rss = 0
+    cpu_ticks = 0
+    found = False
+    for pid in pids:
+        fields = _read_stat(pid)
+        if fields is None:
+            continue
+        found = True
+        # Campos 14/15 (utime/stime) e 24 (rss) do stat, contados a partir de 1
+        cpu_ticks += int(fields[11]) + int(fields[12])
+        rss += int(fields[21]) * PAGE_SIZE
+    if not found:
+        return None
+    return {"rss_bytes": rss, "cpu_seconds": cpu_ticks / CLOCK_TICKS}
+
+
+# Estados de /proc/net/tcp acompanhados (código hexadecimal -> nome)
+TCP_STATES = {
+    "01": "ESTABLISHED",
+    "06": "TIME_WAIT",
+    "08": "CLOSE_WAIT",
+    "0A": "LISTEN",
+}
+
+
+class TcpTable:
+    """Conexões TCP da máquina lidas de /proc/net/tcp e tcp6 em uma passada.
+
+    Sockets em TIME_WAIT já não pertencem a nenhum processo (inode 0), então
+    são contados por porta local e atribuídos ao servidor que escuta nela.
+    """
+
+    def __init__(self):
+        self.by_inode = {}  # inode -> (estado, porta local)
+        self.time_wait = {}  # porta local -> conexões em TIME_WAIT
+
+    def _parse(self, path):
+        try:
+            with open(path, "rb") as f:
+                next(f, None)  # Cabeçalho
+                for line in f:
+                    fields = line.split()
+                    state = TCP_STATES.get(fields[3].decode())
+                    if state is None:
+                        continue
+                    port = int(fields[1][fields[1].rindex(b":") + 1 :], 16)
+                    if state == "TIME_WAIT":
+                        self.time_wait[port] = self.time_wait.get(port, 0) + 1
+                    else:
+                        self.by_inode[int(fields[9])] = (state, port)
+        except (OSError, IndexError, ValueError):
+            pass
+
+
+def read_tcp_table():
+    """Lê as tabelas TCP (IPv4 e IPv6) uma única vez para todos os servidores."""
+    table = TcpTable()
+    if AVAILABLE:
+        table._parse(f"{PROC_ROOT}/net/tcp")
+        table._parse(f"{PROC_ROOT}/net/tcp6")
+    return table
+
+
+def socket_inodes(pids):
+    """Inodes dos sockets abertos pelos processos (ignora os ilegíveis)."""
+    inodes = set()
+    for pid in pids:
+        fd_dir = f"{PROC_ROOT}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(int(target[8:-1]))
+    return inodes
+
+
+def socket_summary(pids, table):
+    """Portas em escuta e contagem de conexões por estado da árvore `pids`."""
+    listen_ports = set()
+    established = close_wait = 0
+    for inode in socket_inodes(pids):
+        entry = table.by_inode.get(inode)
+        if entry is None:
+            continue
+        state, port = entry
+        if state == "LISTEN":
+            listen_ports.add(port)
+        elif state == "ESTABLISHED":
+            established += 1
+        else:
+            close_wait += 1
+    return {
+        "listen_ports": sorted(listen_ports),
+        "established": established,
+        "close_wait": close_wait,
+        "time_wait": sum(table.time_wait.get(port, 0) for port in listen_ports),
+    }
@@ -0,0 +1,250 @@
+"""Readoção de servidores que continuaram rodando depois que o ServerFlow fechou.
+
+Os processos são iniciados em um grupo próprio e escrevem a saída direto nos
+seus arquivos de log (stdout e stderr separados), então sobrevivem ao
+fechamento (ou a uma queda) da GUI. Enquanto a GUI está aberta, o estado de
+cada processo (PID, instante de início em ticks desde o boot, pgid, log e até
+onde ele já foi lido) é gravado em `logs/running.json`. Na próxima abertura,
+cada entrada é conferida em /proc: o PID precisa existir com o mesmo instante
+de início (o PID pode ter sido reaproveitado) e o mesmo grupo. Os processos
+confirmados são adotados com um `AdoptedProcess`, que imita a parte do `Popen`
+usada pelo ServerFlow.
+
+Só funciona onde /proc existe (Linux); nas demais plataformas nada é gravado.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+import traceback
+
+import procstat
+
+DEFAULT_STATE_PATH = os.path.join("logs", "running.json")
+POLL_INTERVAL = 0.5  # Segundos entre verificações de um processo adotado
+TAIL_INTERVAL = 0.1  # Segundos entre leituras do log quando não há dados novos
+
+# Código de saída informado para processos adotados: eles não são filhos do
+# ServerFlow, então o código real não pode ser obtido.
+UNKNOWN_EXIT_CODE = -1
+
+
+def process_identity(pid):
+    """Retorna (instante de início em ticks, pgid) do processo, ou None."""
+    start_ticks = procstat.process_start_ticks(pid)
+    if start_ticks is None:
+        return None
+    try:
+        return start_ticks, os.getpgid(pid)
+    except OSError:
+        return None
+
+
+class AdoptedProcess:
+    """Processo em execução que não é filho do ServerFlow, com interface de Popen."""
+
+    def __init__(self, pid, start_ticks, pgid):
+        self.pid = pid
+        self.start_ticks = start_ticks
+        self.pgid = pgid
+        self.returncode = None
+        self.stdout = self.stderr = None
+
+    def poll(self):
+        if self.returncode is None and process_identity(self.pid) != (
+            self.start_ticks,
+            self.pgid,
+        ):
+            self.returncode = UNKNOWN_EXIT_CODE
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(f"PID {self.pid}", timeout)
+            time.sleep(POLL_INTERVAL if timeout is None else 0.05)
+        return self.returncode
+
+    def _signal(self, sig):
+        if self.poll() is None:
+            try:
+                os.killpg(self.pgid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self._signal(signal.SIGTERM)
+
+    def kill(self):
+        self._signal(signal.SIGKILL)
+
+
+class LogTailer:
+    """Lê as linhas novas de um arquivo de log a partir de `offset`.
+
+    Guarda o fim de uma linha incompleta até a próxima leitura e volta ao
+    início se o arquivo for truncado.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self._partial = b""
+
+    def read_lines(self, final=False):
+        """Retorna as linhas completas escritas desde a última leitura.
+
+        Com `final=True` também devolve uma última linha sem quebra de linha.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self.offset:
+                    self.offset = 0  # Truncado ou recriado
+                    self._partial = b""
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+        self.offset += len(data)
+        data = self._partial + data
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        if final and self._partial:
+            lines.append(self._partial)
+            self._partial = b""
+        return [line.decode("utf-8", "replace") + "\n" for line in lines]
+
+
+class TailLoop:
+    """Uma única thread que acompanha os logs de todos os servidores.
+
+    Cada acompanhamento é uma função `poll()` chamada a cada passada: ela
+    retorna quantas linhas leu, ou None quando terminou (e sai do laço). A
+    thread só dorme quando nenhuma leitura trouxe dados, então um servidor
+    muito verboso é drenado sem esperar `interval`.
+    """
+
+    def __init__(self, interval=TAIL_INTERVAL):
+        self.interval = interval
+        self._polls = {}  # chave -> poll()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, key, poll):
+        with self._lock:
+            self._polls[key] = poll
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                polls = list(self._polls.items())
+                if not polls:
+                    self._thread = None  # Volta a ser criada no próximo add()
+                    return
+            busy = False
+            for key, poll in polls:
+                try:
+                    count = poll()
+                except Exception:
+                    traceback.print_exc()  # Um servidor não derruba os demais
+                    count = None
+                if count is None:
+                    with self._lock:
+                        if self._polls.get(key) is poll:
+                            del self._polls[key]
+                busy = busy or bool(count)
+            if not busy:
+                time.sleep(self.interval)
+
+
+def tail_lines(path, count, end=None, block_size=8192, max_bytes=1 << 20):
+    """Retorna as últimas `count` linhas do arquivo antes da posição `end`.
+
+    Lê blocos de trás para frente a partir de `end` (padrão: fim do arquivo),
+    então o custo não depende do tamanho do log; no máximo `max_bytes` são
+    lidos, mesmo que as linhas sejam muito longas.
+    """
+    try:
+        with open(path, "rb") as f:
+            if end is None:
+                end = f.seek(0, os.SEEK_END)
+            position = end
+            data = b""
+            # count + 1 quebras: a primeira linha do trecho pode estar incompleta
+            while position > 0 and data.count(b"\n") <= count:
+                if end - position >= max_bytes:
+                    break
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+    except OSError:
+        return []
+    lines = data.splitlines(keepends=True)
+    if position > 0 and lines:
+        lines.pop(0)  # Começa no meio de uma linha
+    return [line.decode("utf-8", "replace") for line in lines[-count:]]
+
+
+class RuntimeState:
+    """Arquivo com os processos em execução de cada servidor."""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._last_text = None
+
+    def load(self):
+        """Retorna as entradas gravadas ({nome: entrada}); vazio se não houver."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, entries):
+        """Grava as entradas (só quando mudaram), via arquivo temporário."""
+        if not procstat.AVAILABLE:
+            return
+        text = json.dumps(entries, indent=2, sort_keys=True)
+        if text == self._last_text:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+            self._last_text = text
+        except OSError as e:
+            print(f"Erro ao gravar {self.path}: {e}")
+
+
+def entry_for(process, **fields):
+    """Entrada de estado para um processo em execução, ou None se não der para
+    identificá-lo (sem /proc ou já terminou)."""
+    identity = process_identity(process.pid)
+    if identity is None:
+        return None
+    start_ticks, pgid = identity
+    return {"pid": process.pid, "start_ticks": start_ticks, "pgid": pgid, **fields}
+
+
+def verify(entry):
+    """Retorna um AdoptedProcess se o processo da entrada ainda é o mesmo."""
+    try:
+        pid = int(entry["pid"])
+        expected = (int(entry["start_ticks"]), int(entry["pgid"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if process_identity(pid) != expected:
+        return None
+    return AdoptedProcess(pid, *expected)
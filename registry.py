@@ -0,0 +1,240 @@
+"""Registro central dos servidores gerenciados.
+
+Substitui a lista de instâncias e o dicionário de servidores em execução por um
+único objeto com:
+
+- busca O(1) por nome, id, porta, tag e grupo;
+- transições de estado atômicas (sob lock), no estilo compare-and-set;
+- notificações de mudança para assinantes (a GUI agrupa e aplica em lote).
+"""
+
+import threading
+
+# Estados do ciclo de vida de um servidor
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+SLEEPING = "sleeping"  # Sob demanda: porta aberta, processo ainda não iniciado
+EXITED = "exited"  # Saiu sozinho com código diferente de zero
+ERROR = "error"
+
+IDLE_STATES = (STOPPED, EXITED, ERROR)
+ACTIVE_STATES = (STARTING, RUNNING, STOPPING, SLEEPING)
+
+# Eventos publicados aos assinantes
+ADDED = "added"
+REMOVED = "removed"
+UPDATED = "updated"
+STATE = "state"
+
+
+class ServerRegistry:
+    """Conjunto indexado e thread-safe de objetos Server."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._next_id = 1
+        self._by_id = {}  # Mantém a ordem de inserção
+        self._by_name = {}
+        self._by_port = {}
+        self._by_tag = {}  # tag -> {id: servidor}
+        self._by_group = {}  # grupo -> {id: servidor}
+        self._index_keys = {}  # id -> (nome, porta, tags, grupo) indexados
+        self._active = {}  # id -> servidor em estado ativo
+        self._subscribers = []
+
+    # --- Consulta ---
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def all(self):
+        """Cópia da lista de servidores, na ordem em que foram adicionados."""
+        with self._lock:
+            return list(self._by_id.values())
+
+    def get(self, name):
+        return self._by_name.get(name)
+
+    def get_by_id(self, server_id):
+        return self._by_id.get(server_id)
+
+    def by_port(self, port):
+        with self._lock:
+            return list(self._by_port.get(port, ()))
+
+    def by_tag(self, tag):
+        """Servidores com a tag, na ordem em que foram adicionados."""
+        with self._lock:
+            return _in_id_order(self._by_tag.get(tag))
+
+    def tags(self):
+        with self._lock:
+            return sorted(tag for tag, servers in self._by_tag.items() if servers)
+
+    def by_group(self, group):
+        """Servidores do grupo, na ordem em que foram adicionados."""
+        with self._lock:
+            return _in_id_order(self._by_group.get(group))
+
+    def groups(self):
+        with self._lock:
+            return sorted(group for group, servers in self._by_group.items() if servers)
+
+    def running(self):
+        """Servidores em estado ativo (iniciando, executando, parando ou em espera)."""
+        with self._lock:
+            return list(self._active.values())
+
+    def is_active(self, server):
+        return server.state in ACTIVE_STATES
+
+    # --- Modificação ---
+
+    def add(self, server):
+        """Registra um servidor. Levanta ValueError se o nome já existir."""
+        self.add_many([server])
+        return server.id
+
+    def add_many(self, servers):
+        """Registra vários servidores de uma vez, com uma notificação por servidor."""
+        with self._lock:
+            names = set()
+            for server in servers:
+                if server.name in self._by_name or server.name in names:
+                    raise ValueError(f"Já existe um servidor chamado '{server.name}'.")
+                names.add(server.name)
+            for server in servers:
+                server.id = self._next_id
+                self._next_id += 1
+                self._by_id[server.id] = server
+                self._index(server)
+                if server.state in ACTIVE_STATES:
+                    self._active[server.id] = server
+        for server in servers:
+            self._notify(ADDED, server)
+
+    def remove(self, server):
+        with self._lock:
+            if self._by_id.pop(server.id, None) is None:
+                return False
+            self._unindex(server)
+            self._active.pop(server.id, None)
+        self._notify(REMOVED, server)
+        return True
+
+    def reindex(self, server):
+        """Atualiza os índices após mudar nome, porta, tags ou grupo do servidor.
+
+        Levanta ValueError (sem alterar nada) se o novo nome já estiver em uso.
+        """
+        with self._lock:
+            other = self._by_name.get(server.name)
+            if other is not None and other is not server:
+                raise ValueError(f"Já existe um servidor chamado '{server.name}'.")
+            old_name = self._index_keys[server.id][0]
+            self._unindex(server)
+            self._index(server)
+        self._notify(UPDATED, server, old_name=old_name)
+
+    def unique_name(self, base, numbered=None):
+        """Retorna `base` ou a primeira variação numerada que não esteja em uso.
+
+        `numbered(n)` gera a variação n (padrão: "base (n)"). Cada tentativa é
+        uma busca O(1) no índice de nomes.
+        """
+        numbered = numbered or (lambda n: f"{base} ({n})")
+        with self._lock:
+            candidate = base
+            n = 1
+            while candidate in self._by_name:
+                candidate = numbered(n)
+                n += 1
+            return candidate
+
+    def transition(self, server, new_state, expected=None):
+        """Muda o estado do servidor de forma atômica.
+
+        Se `expected` for informado, só muda quando o estado atual estiver nele
+        (retorna False caso contrário). Notifica os assinantes quando muda.
+        """
+        with self._lock:
+            old_state = server.state
+            if expected is not None and old_state not in expected:
+                return False
+            server.state = new_state
+            if server.id in self._by_id:
+                if new_state in ACTIVE_STATES:
+                    self._active[server.id] = server
+                else:
+                    self._active.pop(server.id, None)
+        if old_state != new_state:
+            self._notify(STATE, server, old_state=old_state)
+        return True
+
+    # --- Notificações ---
+
+    def subscribe(self, callback):
+        """Registra `callback(event, server, info)`; retorna função para cancelar.
+
+        O callback é chamado na thread que causou a mudança, fora do lock.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _notify(self, event, server, **info):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, server, info)
+            except Exception as e:
+                print(f"Erro em assinante do registro ({event}): {e}")
+
+    # --- Índices (chamar com o lock) ---
+
+    def _index(self, server):
+        tags = tuple(getattr(server, "tags", ()) or ())
+        self._by_name[server.name] = server
+        if server.expected_port:
+            self._by_port.setdefault(server.expected_port, set()).add(server)
+        for tag in tags:
+            self._by_tag.setdefault(tag, {})[server.id] = server
+        group = getattr(server, "group", "") or ""
+        if group:
+            self._by_group.setdefault(group, {})[server.id] = server
+        self._index_keys[server.id] = (server.name, server.expected_port, tags, group)
+
+    def _unindex(self, server):
+        name, port, tags, group = self._index_keys.pop(server.id)
+        if self._by_name.get(name) is server:
+            del self._by_name[name]
+        if port:
+            self._by_port.get(port, set()).discard(server)
+        for tag in tags:
+            self._by_tag.get(tag, {}).pop(server.id, None)
+        if group:
+            self._by_group.get(group, {}).pop(server.id, None)
+
+
+def _in_id_order(members):
+    """Lista de um índice {id: servidor}. Os ids crescem a cada inclusão, então
+    ordená-los dá a ordem de inserção sem percorrer o registro inteiro (uma
+    edição reindexa o servidor, mas não muda o id)."""
+    if not members:
+        return []
+    return [members[server_id] for server_id in sorted(members)]
@@ -0,0 +1,253 @@
+"""Protocolo e cliente dos agentes do ServerFlow (gerência de várias máquinas).
+
+Cada máquina roda `agent.py`, que expõe os servidores locais em uma porta TCP.
+O protocolo é de linhas JSON (uma mensagem por linha, UTF-8):
+
+- pedidos do cliente: `{"id": 1, "op": "start", "server": "api"}`, com as
+  operações `hello` (autenticação por token), `list`, `start`, `stop`,
+  `restart`, `tail` (últimas linhas da saída), `input` (texto em `data` para
+  a entrada padrão) e `signal` (nome em `signal`, ex: "SIGHUP");
+- respostas do agente: `{"id": 1, "ok": true, "result": ...}` ou
+  `{"id": 1, "ok": false, "error": "..."}`;
+- eventos enviados pelo agente sem pedido, já em lote:
+  `{"event": "status", "servers": [...]}` só com os servidores que mudaram e
+  `{"event": "output", "lines": {"api": ["...", ...], ...}}` com a saída de
+  todos os servidores desde o último envio (multiplexada em uma mensagem).
+
+`AgentClient` mantém a conexão com um agente em uma thread própria, reconecta
+sozinho e entrega as mensagens recebidas em uma fila compartilhada entre os
+nós; a GUI consome essa fila em lotes e aplica as mensagens em um
+`RemoteState`, que guarda o último estado conhecido de cada nó.
+"""
+
+import collections
+import itertools
+import json
+import os
+import socket
+import threading
+
+PROTOCOL_VERSION = 1
+DEFAULT_AGENT_PORT = 7700
+CONNECT_TIMEOUT = 3.0
+RECONNECT_DELAY = 2.0  # Segundos entre tentativas de reconexão
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024  # Linhas maiores encerram a conexão
+NODES_FILE = "remote_nodes.json"  # Agentes conectados pela GUI
+OUTPUT_HISTORY = 500  # Linhas de saída guardadas por servidor remoto
+
+# Eventos gerados localmente pelo cliente (não vêm do agente)
+CONNECTED = "connected"
+DISCONNECTED = "disconnected"
+
+
+def encode(message):
+    """Serializa uma mensagem como uma linha JSON."""
+    return (
+        json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n"
+    ).encode("utf-8")
+
+
+def parse_address(text, default_port=DEFAULT_AGENT_PORT):
+    """Converte "host" ou "host:porta" em (host, porta). Levanta ValueError."""
+    host, _, port = text.strip().rpartition(":")
+    if not host:
+        host, port = port, ""
+    if not host:
+        raise ValueError("Endereço vazio")
+    return host, int(port) if port else default_port
+
+
+class AgentClient:
+    """Conexão com um agente, em uma thread própria.
+
+    As mensagens recebidas são colocadas em `events` como (nó, mensagem), em
+    que nó é "host:porta"; quedas e reconexões geram os eventos locais
+    `disconnected` e `connected`.
+    """
+
+    def __init__(self, host, port, events, token=""):
+        self.host = host
+        self.port = port
+        self.node = f"{host}:{port}"
+        self.token = token
+        self.events = events
+        self.connected = False
+        self._ids = itertools.count(1)
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=CONNECT_TIMEOUT + 1)
+
+    def request(self, op, **fields):
+        """Envia um pedido; a resposta chega em `events`. Retorna o id, ou None se
+        não houver conexão."""
+        request_id = next(self._ids)
+        sock = self._sock
+        if sock is None:
+            return None
+        try:
+            with self._send_lock:
+                sock.sendall(encode({"id": request_id, "op": op, **fields}))
+        except OSError:
+            return None
+        return request_id
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._session()
+            except (OSError, ValueError) as e:
+                error = str(e)
+            else:
+                error = "conexão encerrada pelo agente"
+            self._sock = None
+            self.connected = False
+            if not self._stop.is_set():
+                self.events.put((self.node, {"event": DISCONNECTED, "error": error}))
+            self._stop.wait(RECONNECT_DELAY)
+
+    def _session(self):
+        sock = socket.create_connection((self.host, self.port), CONNECT_TIMEOUT)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        try:
+            reader = sock.makefile("rb")
+            hello_id = self.request("hello", token=self.token, version=PROTOCOL_VERSION)
+            while not self._stop.is_set():
+                raw = reader.readline(MAX_MESSAGE_BYTES + 1)
+                if not raw:
+                    break
+                if len(raw) > MAX_MESSAGE_BYTES:
+                    raise ValueError("mensagem grande demais")
+                message = json.loads(raw)
+                if message.get("id") == hello_id:
+                    if not message.get("ok"):
+                        raise ValueError(message.get("error") or "recusado pelo agente")
+                    self.connected = True
+                    self.events.put(
+                        (self.node, {"event": CONNECTED, **message["result"]})
+                    )
+                    continue
+                self.events.put((self.node, message))
+        finally:
+            sock.close()
+
+
+def load_nodes(path=NODES_FILE):
+    """Lista de {"address": "host:porta", "token": ...} salva pela GUI."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [entry for entry in data if isinstance(entry, dict) and entry.get("address")]
+
+
+def save_nodes(nodes, path=NODES_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(nodes, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+class RemoteState:
+    """Último estado conhecido dos nós e de seus servidores.
+
+    Só é alterado pela thread que consome a fila de eventos (a da GUI), então
+    não precisa de lock. `dirty` indica que a tabela precisa ser redesenhada.
+    """
+
+    def __init__(self, output_history=OUTPUT_HISTORY):
+        self.output_history = output_history
+        self.nodes = {}  # nó -> {"connected", "hostname", "error"}
+        self.servers = {}  # (nó, servidor) -> último status recebido
+        self.output = {}  # (nó, servidor) -> deque com as últimas linhas
+        self.errors = []  # Mensagens de erro ainda não exibidas
+        self.dirty = True
+
+    def add_node(self, node):
+        self.nodes.setdefault(node, {"connected": False, "hostname": "", "error": ""})
+        self.dirty = True
+
+    def forget_node(self, node):
+        self.nodes.pop(node, None)
+        for key in [key for key in self.servers if key[0] == node]:
+            del self.servers[key]
+            self.output.pop(key, None)
+        self.dirty = True
+
+    def _update_servers(self, node, statuses):
+        for status in statuses:
+            self.servers[(node, status["name"])] = status
+        self.dirty = True
+
+    def apply(self, node, message):
+        """Aplica uma mensagem de `node`.
+
+        Retorna {(nó, servidor): linhas novas}; o valor None indica que o
+        histórico inteiro daquele servidor foi substituído (resposta de "tail").
+        """
+        info = self.nodes.get(node)
+        if info is None:
+            return {}  # Nó desconectado pela GUI; mensagem atrasada
+        event = message.get("event")
+        if event == "output":
+            new_lines = {}
+            for name, lines in message.get("lines", {}).items():
+                key = (node, name)
+                history = self.output.get(key)
+                if history is None:
+                    history = self.output[key] = collections.deque(
+                        maxlen=self.output_history
+                    )
+                history.extend(lines)
+                new_lines[key] = lines
+            return new_lines
+        if event == "status":
+            self._update_servers(node, message.get("servers", []))
+        elif event == CONNECTED:
+            info.update(connected=True, hostname=message.get("node", ""), error="")
+            # A lista do hello é completa: descarta servidores que sumiram
+            for key in [key for key in self.servers if key[0] == node]:
+                del self.servers[key]
+            self._update_servers(node, message.get("servers", []))
+        elif event == DISCONNECTED:
+            if info["connected"]:
+                self.errors.append(f"Nó {node} desconectado: {message.get('error')}")
+            info.update(connected=False, error=message.get("error", ""))
+            self.dirty = True
+        elif "id" in message:
+            if message.get("op") == "tail" and message.get("ok"):
+                key = (node, message.get("server"))
+                self.output[key] = collections.deque(
+                    message.get("result", []), maxlen=self.output_history
+                )
+                return {key: None}  # Histórico substituído: redesenhar tudo
+            elif not message.get("ok"):
+                target = message.get("server") or message.get("op") or "?"
+                self.errors.append(f"Nó {node}, {target}: {message.get('error')}")
+            elif isinstance(message.get("result"), dict):
+                self._update_servers(node, [message["result"]])
+        return {}
+
+    def pop_errors(self):
+        errors, self.errors = self.errors, []
+        return errors
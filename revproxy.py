@@ -0,0 +1,660 @@
+"""Proxy reverso HTTP local na frente dos servidores gerenciados.
+
+Uma única porta atende a stack inteira: cada servidor pode declarar uma rota
+(`proxy_route`), que é um prefixo de caminho ("/api") ou um nome de host
+("api.localhost"). A porta de destino vem do servidor no momento da
+requisição: o `expected_port`, ou o `backend_port` quando um reinício pelo
+proxy deixou o processo novo em outra porta.
+
+O proxy roda em um loop asyncio próprio e mantém, por destino, um pool de
+conexões keep-alive com os servidores. Corpos de resposta são repassados em
+streaming (Content-Length, chunked ou até o fim da conexão), assim como os de
+requisições que não podem ser reenviadas (POST, PATCH); os das demais são
+lidos antes, até MAX_BODY_BYTES, para o reenvio. Conexões com
+`Upgrade` (WebSocket, live reload) viram um túnel TCP dedicado. Cada rota
+acumula contadores de latência, vazão e reaproveitamento de conexões.
+"""
+
+import asyncio
+import collections
+import math
+import time
+
+from netutil import CHUNK_SIZE, AsyncioService, pipe
+
+DEFAULT_PROXY_PORT = 8800
+MAX_IDLE_PER_UPSTREAM = 32  # Conexões ociosas guardadas por destino
+UPSTREAM_IDLE_TIMEOUT = 30.0  # Segundos até descartar uma conexão ociosa
+STATS_WINDOW = 10.0  # Janela (s) usada para calcular a vazão
+# Métodos que podem ser reenviados se a conexão do pool tiver caído no meio
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+MAX_BODY_BYTES = 16 * 1024 * 1024  # Corpo guardado para reenvio; acima, 413
+
+# Cabeçalhos que valem só para um salto e não são repassados
+_HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "te",
+    "trailer",
+    "upgrade",
+}
+# Não repassados ao servidor: o proxy já respondeu o 100 Continue
+_REQUEST_ONLY = {"expect"}
+
+
+class _BodyTooLarge(Exception):
+    """Corpo da requisição maior que MAX_BODY_BYTES (respondido com 413)."""
+
+
+class Route:
+    """Liga um prefixo de caminho ou um host a um servidor gerenciado."""
+
+    def __init__(self, server, pattern):
+        self.server = server
+        self.pattern = pattern
+        self.is_host = not pattern.startswith("/")
+        self.prefix = None if self.is_host else pattern.rstrip("/") or "/"
+
+    @property
+    def name(self):
+        return self.server.name
+
+    @property
+    def port(self):
+        return getattr(self.server, "backend_port", None) or self.server.expected_port
+
+    def matches_path(self, path):
+        if self.prefix == "/":
+            return True
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+class RouteTable:
+    """Rotas indexadas: host em dicionário, prefixos do mais longo ao mais curto."""
+
+    def __init__(self, servers):
+        self.hosts = {}
+        self.prefixes = []
+        for server in servers:
+            pattern = (getattr(server, "proxy_route", "") or "").strip()
+            if not pattern or not server.expected_port:
+                continue
+            route = Route(server, pattern)
+            if route.is_host:
+                self.hosts.setdefault(pattern.lower(), route)
+            else:
+                self.prefixes.append(route)
+        self.prefixes.sort(key=lambda r: len(r.prefix), reverse=True)
+
+    def __len__(self):
+        return len(self.hosts) + len(self.prefixes)
+
+    def routes(self):
+        return list(self.hosts.values()) + self.prefixes
+
+    def resolve(self, host, path):
+        """Retorna a Route para o Host e o caminho da requisição, ou None."""
+        if host:
+            route = self.hosts.get(host.rsplit(":", 1)[0].lower())
+            if route is not None:
+                return route
+        path = path.split("?", 1)[0]
+        for route in self.prefixes:
+            if route.matches_path(path):
+                return route
+        return None
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+
+class RouteStats:
+    """Contadores de uma rota. Atualizados apenas pela thread do proxy."""
+
+    def __init__(self, max_samples=2048):
+        self.requests_total = 0
+        self.errors_total = 0
+        self.bytes_total = 0
+        self.reused_total = 0  # Requisições atendidas por conexão do pool
+        self.latencies = collections.deque(maxlen=max_samples)  # Total (s)
+        self.upstream_latencies = collections.deque(maxlen=max_samples)  # TTFB (s)
+        self._recent = collections.deque(maxlen=max_samples * 8)  # (fim, bytes)
+
+    def record(self, latency, upstream_latency, nbytes, reused, error=False):
+        self.requests_total += 1
+        self.bytes_total += nbytes
+        if reused:
+            self.reused_total += 1
+        if error:
+            self.errors_total += 1
+        self.latencies.append(latency)
+        if upstream_latency is not None:
+            self.upstream_latencies.append(upstream_latency)
+        self._recent.append((time.monotonic(), nbytes))
+
+    def snapshot(self, window=STATS_WINDOW):
+        """Resumo: vazão na janela recente e percentis das últimas latências."""
+        cutoff = time.monotonic() - window
+        recent = [n for t, n in list(self._recent) if t >= cutoff]
+        latencies = sorted(self.latencies)
+        upstream = sorted(self.upstream_latencies)
+        return {
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "bytes_total": self.bytes_total,
+            "reuse_ratio": (
+                self.reused_total / self.requests_total if self.requests_total else 0.0
+            ),
+            "requests_per_second": len(recent) / window,
+            "bytes_per_second": sum(recent) / window,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            "upstream_p50_ms": _percentile(upstream, 50) * 1000,
+        }
+
+
+class _Request:
+    __slots__ = ("method", "target", "version", "headers", "body", "body_length")
+
+    def header(self, name, default=None):
+        return _header(self.headers, name, default)
+
+
+def _parse_head(data):
+    """Separa a linha inicial e os cabeçalhos. Retorna (linha, [(nome, valor)])."""
+    lines = data.decode("latin-1").split("\r\n")
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError(f"cabeçalho inválido: {line!r}")
+        headers.append((name.strip(), value.strip()))
+    return lines[0], headers
+
+
+def _header(headers, name, default=None):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return default
+
+
+def _connection_tokens(headers):
+    value = _header(headers, "connection", "")
+    return {token.strip().lower() for token in value.split(",") if token.strip()}
+
+
+def _is_chunked(headers):
+    return "chunked" in _header(headers, "transfer-encoding", "").lower()
+
+
+def _content_length(headers):
+    """Content-Length da requisição (0 se ausente). Levanta ValueError se não for
+    um número inteiro não negativo."""
+    value = _header(headers, "content-length", "")
+    if not value:
+        return 0
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError(f"Content-Length inválido: {value!r}")
+    return int(value)
+
+
+def _chunk_size(line):
+    """Tamanho de um chunk a partir da sua linha. Levanta ValueError."""
+    size = line.split(b";", 1)[0].strip()
+    if not size or size.startswith((b"-", b"+")):
+        raise ValueError(f"tamanho de chunk inválido: {line!r}")
+    return int(size, 16)
+
+
+def _status_code(status_line):
+    """Código de status de uma linha de resposta. Levanta ValueError."""
+    try:
+        return int(status_line.split(" ", 2)[1])
+    except IndexError:
+        raise ValueError(f"linha de status inválida: {status_line!r}") from None
+
+
+async def _read_final_head(reader):
+    """Lê o cabeçalho da resposta final, descartando as provisórias (1xx como
+    100 Continue ou 103 Early Hints; 101 é final). Retorna (cabeçalho, status)."""
+    while True:
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = _status_code(head.split(b"\r\n", 1)[0].decode("latin-1"))
+        if not 100 <= status < 200 or status == 101:
+            return head, status
+
+
+async def _read_chunked(reader, limit):
+    """Lê um corpo chunked completo e devolve os bytes crus (ainda codificados).
+    Levanta _BodyTooLarge se os dados passarem de `limit` bytes."""
+    parts = []
+    total = 0
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        parts.append(line)
+        size = _chunk_size(line)
+        total += size
+        if total > limit:
+            raise _BodyTooLarge()
+        if size == 0:
+            while True:  # Trailers até a linha vazia
+                line = await reader.readuntil(b"\r\n")
+                parts.append(line)
+                if line == b"\r\n":
+                    return b"".join(parts)
+        parts.append(await reader.readexactly(size + 2))
+
+
+async def _relay_chunked(reader, writer):
+    """Repassa um corpo chunked em streaming. Retorna os bytes repassados."""
+    total = 0
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        writer.write(line)
+        size = _chunk_size(line)
+        if size == 0:
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                writer.write(line)
+                if line == b"\r\n":
+                    await writer.drain()
+                    return total
+        remaining = size + 2
+        while remaining:
+            data = await reader.readexactly(min(remaining, CHUNK_SIZE))
+            writer.write(data)
+            remaining -= len(data)
+            await writer.drain()
+        total += size
+
+
+async def _relay_exact(reader, writer, length):
+    remaining = length
+    while remaining:
+        data = await reader.read(min(remaining, CHUNK_SIZE))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", remaining)
+        writer.write(data)
+        remaining -= len(data)
+        await writer.drain()
+    return length
+
+
+async def _relay_until_eof(reader, writer):
+    total = 0
+    while True:
+        data = await reader.read(CHUNK_SIZE)
+        if not data:
+            return total
+        writer.write(data)
+        total += len(data)
+        await writer.drain()
+
+
+class UpstreamPool:
+    """Conexões keep-alive ociosas por destino (usado só na thread do proxy)."""
+
+    def __init__(
+        self, max_idle=MAX_IDLE_PER_UPSTREAM, idle_timeout=UPSTREAM_IDLE_TIMEOUT
+    ):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {}  # (host, porta) -> deque[(reader, writer, desde)]
+
+    async def acquire(self, host, port):
+        """Retorna (reader, writer, reaproveitada)."""
+        idle = self._idle.get((host, port))
+        now = time.monotonic()
+        while idle:
+            reader, writer, since = (
+                idle.pop()
+            )  # A mais recente tem menos chance de ter expirado
+            if (
+                now - since < self.idle_timeout
+                and not reader.at_eof()
+                and not writer.is_closing()
+            ):
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(host, port)
+        return reader, writer, False
+
+    def release(self, host, port, reader, writer):
+        idle = self._idle.setdefault((host, port), collections.deque())
+        if len(idle) >= self.max_idle or writer.is_closing():
+            writer.close()
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    def discard(self, host, port):
+        """Fecha as conexões ociosas com um destino que não será mais usado."""
+        for _, writer, _ in self._idle.pop((host, port), ()):
+            writer.close()
+
+    def idle_count(self):
+        return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class ReverseProxy(AsyncioService):
+    """Proxy reverso HTTP/1.1 com pool de conexões para os servidores.
+
+    `get_routes()` deve retornar a RouteTable atual; é chamada a cada
+    requisição, então quem a fornece deve mantê-la em cache.
+    """
+
+    def __init__(
+        self,
+        get_routes,
+        port=DEFAULT_PROXY_PORT,
+        host="127.0.0.1",
+        upstream_host="127.0.0.1",
+    ):
+        super().__init__()
+        self.get_routes = get_routes
+        self.port = port
+        self.host = host
+        self.upstream_host = upstream_host
+        self.stats = {}  # Nome da rota -> RouteStats
+        self.pool = UpstreamPool()
+        self.active = collections.Counter()  # porta -> requisições em andamento
+        self._server = None
+
+    def snapshot(self):
+        """Resumo por rota ({nome: dict}), seguro para chamar de outra thread."""
+        return {name: stats.snapshot() for name, stats in list(self.stats.items())}
+
+    def discard_upstream(self, port):
+        """Descarta as conexões do pool com `port` (chamável de outra thread)."""
+        if self.running:
+            self._loop.call_soon_threadsafe(self.pool.discard, self.upstream_host, port)
+
+    async def _open(self):
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, reuse_address=True
+        )
+
+    async def _close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self.pool.close()
+        await super()._close()
+
+    async def _handle_client(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        client_ip = peer[0] if peer else ""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 431, "Cabeçalhos muito grandes")
+                    break
+                except (asyncio.IncompleteReadError, OSError):
+                    break
+                try:
+                    request = await self._read_request(head, reader, writer)
+                except _BodyTooLarge:
+                    await self._send_error(writer, 413, "Corpo muito grande")
+                    break
+                except (
+                    ValueError,
+                    asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError,
+                ):
+                    await self._send_error(writer, 400, "Requisição inválida")
+                    break
+                if not await self._proxy(request, reader, writer, client_ip):
+                    break
+        except (OSError, asyncio.CancelledError):
+            pass  # Cliente desconectou ou o proxy está sendo encerrado
+        finally:
+            writer.close()
+
+    async def _read_request(self, head, reader, writer):
+        start_line, headers = _parse_head(head)
+        parts = start_line.split(" ")
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError(f"linha de requisição inválida: {start_line!r}")
+        request = _Request()
+        request.method, request.target, request.version = parts
+        request.headers = headers
+        chunked = _is_chunked(headers)
+        request.body_length = None if chunked else _content_length(headers)
+        # O corpo de um método idempotente é lido por inteiro para poder reenviar
+        # se uma conexão do pool tiver sido fechada pelo servidor; os demais
+        # nunca são reenviados e seguem em streaming (body None) em _forward.
+        buffered = request.method in IDEMPOTENT_METHODS
+        if buffered and not chunked and request.body_length > MAX_BODY_BYTES:
+            raise _BodyTooLarge()
+        # Quem pediu "Expect: 100-continue" recebe o 100 do próprio proxy (o
+        # Expect não segue adiante)
+        if (
+            request.version == "HTTP/1.1"
+            and _header(headers, "expect", "").lower() == "100-continue"
+        ):
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        if not buffered:
+            request.body = None
+        elif chunked:
+            request.body = await _read_chunked(reader, MAX_BODY_BYTES)
+        elif request.body_length:
+            request.body = await reader.readexactly(request.body_length)
+        else:
+            request.body = b""
+        return request
+
+    def _client_keeps_alive(self, request):
+        tokens = _connection_tokens(request.headers)
+        if request.version == "HTTP/1.0":
+            return "keep-alive" in tokens
+        return "close" not in tokens
+
+    def _upstream_head(self, request, client_ip, upgrade=False):
+        lines = [f"{request.method} {request.target} HTTP/1.1"]
+        drop = _HOP_BY_HOP | _REQUEST_ONLY | _connection_tokens(request.headers)
+        for name, value in request.headers:
+            lower = name.lower()
+            if lower in drop and not (upgrade and lower in ("connection", "upgrade")):
+                continue
+            if lower == "x-forwarded-for":
+                client_ip = f"{value}, {client_ip}"
+                continue
+            lines.append(f"{name}: {value}")
+        lines.append(f"X-Forwarded-For: {client_ip}")
+        host = request.header("host")
+        if host:
+            lines.append(f"X-Forwarded-Host: {host}")
+        lines.append("X-Forwarded-Proto: http")
+        if not upgrade:
+            lines.append("Connection: keep-alive")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_error(self, writer, status, message, keep_alive=False):
+        body = f"{status} {message}\n".encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {message}\r\n"
+                "Content-Type: text/plain; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("utf-8")
+            + body
+        )
+        await writer.drain()
+
+    async def _proxy(self, request, client_reader, client_writer, client_ip):
+        """Atende uma requisição. Retorna True se a conexão do cliente continua."""
+        t0 = time.perf_counter()
+        keep_alive = self._client_keeps_alive(request)
+        route = self.get_routes().resolve(request.header("host"), request.target)
+        if route is None or not route.port:
+            keep_alive = keep_alive and request.body is not None  # Corpo não lido
+            await self._send_error(client_writer, 404, "Nenhuma rota", keep_alive)
+            return keep_alive
+        stats = self.stats.setdefault(route.name, RouteStats())
+        port = route.port  # Lida uma vez: um reinício pode trocá-la no meio
+        self.active[port] += 1
+        try:
+            if "upgrade" in _connection_tokens(request.headers):
+                return await self._tunnel(
+                    request, port, client_reader, client_writer, client_ip, stats, t0
+                )
+            return await self._forward(
+                request,
+                port,
+                client_reader,
+                client_writer,
+                client_ip,
+                keep_alive,
+                stats,
+                t0,
+            )
+        finally:
+            self.active[port] -= 1
+
+    async def _forward(
+        self,
+        request,
+        port,
+        client_reader,
+        client_writer,
+        client_ip,
+        keep_alive,
+        stats,
+        t0,
+    ):
+        """Repassa a requisição pelo pool e a resposta em streaming."""
+        head = self._upstream_head(request, client_ip)
+        # Um corpo em streaming pode ter ficado pela metade: após um erro a
+        # conexão do cliente não continua
+        recoverable = keep_alive and request.body is not None
+        for attempt in range(2):
+            try:
+                up_reader, up_writer, reused = await self.pool.acquire(
+                    self.upstream_host, port
+                )
+            except OSError:
+                stats.record(time.perf_counter() - t0, None, 0, False, error=True)
+                await self._send_error(
+                    client_writer, 502, "Servidor indisponível", recoverable
+                )
+                return recoverable
+            try:
+                if request.body is None:
+                    up_writer.write(head)
+                    if _is_chunked(request.headers):
+                        await _relay_chunked(client_reader, up_writer)
+                    else:
+                        await _relay_exact(
+                            client_reader, up_writer, request.body_length
+                        )
+                else:
+                    up_writer.write(head + request.body)
+                await up_writer.drain()
+                response_head, status = await _read_final_head(up_reader)
+                break
+            except (
+                OSError,
+                ValueError,
+                asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError,
+            ):
+                up_writer.close()
+                # Só reenvia o que pode ser repetido sem efeito duplicado
+                if not reused or attempt or request.method not in IDEMPOTENT_METHODS:
+                    stats.record(time.perf_counter() - t0, None, 0, reused, error=True)
+                    await self._send_error(
+                        client_writer, 502, "Resposta inválida do servidor", recoverable
+                    )
+                    return recoverable
+                # Conexão do pool fechada pelo servidor: tenta uma nova
+        upstream_latency = time.perf_counter() - t0
+
+        status_line, headers = _parse_head(response_head)
+        no_body = (
+            request.method == "HEAD" or 100 <= status < 200 or status in (204, 304)
+        )
+        length = _header(headers, "content-length")
+        framed = no_body or _is_chunked(headers) or length is not None
+        upstream_reusable = framed and "close" not in _connection_tokens(headers)
+        keep_alive = keep_alive and framed
+
+        out = [status_line]
+        drop = _HOP_BY_HOP | _connection_tokens(headers)
+        out.extend(
+            f"{name}: {value}" for name, value in headers if name.lower() not in drop
+        )
+        out.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        client_writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+
+        nbytes = 0
+        try:
+            if no_body:
+                await client_writer.drain()
+            elif _is_chunked(headers):
+                nbytes = await _relay_chunked(up_reader, client_writer)
+            elif length is not None:
+                nbytes = await _relay_exact(up_reader, client_writer, int(length))
+            else:
+                nbytes = await _relay_until_eof(up_reader, client_writer)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            up_writer.close()
+            stats.record(
+                time.perf_counter() - t0, upstream_latency, nbytes, reused, error=True
+            )
+            return False
+
+        if upstream_reusable:
+            self.pool.release(self.upstream_host, port, up_reader, up_writer)
+        else:
+            up_writer.close()
+        stats.record(
+            time.perf_counter() - t0,
+            upstream_latency,
+            nbytes,
+            reused,
+            error=status >= 500,
+        )
+        return keep_alive
+
+    async def _tunnel(
+        self, request, port, client_reader, client_writer, client_ip, stats, t0
+    ):
+        """Repassa uma conexão com Upgrade (ex: WebSocket) como túnel TCP."""
+        try:
+            up_reader, up_writer = await asyncio.open_connection(
+                self.upstream_host, port
+            )
+        except OSError:
+            stats.record(time.perf_counter() - t0, None, 0, False, error=True)
+            await self._send_error(client_writer, 502, "Servidor indisponível")
+            return False
+        up_writer.write(
+            self._upstream_head(request, client_ip, upgrade=True)
+            + (request.body or b"")  # Sem corpo lido, o túnel o repassa
+        )
+        stats.record(time.perf_counter() - t0, None, 0, False)
+        try:
+            await asyncio.gather(
+                pipe(client_reader, up_writer), pipe(up_reader, client_writer)
+            )
+        finally:
+            up_writer.close()
+        return False
@@ -0,0 +1,334 @@
+"""Agenda de ações dos servidores (iniciar, parar e reiniciar em horários).
+
+Cada servidor pode ter uma lista de regras no campo `schedule`:
+
+- `"start 0 8 * * 1-5"`, `"stop ..."` ou `"restart ..."`: a ação seguida de
+  uma expressão cron de 5 campos (minuto, hora, dia, mês, dia da semana com
+  0 ou 7 = domingo; aceita `*`, listas, intervalos e passos `*/15`);
+- `"window 08:00-19:00 1-5"`: janela de funcionamento, equivalente a um start
+  no início e um stop no fim (janelas que passam da meia-noite também valem).
+  Os dias da semana são opcionais e usam a mesma sintaxe do cron.
+
+Todas as regras de todos os servidores ficam em uma única roda de
+temporização (`TimerWheel`) avançada por uma só thread; cada disparo agenda a
+próxima ocorrência da mesma regra.
+"""
+
+import datetime
+import threading
+import time
+
+ACTIONS = ("start", "stop", "restart")
+WINDOW = "window"
+DEFAULT_TICK = 1.0  # Segundos por posição da roda
+DEFAULT_SLOTS = 512
+MAX_SEARCH_YEARS = 5  # Expressões que nunca casam (30 de fevereiro) param aqui
+
+# (mínimo, máximo) de cada campo do cron
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_FIELD_NAMES = ("minuto", "hora", "dia", "mês", "dia da semana")
+
+
+def _parse_field(text, low, high, name):
+    values = set()
+    for part in text.split(","):
+        body, has_step, step = part.partition("/")
+        step = int(step) if has_step else 1
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, end = (int(value) for value in body.split("-", 1))
+        else:
+            start = int(body)
+            end = high if has_step else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"{name} fora do intervalo {low}-{high}: '{part}'")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def _cron_weekday(date):
+    return (date.weekday() + 1) % 7  # cron: 0 = domingo
+
+
+class CronExpression:
+    """Expressão cron de 5 campos, avaliada no horário local."""
+
+    def __init__(self, text):
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"A expressão cron precisa de 5 campos: '{text}'")
+        try:
+            parsed = [
+                _parse_field(field, low, high, name)
+                for field, (low, high), name in zip(fields, _FIELD_RANGES, _FIELD_NAMES)
+            ]
+        except ValueError as e:
+            raise ValueError(f"Expressão cron inválida '{text}': {e}") from None
+        self.text = text
+        self.minutes, self.hours, self.days, self.months = parsed[:4]
+        self.weekdays = frozenset(day % 7 for day in parsed[4])
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, date):
+        # Como no cron: com dia e dia da semana restritos, basta um dos dois
+        if self._any_day and self._any_weekday:
+            return True
+        if self._any_day:
+            return _cron_weekday(date) in self.weekdays
+        if self._any_weekday:
+            return date.day in self.days
+        return date.day in self.days or _cron_weekday(date) in self.weekdays
+
+    def next_after(self, timestamp):
+        """Próximo instante (timestamp) que casa com a expressão, estritamente
+        depois de `timestamp`; None se não houver nos próximos anos."""
+        moment = datetime.datetime.fromtimestamp(timestamp).replace(
+            second=0, microsecond=0
+        ) + datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=366 * MAX_SEARCH_YEARS)
+        # Pula meses, dias e horas inteiros antes de testar minuto a minuto
+        while moment < limit:
+            if moment.month not in self.months:
+                year = moment.year + moment.month // 12
+                moment = moment.replace(
+                    year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        return None
+
+
+def _parse_clock(text):
+    hour, _, minute = text.partition(":")
+    hour, minute = int(hour), int(minute or 0)
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"Horário inválido: '{text}'")
+    return hour, minute
+
+
+class Window:
+    """Janela diária de funcionamento ("08:00-19:00", dias opcionais)."""
+
+    def __init__(self, text, days="*"):
+        start, _, end = text.partition("-")
+        self.start = _parse_clock(start)
+        self.end = _parse_clock(end)
+        if self.start == self.end:
+            raise ValueError(f"Janela vazia: '{text}'")
+        self.days = days
+        self.weekdays = frozenset(
+            day % 7 for day in _parse_field(days, 0, 7, "dia da semana")
+        )
+
+    @property
+    def overnight(self):
+        return self.end < self.start
+
+    def contains(self, moment):
+        clock = (moment.hour, moment.minute)
+        today = _cron_weekday(moment)
+        if not self.overnight:
+            return today in self.weekdays and self.start <= clock < self.end
+        yesterday = (today - 1) % 7
+        return (today in self.weekdays and clock >= self.start) or (
+            yesterday in self.weekdays and clock < self.end
+        )
+
+    def rules(self):
+        """As regras start/stop equivalentes à janela."""
+        stop_days = self.days
+        if self.overnight and self.days != "*":
+            # O fim cai no dia seguinte ao início
+            stop_days = ",".join(str((day + 1) % 7) for day in sorted(self.weekdays))
+        return [
+            Rule(
+                "start",
+                CronExpression(f"{self.start[1]} {self.start[0]} * * {self.days}"),
+            ),
+            Rule(
+                "stop", CronExpression(f"{self.end[1]} {self.end[0]} * * {stop_days}")
+            ),
+        ]
+
+
+class Rule:
+    """Uma ação e a expressão cron que a dispara."""
+
+    def __init__(self, action, cron):
+        self.action = action
+        self.cron = cron
+
+
+class Schedule:
+    """Regras de um servidor, já interpretadas."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.rules = []
+        self.windows = []
+        for entry in self.entries:
+            words = str(entry).split()
+            if not words:
+                continue
+            action = words[0].lower()
+            if action == WINDOW:
+                if len(words) not in (2, 3):
+                    raise ValueError(f"Use 'window HH:MM-HH:MM [dias]': '{entry}'")
+                window = Window(words[1], words[2] if len(words) == 3 else "*")
+                self.windows.append(window)
+                self.rules.extend(window.rules())
+            elif action in ACTIONS:
+                self.rules.append(Rule(action, CronExpression(" ".join(words[1:]))))
+            else:
+                raise ValueError(
+                    f"Ação desconhecida '{words[0]}' (use start, stop, restart "
+                    f"ou window): '{entry}'"
+                )
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def in_window(self, moment=None):
+        """True/False se o servidor deve estar rodando agora pelas janelas;
+        None se não há janelas (vale o autostart)."""
+        if not self.windows:
+            return None
+        moment = moment or datetime.datetime.now()
+        return any(window.contains(moment) for window in self.windows)
+
+
+def parse_schedule(entries):
+    """Interpreta a lista `schedule` de um servidor. Levanta ValueError."""
+    return Schedule(entries or [])
+
+
+class _Timer:
+    __slots__ = ("deadline", "key", "rule", "cancelled")
+
+    def __init__(self, deadline, key, rule):
+        self.deadline = deadline
+        self.key = key
+        self.rule = rule
+        self.cancelled = False
+
+
+class TimerWheel:
+    """Roda de temporização com posições de `tick` segundos.
+
+    Um temporizador vai para a posição do seu prazo (módulo o tamanho da roda);
+    cada avanço visita só as posições dos ticks decorridos e dispara as
+    entradas já vencidas, deixando as de voltas futuras no lugar. Inserir e
+    disparar custam O(1) por temporizador, independentemente de quantos há.
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS, now=None):
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]
+        self._current = int((time.time() if now is None else now) // tick)
+
+    def add(self, timer):
+        # Prazos já vencidos vão para a próxima posição a ser visitada
+        tick = max(int(timer.deadline // self.tick), self._current + 1)
+        self._slots[tick % len(self._slots)].append(timer)
+
+    def advance(self, now):
+        """Retorna os temporizadores vencidos até `now` (sem os cancelados)."""
+        target = int(now // self.tick)
+        steps = min(target - self._current, len(self._slots))
+        due = []
+        for step in range(1, steps + 1):
+            index = (self._current + step) % len(self._slots)
+            waiting = []
+            for timer in self._slots[index]:
+                if timer.cancelled:
+                    continue
+                if int(timer.deadline // self.tick) <= target:
+                    due.append(timer)
+                else:
+                    waiting.append(timer)
+            self._slots[index] = waiting
+        self._current = max(self._current, target)
+        return due
+
+
+class Scheduler:
+    """Executa as agendas de todos os servidores em uma única thread.
+
+    `dispatch(chave, ação)` é chamado na thread do agendador; quem o fornece
+    decide em que thread a ação realmente roda.
+    """
+
+    def __init__(self, dispatch, tick=DEFAULT_TICK):
+        self.dispatch = dispatch
+        self.tick = tick
+        self._wheel = TimerWheel(tick)
+        self._timers = {}  # chave -> [_Timer] pendentes
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def set_schedule(self, key, schedule, now=None):
+        """Substitui as regras de `key` (uma Schedule vazia remove a agenda)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._cancel(key)
+            for rule in schedule.rules:
+                self._arm(key, rule, now)
+
+    def remove(self, key):
+        with self._lock:
+            self._cancel(key)
+
+    def next_runs(self, key):
+        """[(timestamp, ação)] pendentes de `key`, em ordem."""
+        with self._lock:
+            timers = list(self._timers.get(key, ()))
+        return sorted((timer.deadline, timer.rule.action) for timer in timers)
+
+    def _cancel(self, key):
+        for timer in self._timers.pop(key, ()):
+            timer.cancelled = True
+
+    def _arm(self, key, rule, after):
+        deadline = rule.cron.next_after(after)
+        if deadline is None:
+            return
+        timer = _Timer(deadline, key, rule)
+        self._timers.setdefault(key, []).append(timer)
+        self._wheel.add(timer)
+
+    def run_due(self, now=None):
+        """Dispara as regras vencidas e agenda as próximas ocorrências."""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = self._wheel.advance(now)
+            for timer in due:
+                self._timers[timer.key].remove(timer)
+                self._arm(timer.key, timer.rule, timer.deadline)
+        for timer in due:
+            self.dispatch(timer.key, timer.rule.action)
+        return len(due)
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Erro no agendador: {e}")
@@ -0,0 +1,91 @@
+"""Entrada padrão interativa dos servidores (consoles de administração, REPLs).
+
+Com `stdin` ativado o processo é iniciado com um pipe na entrada padrão e um
+`InputChannel` escreve nele. Quem envia (a GUI ou o agente) só coloca o texto
+em uma fila limitada e volta na hora: se o processo não lê a entrada, a fila
+enche e os envios seguintes são recusados, em vez de travar a thread do Tk
+numa escrita bloqueada. A escrita acontece em uma thread do canal, com o pipe
+em modo não bloqueante (POSIX), então fechar o canal também nunca espera o
+processo.
+"""
+
+import os
+import queue
+import select
+import threading
+
+MAX_PENDING = 256  # Envios aguardando escrita antes de recusar novos
+WRITE_POLL = 0.5  # Segundos esperando o pipe aceitar dados antes de reconferir
+
+
+class InputChannel:
+    """Escreve na entrada padrão de um processo a partir de uma fila limitada."""
+
+    def __init__(self, pipe, max_pending=MAX_PENDING):
+        self.pipe = pipe
+        self.closed = False
+        self.bytes_written = 0
+        self.dropped = 0  # Envios recusados com a fila cheia
+        self.full = False  # Recusando envios desde a última vez que a fila encheu
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, data):
+        """Enfileira `data` (str ou bytes) sem bloquear. Retorna False se o canal
+        está fechado ou a fila está cheia."""
+        if self.closed:
+            return False
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+            self.full = True
+            return False
+        self.full = False
+        return True
+
+    def close(self):
+        """Descarta o que ainda não foi escrito e fecha o pipe (sem esperar)."""
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # A thread confere `closed` antes de cada escrita
+
+    def _run(self):
+        try:
+            fd = self.pipe.fileno()
+            if os.name == "posix":
+                os.set_blocking(fd, False)
+            while not self.closed:
+                data = self._queue.get()
+                if data is None or self.closed:
+                    break
+                self._write(fd, memoryview(data))
+        except (OSError, ValueError):
+            pass  # O processo fechou a entrada ou saiu
+        finally:
+            self.closed = True
+            try:
+                self.pipe.close()
+            except OSError:
+                pass
+
+    def _write(self, fd, view):
+        if os.name != "posix":
+            # Sem select() em pipes: a escrita bloqueia só esta thread
+            self.pipe.write(view)
+            self.pipe.flush()
+            self.bytes_written += len(view)
+            return
+        while view and not self.closed:
+            try:
+                written = os.write(fd, view)
+            except BlockingIOError:
+                select.select([], [fd], [], WRITE_POLL)
+                continue
+            view = view[written:]
+            self.bytes_written += written
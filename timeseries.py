@@ -0,0 +1,305 @@
+"""Séries temporais das métricas de cada servidor, com tamanho fixo em disco.
+
+Cada servidor tem um arquivo em `logs/timeseries/` mapeado em memória (mmap).
+O arquivo guarda, para cada nível de resolução (1 s, 1 min e 1 h por padrão),
+um buffer circular de float32 por métrica, indexado pelo próprio tempo:
+o intervalo `t // resolução` cai sempre na posição `intervalo % posições`.
+Assim não há ponteiro de escrita, posições puladas ficam NaN e o arquivo nunca
+cresce. Cada amostra atualiza os três níveis de uma vez (o valor de um
+intervalo mais grosso é a média das amostras que caíram nele), então a
+redução de resolução não precisa de uma etapa separada.
+
+Com os níveis padrão um servidor ocupa ~58 KB (15 min por segundo, 1 dia por
+minuto e 8 semanas por hora); 100 servidores cabem em ~6 MB. Uma consulta de
+intervalo copia no máximo dois trechos contíguos do mmap para um
+`array('f')`, sem laço em Python por ponto.
+"""
+
+import array
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+DEFAULT_DIRECTORY = os.path.join("logs", "timeseries")
+METRICS = ("cpu_percent", "rss_mb", "lines_per_second", "latency_ms")
+# (segundos por intervalo, posições guardadas)
+TIERS = ((1, 900), (60, 1440), (3600, 1344))
+FLUSH_INTERVAL = 60.0  # Segundos entre gravações explícitas do mmap em disco
+
+MAGIC = b"SFTS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHH")  # Magia, versão, métricas, níveis
+_TIER = struct.Struct("<IIq")  # Resolução, posições, último intervalo gravado
+NAN = float("nan")
+_NO_BUCKET = -1
+
+
+def series_filename(name):
+    """Nome de arquivo seguro e estável para o servidor `name`."""
+    safe = re.sub(r"[^\w.-]", "_", name)[:40]
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}-{digest}.tsdb"
+
+
+class SeriesFile:
+    """As séries de um servidor em um arquivo mapeado em memória.
+
+    Não é thread-safe; `TimeSeriesStore` serializa os acessos.
+    """
+
+    def __init__(self, path, metrics=METRICS, tiers=TIERS):
+        self.path = path
+        self.metrics = tuple(metrics)
+        self.tiers = tuple(tiers)
+        self._data_offset = _HEADER.size + _TIER.size * len(self.tiers)
+        size = self._data_offset + 4 * len(self.metrics) * sum(
+            slots for _, slots in self.tiers
+        )
+        fresh = not self._layout_matches(size)
+        with open(path, "r+b" if not fresh else "w+b") as f:
+            if fresh:
+                f.truncate(size)
+            self._mmap = mmap.mmap(f.fileno(), size)
+        self._values = memoryview(self._mmap)[self._data_offset :].cast("f")
+        # Início (em índices de float) de cada nível no arquivo
+        self._tier_starts = []
+        start = 0
+        for _, slots in self.tiers:
+            self._tier_starts.append(start)
+            start += slots * len(self.metrics)
+        if fresh:
+            self._initialize()
+        self._last_buckets = [self._read_bucket(i) for i in range(len(self.tiers))]
+        # Soma e contagem do intervalo atual de cada nível, por métrica
+        self._sums = [[0.0] * len(self.metrics) for _ in self.tiers]
+        self._counts = [[0] * len(self.metrics) for _ in self.tiers]
+        self._resume_accumulators()
+
+    def _layout_matches(self, size):
+        """True se o arquivo existe com o mesmo formato (senão é recriado)."""
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(self._data_offset)
+            if os.path.getsize(self.path) != size:
+                return False
+        except OSError:
+            return False
+        if len(header) < self._data_offset:
+            return False
+        magic, version, metrics, tiers = _HEADER.unpack_from(header)
+        if (magic, version, metrics, tiers) != (
+            MAGIC,
+            VERSION,
+            len(self.metrics),
+            len(self.tiers),
+        ):
+            return False
+        for index, (resolution, slots) in enumerate(self.tiers):
+            stored = _TIER.unpack_from(header, _HEADER.size + index * _TIER.size)
+            if stored[:2] != (resolution, slots):
+                return False
+        return True
+
+    def _initialize(self):
+        _HEADER.pack_into(
+            self._mmap, 0, MAGIC, VERSION, len(self.metrics), len(self.tiers)
+        )
+        for index, (resolution, slots) in enumerate(self.tiers):
+            _TIER.pack_into(
+                self._mmap,
+                _HEADER.size + index * _TIER.size,
+                resolution,
+                slots,
+                _NO_BUCKET,
+            )
+        self._values[:] = array.array("f", [NAN]) * len(self._values)
+
+    def _read_bucket(self, tier):
+        return _TIER.unpack_from(self._mmap, _HEADER.size + tier * _TIER.size)[2]
+
+    def _write_bucket(self, tier, bucket):
+        struct.pack_into("<q", self._mmap, _HEADER.size + tier * _TIER.size + 8, bucket)
+        self._last_buckets[tier] = bucket
+
+    def _offset(self, tier, metric, bucket):
+        slots = self.tiers[tier][1]
+        return self._tier_starts[tier] + metric * slots + bucket % slots
+
+    def _resume_accumulators(self):
+        # Ao reabrir no meio de um intervalo, o valor gravado conta como uma amostra
+        for tier in range(len(self.tiers)):
+            bucket = self._last_buckets[tier]
+            if bucket == _NO_BUCKET:
+                continue
+            for metric in range(len(self.metrics)):
+                value = self._values[self._offset(tier, metric, bucket)]
+                if not math.isnan(value):
+                    self._sums[tier][metric] = value
+                    self._counts[tier][metric] = 1
+
+    def _clear(self, tier, first, last):
+        """Marca como vazios (NaN) os intervalos de `first` a `last`, inclusive."""
+        slots = self.tiers[tier][1]
+        count = min(last - first + 1, slots)
+        if count <= 0:
+            return
+        for metric in range(len(self.metrics)):
+            base = self._tier_starts[tier] + metric * slots
+            start = first % slots
+            head = min(count, slots - start)
+            self._values[base + start : base + start + head] = (
+                array.array("f", [NAN]) * head
+            )
+            if count > head:
+                self._values[base : base + count - head] = array.array("f", [NAN]) * (
+                    count - head
+                )
+
+    def add(self, values, now=None):
+        """Grava uma amostra (`values` na ordem de `metrics`; None = sem valor)."""
+        now = time.time() if now is None else now
+        for tier, (resolution, _) in enumerate(self.tiers):
+            bucket = int(now // resolution)
+            last = self._last_buckets[tier]
+            if bucket < last:
+                continue  # Relógio voltou; ignora em vez de sobrescrever o futuro
+            sums, counts = self._sums[tier], self._counts[tier]
+            if bucket != last:
+                if last == _NO_BUCKET:
+                    self._clear(tier, bucket, bucket)
+                else:
+                    self._clear(tier, last + 1, bucket)
+                self._write_bucket(tier, bucket)
+                sums[:] = [0.0] * len(sums)
+                counts[:] = [0] * len(counts)
+            for metric, value in enumerate(values):
+                if value is None or math.isnan(value):
+                    continue
+                sums[metric] += value
+                counts[metric] += 1
+                self._values[self._offset(tier, metric, bucket)] = (
+                    sums[metric] / counts[metric]
+                )
+
+    def _choose_tier(self, start, end, resolution):
+        if resolution is not None:
+            for tier, (tier_resolution, _) in enumerate(self.tiers):
+                if tier_resolution >= resolution:
+                    return tier
+            return len(self.tiers) - 1
+        # O nível mais fino cujo histórico ainda alcança `start`
+        for tier, (tier_resolution, slots) in enumerate(self.tiers):
+            last = self._last_buckets[tier]
+            reference = last if last != _NO_BUCKET else int(end // tier_resolution)
+            if start >= (reference - slots + 1) * tier_resolution:
+                return tier
+        return len(self.tiers) - 1
+
+    def query(self, metric, start, end=None, resolution=None):
+        """Valores de `metric` entre `start` e `end` (timestamps).
+
+        Retorna (timestamp do primeiro ponto, segundos entre pontos,
+        array('f')); pontos sem amostra são NaN. Sem `resolution`, usa o nível
+        mais fino que ainda cobre o início do intervalo.
+        """
+        end = time.time() if end is None else end
+        metric_index = self.metrics.index(metric)
+        tier = self._choose_tier(start, end, resolution)
+        tier_resolution, slots = self.tiers[tier]
+        first = int(start // tier_resolution)
+        last = int(end // tier_resolution)
+        written = self._last_buckets[tier]
+        result = array.array("f", [NAN]) * max(last - first + 1, 0)
+        if written == _NO_BUCKET:
+            return first * tier_resolution, tier_resolution, result
+        # Só o trecho que ainda está no buffer (as últimas `slots` posições)
+        low = max(first, written - slots + 1)
+        high = min(last, written)
+        if low <= high:
+            base = self._tier_starts[tier] + metric_index * slots
+            count = high - low + 1
+            start_slot = low % slots
+            head = min(count, slots - start_slot)
+            offset = low - first
+            result[offset : offset + head] = array.array(
+                "f", self._values[base + start_slot : base + start_slot + head]
+            )
+            if count > head:
+                result[offset + head : offset + count] = array.array(
+                    "f", self._values[base : base + count - head]
+                )
+        return first * tier_resolution, tier_resolution, result
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self._values.release()
+        self._mmap.flush()
+        self._mmap.close()
+
+
+class TimeSeriesStore:
+    """Um SeriesFile por servidor, abertos sob demanda; thread-safe."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, metrics=METRICS, tiers=TIERS):
+        self.directory = directory
+        self.metrics = tuple(metrics)
+        self.tiers = tuple(tiers)
+        self._series = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _get(self, name, create):
+        series = self._series.get(name)
+        if series is None:
+            path = os.path.join(self.directory, series_filename(name))
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            series = self._series[name] = SeriesFile(path, self.metrics, self.tiers)
+        return series
+
+    def record(self, name, values, now=None):
+        """Grava uma amostra do servidor `name` (dicionário métrica -> valor)."""
+        row = [values.get(metric) for metric in self.metrics]
+        with self._lock:
+            self._get(name, create=True).add(row, now)
+            if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._last_flush = time.monotonic()
+                for series in self._series.values():
+                    series.flush()
+
+    def query(self, name, metric, start, end=None, resolution=None):
+        """Como SeriesFile.query; retorna None se o servidor não tem histórico."""
+        with self._lock:
+            series = self._get(name, create=False)
+            if series is None:
+                return None
+            return series.query(metric, start, end, resolution)
+
+    def close(self):
+        with self._lock:
+            for series in self._series.values():
+                series.close()
+            self._series.clear()
+
+
+def resample(values, width):
+    """Reduz `values` a no máximo `width` pontos pela média de cada trecho
+    (ignorando NaN; trechos sem valor viram NaN)."""
+    if len(values) <= width:
+        return list(values)
+    result = []
+    for column in range(width):
+        chunk = values[
+            column * len(values) // width : (column + 1) * len(values) // width
+        ]
+        present = [value for value in chunk if not math.isnan(value)]
+        result.append(sum(present) / len(present) if present else NAN)
+    return result